@@ -1,6 +1,23 @@
 #include "Glue.h"
 
+#include <sys/stat.h>
+
 namespace Droid
 {
     Glue* Glue::_instance = nullptr;
+
+    std::string Glue::FindPushedEmbeddedFile(std::string_view path) const
+    {
+        const char* externalDataPath = GetExternalDataPath();
+        if (!externalDataPath || !*externalDataPath) {
+            return {};
+        }
+        // Layout of runner droid_assets.py: <external files dir>/embedded/<path>
+        std::string result = std::string(externalDataPath) + "/embedded/" + std::string(path);
+        struct stat st{};
+        if (stat(result.c_str(), &st) != 0 || !S_ISREG(st.st_mode)) {
+            return {};
+        }
+        return result;
+    }
 }
@@ -1,6 +1,9 @@
 #pragma once
 #include <jni.h>
 
+#include <string>
+#include <string_view>
+
 struct AAssetManager;
 
 namespace Droid
@@ -20,5 +23,12 @@ namespace Droid
 
         [[nodiscard]] virtual JNIEnv* GetMainJNIEnv() const = 0;
         [[nodiscard]] virtual AAssetManager* GetAssetManager() const = 0;
+        /// App external files directory (i.e. /storage/emulated/0/Android/data/<package>/files), nullptr if not available.
+        [[nodiscard]] virtual const char* GetExternalDataPath() const = 0;
+
+        /// Filesystem path of embedded file (path as in embedded data layout, i.e. "data/fonts/Roboto.ttf")
+        /// pushed by the runner into external files dir ("push" embedded mode), checked before APK assets.
+        /// Empty if not pushed: the file should be read from assets via GetAssetManager().
+        [[nodiscard]] std::string FindPushedEmbeddedFile(std::string_view path) const;
     };
 }
@@ -36,6 +36,7 @@ namespace {
         // Droid::Glue
         [[nodiscard]] JNIEnv* GetMainJNIEnv() const override { return _env; }
         [[nodiscard]] AAssetManager* GetAssetManager() const override { return _assetManager; }
+        [[nodiscard]] const char* GetExternalDataPath() const override { return _activity ? _activity->externalDataPath : nullptr; }
     };
 
     NativeGlue nativeGlue;
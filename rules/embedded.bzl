@@ -7,7 +7,9 @@ Embedded files declaration:
 Embedded files usage:
 - host_embedded_data - depends on embedded_files and deps to make the files available for host targets (e.g., via runfiles)
 - droid_embedded_assets - depends on embedded_files and prepares assets/ structure for android_library/android_binary packaging
+  (not used in "push" mode: the runner syncs changed files to the app external files dir, where Droid::Glue looks first)
 - wasm_embedded_linkopts_params - depends on embedded_files and generates a parameter file to be used in linkopts for emcc --preload-file options for wasm cc_binary targets
+  (or, in "nodefs" mode, NODEFS linkopts only: the runner mounts embedded directories from runfiles at startup in Node.js)
 """
 load("@rules_cc//cc/common:cc_info.bzl", "CcInfo")
 load(":log.bzl", "log")
@@ -187,6 +189,13 @@ def _wasm_embedded_linkopts_params_impl(ctx):
     param_file = ctx.actions.declare_file(ctx.label.name + ".txt")
     linkopts = []
 
+    if ctx.attr.mode == "nodefs":
+        # No .data package: files are read lazily from host via NODEFS mounted by runner preRun hook (Node.js only)
+        linkopts.append("-lnodefs.js\n")
+        linkopts.append("-sFORCE_FILESYSTEM=1\n")
+        ctx.actions.write(param_file, "".join(linkopts))
+        return [DefaultInfo(files = depset([param_file]))]
+
     embedded_data = ctx.attr.embedded_data
     for embedded in embedded_data:
         _log("item: {}".format(embedded))
@@ -212,5 +221,10 @@ wasm_embedded_linkopts_params = rule(
         "embedded_data": attr.label_list(
             providers = [EmbeddedFilesInfo],
         ),
+        "mode": attr.string(
+            default = "preload",
+            values = ["preload", "nodefs"],
+            doc = "preload: pack files into .data via --preload-file; nodefs: link NODEFS, files are mounted at run time by the runner.",
+        ),
     },
 )
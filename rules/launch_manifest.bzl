@@ -0,0 +1,148 @@
+"""Build-time launch manifest for the runner.
+
+Facts fixed at build time (platform, entry files, android package and launcher activity, embedded data layout, content hash)
+are written into a small JSON file, so the runner can skip platform detection and metadata extraction at run time:
+
+    {
+      "version": 1,
+      "platform": "wasm",
+      "entry": {"html": "app-wasm.html", "js": "app-wasm.js"},
+      "embedded": [{"path": "data/fonts/Roboto.ttf", "rlocation": "_main/data/fonts/Roboto.ttf"}],
+      "embedded_mode": "preload",
+      "content_hash": "<sha256 of binary outputs>"
+    }
+"""
+
+load(":embedded.bzl", "EmbeddedFilesInfo")
+load(":log.bzl", "log")
+
+_log = log.info(0)
+
+_VERSION = 1
+
+# Placeholders replaced by values computed in the action (from file contents)
+_CONTENT_HASH = "@CONTENT_HASH@"
+_PACKAGE = "@PACKAGE@"
+_ACTIVITY = "@ACTIVITY@"
+
+def _rlocation_path(ctx, file):
+    """Runfiles path of the file as used by Runfiles.Rlocation (i.e. "_main/pkg/file" or "repo/pkg/file")."""
+    if file.short_path.startswith("../"):
+        return file.short_path[3:]
+    return "{}/{}".format(ctx.workspace_name, file.short_path)
+
+def _launch_manifest_impl(ctx):
+    _log("=== launch_manifest {}".format(ctx.label))
+
+    bin_files = ctx.attr.bin_target[DefaultInfo].files.to_list()
+    manifest = {
+        "version": _VERSION,
+        "platform": ctx.attr.platform,
+        "content_hash": _CONTENT_HASH,
+    }
+
+    if ctx.attr.platform == "wasm":
+        entry = {}
+        for file in bin_files:
+            if file.extension in ["html", "js"] and file.extension not in entry:
+                entry[file.extension] = file.basename
+        manifest["entry"] = entry
+    elif ctx.attr.platform == "droid":
+        manifest["entry"] = {
+            "apk": [file.basename for file in bin_files if file.extension == "apk"][0],
+            "package": _PACKAGE,
+            "activity": _ACTIVITY,
+        }
+
+    embedded = []
+    embedded_files = []
+    for embedded_data in ctx.attr.embedded_data:
+        for source, target_dir in embedded_data[EmbeddedFilesInfo].files_to_dir.items():
+            for source_file in source.files.to_list():
+                embedded_files.append(source_file)
+                embedded.append({
+                    "path": "{}/{}".format(target_dir, source_file.basename),  # e.g., "data/fonts/Roboto-Regular.ttf"
+                    "rlocation": _rlocation_path(ctx, source_file),
+                })
+    manifest["embedded"] = embedded
+    manifest["embedded_mode"] = ctx.attr.embedded_mode
+
+    template = ctx.actions.declare_file(ctx.label.name + ".template")
+    ctx.actions.write(template, json.encode_indent(manifest, indent = "  ") + "\n")
+
+    inputs = [template] + bin_files
+    android_manifest = ctx.file.android_manifest
+    if android_manifest:
+        inputs.append(android_manifest)
+
+    output = ctx.actions.declare_file(ctx.label.name + ".json")
+    ctx.actions.run_shell(
+        inputs = inputs,
+        outputs = [output],
+        command = """
+set -euo pipefail
+template="$1"; output="$2"; android_manifest="$3"; shift 3
+
+if command -v sha256sum >/dev/null; then _sha256() { sha256sum | cut -d' ' -f1; }; else _sha256() { shasum -a 256 | cut -d' ' -f1; }; fi
+content_hash=$(for f in "$@"; do _sha256 < "$f"; done | _sha256)
+
+package=""
+activity=""
+if [[ -n "$android_manifest" ]]; then
+    # Text AndroidManifest.xml: package attribute and the activity with LAUNCHER category
+    flat=$(tr '\\n' ' ' < "$android_manifest")
+    package=$(echo "$flat" | sed -n 's/.*<manifest[^>]*package="\\([^"]*\\)".*/\\1/p')
+    # One <activity element per line (awk split: portable, unlike "\\n" in sed replacement of BSD/macOS sed)
+    activity=$(echo "$flat" | awk '{ n = split($0, parts, "<activity"); for (i = 2; i <= n; i++) print "<activity" parts[i] }' \\
+        | grep 'android.intent.category.LAUNCHER' | head -1 \\
+        | sed -n 's/^<activity[^>]*android:name="\\([^"]*\\)".*/\\1/p') || true
+    if [[ "$activity" == .* ]]; then
+        activity="$package$activity"
+    fi
+fi
+
+sed -e "s|@CONTENT_HASH@|$content_hash|" -e "s|@PACKAGE@|$package|" -e "s|@ACTIVITY@|$activity|" "$template" > "$output"
+""",
+        arguments = [
+            template.path,
+            output.path,
+            android_manifest.path if android_manifest else "",
+        ] + [file.path for file in bin_files],
+        mnemonic = "LaunchManifest",
+        progress_message = "Generating launch manifest %{label}",
+    )
+
+    return [DefaultInfo(
+        files = depset([output]),
+        runfiles = ctx.runfiles(files = [output] + embedded_files),  # embedded files resolvable by their "rlocation"
+    )]
+
+launch_manifest = rule(
+    implementation = _launch_manifest_impl,
+    doc = "Generates JSON launch manifest consumed by the runner (--launch-manifest) to skip run time discovery.",
+    attrs = {
+        "bin_target": attr.label(
+            mandatory = True,
+            doc = "Binary target run by the runner (wasm_cc_binary or android_binary).",
+        ),
+        "platform": attr.string(
+            mandatory = True,
+            values = ["exec", "wasm", "droid", "python"],
+            doc = "Runner platform of the binary target.",
+        ),
+        "android_manifest": attr.label(
+            allow_single_file = [".xml"],
+            doc = "Text AndroidManifest.xml of the droid binary to take package and launcher activity from.",
+        ),
+        "embedded_data": attr.label_list(
+            providers = [EmbeddedFilesInfo],
+            doc = "Embedded data layout to include (path in app -> runfiles location).",
+        ),
+        "embedded_mode": attr.string(
+            default = "",
+            values = ["", "preload", "nodefs", "assets", "push"],
+            doc = ("How the binary gets embedded data. WASM: packed .data (preload) or mounted by the runner at run time (nodefs), " +
+                   "droid: APK assets (assets) or pushed to device by the runner (push)."),
+        ),
+    },
+)
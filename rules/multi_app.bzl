@@ -14,6 +14,7 @@ load(
     "wasm_embedded_linkopts_params",
 )
 load(":droid_deps.bzl", "droid_select_default_app_manifest")
+load(":launch_manifest.bzl", "launch_manifest")
 load(
     ":multi_common.bzl",
     "build_platform_select_dict",
@@ -31,6 +32,20 @@ _COMMON_ATTRS = multi_common.get_common_attrs() | {
         default = [_DROID_GLUE_LIB],
         doc = "Labels for Android dependencies (i.e. glue libraries). Default is NativeActivity glue.",
     ),
+    "wasm_embedded_mode": attr.string(
+        default = "preload",
+        configurable = False,
+        values = ["preload", "nodefs"],
+        doc = ("How embedded data gets into WASM binary: 'preload' packs it into .data (browser and Node.js), " +
+               "'nodefs' mounts it from runfiles at startup via NODEFS when run by the runner (Node.js only, lazy reads)."),
+    ),
+    "droid_embedded_mode": attr.string(
+        default = "assets",
+        configurable = False,
+        values = ["assets", "push"],
+        doc = ("How embedded data gets to Android app: 'assets' packs it into APK, 'push' (development) keeps it out of APK " +
+               "and the runner pushes changed files to the app external files dir (data changes don't reinstall APK)."),
+    ),
 }
 
 # cc_binary-only attributes to exclude when creating cc_library for droid
@@ -67,6 +82,8 @@ def _multi_app_impl(name, visibility, **kwargs):
 
     enabled_platforms = kwargs.pop("platforms", ["host", "wasm", "droid"])
     embedded_data = kwargs.pop("embedded_data", None)
+    wasm_embedded_mode = kwargs.pop("wasm_embedded_mode", "preload")
+    droid_embedded_mode = kwargs.pop("droid_embedded_mode", "assets")
 
     # Extract Android-specific attributes
     droid_kwargs = multi_common.pop_droid_kwargs(kwargs)
@@ -128,6 +145,7 @@ def _multi_app_impl(name, visibility, **kwargs):
             target_compatible_with = ["@platforms//cpu:wasm32"],
             visibility = ["//visibility:private"],
             embedded_data = embedded_data,
+            mode = wasm_embedded_mode,
         )
 
         wasm_kwargs = {k: v for k, v in kwargs.items() if k not in (_CC_TEST_ONLY_ATTRS if is_test else [])}
@@ -161,12 +179,24 @@ def _multi_app_impl(name, visibility, **kwargs):
             cc_target = ":{}-wasm.tar".format(name),
         )
 
+        launch_manifest(
+            name = "{}-wasm.launch".format(name),
+            tags = ["manual"],
+            target_compatible_with = wasm_target_compatible_with,
+            visibility = ["//visibility:private"],
+            bin_target = ":{}-wasm.dir".format(name),
+            platform = "wasm",
+            embedded_data = embedded_data,
+            embedded_mode = wasm_embedded_mode,
+        )
+
         run_wrapper_cmd(
             name = "{}-wasm".format(name),
             tags = tags + ["wasm"],
             target_compatible_with = wasm_target_compatible_with,
             visibility = visibility,
             bin_target = ":{}-wasm.dir".format(name),
+            launch_manifest = ":{}-wasm.launch".format(name),
             is_test = is_test,
         )
         test_targets.append(":{}-wasm".format(name))
@@ -211,7 +241,7 @@ def _multi_app_impl(name, visibility, **kwargs):
             name = "{}.assets".format(droid_name),
             target_compatible_with = droid_target_compatible_with,
             visibility = ["//visibility:private"],
-            embedded_data = embedded_data,
+            embedded_data = embedded_data if droid_embedded_mode == "assets" else [],  # push: synced by the runner
         )
         droid_kwargs["assets"] = [":{}.assets".format(droid_name)] + (droid_kwargs.get("assets") or [])
 
@@ -227,12 +257,25 @@ def _multi_app_impl(name, visibility, **kwargs):
             **droid_kwargs
         )
 
+        launch_manifest(
+            name = "{}.launch".format(droid_name),
+            tags = ["manual"],
+            target_compatible_with = droid_target_compatible_with,
+            visibility = ["//visibility:private"],
+            bin_target = ":{}".format(droid_apk_name),
+            platform = "droid",
+            android_manifest = droid_kwargs["manifest"],
+            embedded_data = embedded_data,
+            embedded_mode = droid_embedded_mode,
+        )
+
         run_wrapper_cmd(
             name = droid_name,
             tags = tags + ["droid", "exclusive"],  # exclusive: prevent parallel execution with other tests (emulator conflict)
             target_compatible_with = droid_target_compatible_with,
             visibility = visibility,
             bin_target = ":{}".format(droid_apk_name),
+            launch_manifest = ":{}.launch".format(droid_name),
             is_test = is_test,
         )
         test_targets.append(":{}".format(droid_name))
@@ -7,9 +7,11 @@ load("@platforms//host:constraints.bzl", "HOST_CONSTRAINTS")
 _runner_target = Label("//runner:runner")
 
 
-def _run_wrapper_args(name, bin_target, testonly=False):
+def _run_wrapper_args(name, bin_target, launch_manifest=None, testonly=False):
     """Generate arguments script for running a binary target via the runner target from rootpath.
 
+    If launch manifest is provided, it's passed to the runner (--launch-manifest) to skip run time discovery.
+
     NOTE:
         It cannot be used directly for execution without runfiles.
         So it must be wrapped with sh_binary/sh_test with runner and binary target in dependencies.
@@ -20,7 +22,7 @@ def _run_wrapper_args(name, bin_target, testonly=False):
         srcs = [
             _runner_target,
             bin_target,
-        ],
+        ] + ([launch_manifest] if launch_manifest else []),
         outs = [name],
         cmd = """
 # `$${{paths##* }}` is hack selecting the last path from space-separated list of paths,
@@ -46,11 +48,12 @@ else
     binary_path="$$binary_paths"
 fi
 
-echo $${{runner_path}} $${{binary_path}} > $@
+echo $${{runner_path}} {runner_options}$${{binary_path}} > $@
 """
             .format(
                 runner_target=_runner_target, 
                 binary_target=bin_target,
+                runner_options="--launch-manifest $(rootpath {}) ".format(launch_manifest) if launch_manifest else "",
             ),
         #output_to_bindir = True,
         executable = True,
@@ -62,7 +65,7 @@ echo $${{runner_path}} $${{binary_path}} > $@
 
 _NATIVE_RULE_MODE = True  # Set to False to switch to shell wrapper instead of Skylib native_binary/native_test
 
-def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MODE, **kwargs):
+def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MODE, launch_manifest=None, **kwargs):
     """Creates a shell wrapper command for running a binary target via the runner target.
     
     Args:
@@ -70,6 +73,7 @@ def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MOD
         bin_target: The label of the binary target to be executed by the runner.
         is_test: Whether this wrapper must be a test target. Defaults to False.
         via_skylib: Whether to use Skylib native_binary/native_test instead of shell wrapper.
+        launch_manifest: Optional launch_manifest target of the binary (see launch_manifest.bzl).
         **kwargs: Additional keyword arguments passed to sh_binary or sh_test.
     """
     #TODO: run_wrapper_cmd possibly can be optimized by single rule that generates wrapper script with runfiles 
@@ -78,8 +82,10 @@ def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MOD
     _run_wrapper_args(
         name = runner_args_name,
         bin_target = bin_target,
+        launch_manifest = launch_manifest,
         testonly = kwargs.get("testonly", False),
     )
+    launch_manifest_data = [launch_manifest] if launch_manifest else []
 
     cmd_name = "{}.cmd".format(name)
     if via_skylib:
@@ -95,7 +101,7 @@ def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MOD
                 runner_args_name,
                 _runner_target,
                 bin_target,
-            ] + kwargs.pop("data", []),
+            ] + launch_manifest_data + kwargs.pop("data", []),
             exec_compatible_with = HOST_CONSTRAINTS,
             **kwargs,
         )
@@ -108,7 +114,7 @@ def run_wrapper_cmd(name, bin_target, is_test=False, via_skylib=_NATIVE_RULE_MOD
                 runner_args_name,
                 _runner_target,
                 bin_target,
-            ],
+            ] + launch_manifest_data,
             exec_compatible_with = HOST_CONSTRAINTS,
             **kwargs,
         )
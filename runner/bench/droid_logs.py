@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Droid log-processing benchmark: replays large synthetic (or recorded) logcat streams through
+DroidCommand exit detection and output code without a device, measuring lines/sec and exit-detection latency.
+
+Usage:
+    python runner/bench/droid_logs.py [--lines N] [--recording FILE ...] [--json FILE]
+    bazel run //runner/bench:droid_logs -- [--lines N]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+try:
+    import runner
+except ImportError:
+    # Direct script run (not via bazel): make runner package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    import runner
+
+from runner import droid, droid_replay
+from runner.log import LogFormatter
+
+_DEFAULT_LINES = 200_000
+_SYSTEM_LINE_EVERY = 50  # interleave system lines as ActivityManager/Zygote chatter
+_PACKAGE = "com.tx.bench"
+_UID = "10153"
+_PID = 19859
+
+
+def _synthetic_lines(count: int) -> Iterator[droid_replay.RecordedLine]:
+    """App logcat lines with interleaved system lines, finishing with clean process exit."""
+    app = droid.LogSource.APP
+    system = droid.LogSource.SYSTEM
+    yield droid_replay.RecordedLine(0.0, system, (
+        f"03-01 18:52:29.862054  1000   586   623 I ActivityManager: "
+        f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"
+    ))
+    for index in range(count):
+        t = index * 1e-5
+        usec = index % 1_000_000
+        if index % _SYSTEM_LINE_EVERY == 0:
+            yield droid_replay.RecordedLine(t, system, (
+                f"03-01 18:52:30.{usec:06d}  1000   586   623 I ActivityTaskManager: Displayed activity #{index}"
+            ))
+        yield droid_replay.RecordedLine(t, app, (
+            f"03-01 18:52:30.{usec:06d} {_UID} {_PID} {_PID} I stdout  : "
+            f"[{index:08d}] test case output value={index * 7 % 1000} elapsed={index % 97}.{index % 13}ms"
+        ))
+    yield droid_replay.RecordedLine(count * 1e-5, system, (
+        f"03-01 18:52:31.000000  1000   586   623 I ActivityManager: Process {_PID} exited cleanly (0)"
+    ))
+
+
+def _make_synthetic_recording(dir: Path, count: int) -> Path:
+    path = dir / f"synthetic-{count}.logcat.jsonl"
+    header = droid_replay.RecordingHeader(package=_PACKAGE, component=f"{_PACKAGE}/tx.DroidActivity", uid=_UID)
+    droid_replay.write_recording(path, header, _synthetic_lines(count))
+    return path
+
+
+def _replay(name: str, recording: Path, realtime: bool) -> dict:
+    command = droid.DroidCommand(Path(f"{name}.apk"), logcat_replay=recording, logcat_replay_realtime=realtime)
+    started = time.monotonic()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        exit_code = command.execute()
+    finished = time.monotonic()
+
+    exit_event = command.exit_event
+    backend = command.logcat_backend
+    assert exit_event is not None and isinstance(backend, droid_replay.ReplayLogcatBackend)
+    assert backend.started_at is not None
+    detect_seconds = exit_event.detected_at - backend.started_at
+    return {
+        "name": name,
+        "realtime": realtime,
+        "lines": backend.fed_lines,
+        "exit_code": exit_code,
+        "exit_reason": exit_event.reason.value,
+        "detect_seconds": round(detect_seconds, 6),
+        "total_seconds": round(finished - started, 6),
+        "lines_per_sec": round(backend.fed_lines / detect_seconds) if detect_seconds > 0 else None,
+        "exit_latency_ms": round(exit_event.latency * 1000, 3) if exit_event.latency is not None else None,
+    }
+
+
+def _setup_null_logging(verbose: bool) -> None:
+    """Keep formatting cost of the output path but drop the result (console would dominate the measurement)."""
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(LogFormatter("%(levelname)s%(message)s", verbose=verbose))
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, handlers=[handler], force=True)
+
+
+def run(lines: int, recordings: list[Path], realtime: bool = False, verbose: bool = False) -> list[dict]:
+    _setup_null_logging(verbose)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_droid_logs_") as temp_dir:
+        synthetic = _make_synthetic_recording(Path(temp_dir), lines)
+        results.append(_replay(f"synthetic-{lines}", synthetic, realtime))
+    for recording in recordings:
+        results.append(_replay(recording.stem, recording, realtime))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Droid log-processing benchmark (logcat replay without device)")
+    parser.add_argument("--lines", "-n", type=int, default=_DEFAULT_LINES, help=f"Synthetic app log lines (default: {_DEFAULT_LINES})")
+    parser.add_argument("--recording", "-r", type=Path, action="append", default=[], help="Recorded logcat (--logcat-record) to replay")
+    parser.add_argument("--realtime", action="store_true", help="Replay with original timing (default: maximum speed)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Measure debug output path")
+    parser.add_argument("--json", type=Path, metavar="FILE", help="Write results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.lines, args.recording, realtime=args.realtime, verbose=args.verbose)
+    for result in results:
+        print(
+            f"{result['name']}: {result['lines']} lines in {result['detect_seconds']:.3f}s"
+            f" ({result['lines_per_sec']} lines/sec), exit latency {result['exit_latency_ms']}ms,"
+            f" {result['exit_reason']} {result['exit_code']}"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+    # Fail when exit was not detected (i.e. regression in detection itself)
+    return 0 if all(r["exit_reason"] == droid.ExitReason.COMPLETED.value for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
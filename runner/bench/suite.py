@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+End-to-end runner benchmark suite (no device, no browser).
+
+Measures runner phases on synthetic inputs and compares results with the stored baseline,
+so performance changes show up in review when baseline.json is updated.
+
+Usage:
+    python runner/bench/suite.py [--repeat N] [--only NAME ...] [--json FILE] [--update-baseline]
+    bazel run //runner/bench:suite -- [options]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import runner
+except ImportError:
+    # Direct script run (not via bazel): make runner package importable
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+    import runner
+
+from runner import cmd, detect, find, wasm
+
+import droid_logs
+
+_DEFAULT_REPEAT = 5
+_DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+_REGRESSION_RATIO = 1.25  # report cases slower than baseline by this ratio
+_MAIN_PY = Path(runner.__file__).resolve().parents[1] / "main.py"
+
+_MANIFEST_ENTRIES = 200_000
+_MANIFEST_LOOKUPS = 1_000
+_DETECT_ROUNDS = 200
+_WASM_BUNDLE_MB = 64
+_ENV_FILE_LINES = 20_000
+_DROID_LOG_LINES = 50_000
+
+
+@dataclass
+class Case:
+    """Benchmark case: setup once, then measure run() repeatedly."""
+
+    name: str
+    descr: str
+    run: Callable[[], object]
+    setup: Callable[[], object] | None = None
+    items: int = 1  # operations per run (for per-item time)
+
+
+def _true_path() -> str:
+    path = shutil.which("true")
+    if not path:
+        raise FileNotFoundError("'true' executable not found in PATH")
+    return path
+
+
+def _quiet() -> contextlib.AbstractContextManager:
+    """Drop console output of measured code (delimiters, logs)."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+################################################################
+def _make_cases(work_dir: Path) -> list[Case]:
+    cases = []
+
+    # Cold start of main.py running trivial native binary (interpreter start, imports, find, detect, spawn)
+    true_path = _true_path()
+    child_env = os.environ | {"PYTHONPATH": os.pathsep.join(sys.path)}
+
+    def cold_start() -> None:
+        subprocess.run(
+            [sys.executable, str(_MAIN_PY), "--platform", "exec", true_path],
+            check=True, env=child_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    cases.append(Case("main_cold_start", "main.py running trivial EXEC binary", cold_start))
+
+    # Finder against large runfiles manifest
+    manifest = work_dir / "MANIFEST"
+    runfiles_dir = work_dir / "runfiles"
+    runfiles_dir.mkdir()
+    (runfiles_dir / "target.bin").write_bytes(b"")
+    with open(manifest, "w") as f:
+        for index in range(_MANIFEST_ENTRIES):
+            f.write(f"_main/pkg{index % 1000}/sub/file{index}.dat {runfiles_dir}/target.bin\n")
+    entries = (index * 197 % _MANIFEST_ENTRIES for index in range(_MANIFEST_LOOKUPS))
+    lookups = [Path(f"_main/pkg{entry % 1000}/sub/file{entry}.dat") for entry in entries]
+
+    def with_manifest_env() -> contextlib.AbstractContextManager:
+        return _patched_env(RUNFILES_MANIFEST_FILE=str(manifest), RUNFILES_DIR=None, BUILD_WORKING_DIRECTORY=None, BUILD_WORKSPACE_DIRECTORY=None)
+
+    def finder_create() -> None:
+        with with_manifest_env():
+            find.Finder()
+
+    cases.append(Case("finder_create", f"Finder() over {_MANIFEST_ENTRIES} manifest entries", finder_create))
+
+    finder_holder: list[find.Finder] = []
+
+    def finder_setup() -> None:
+        with with_manifest_env():
+            finder_holder.append(find.Finder())
+
+    def finder_lookup() -> None:
+        finder = finder_holder[-1]
+        for path in lookups:
+            found, _ = finder.find_file(path)
+            assert found is not None, path
+
+    cases.append(Case("finder_find_file", f"Finder.find_file x{_MANIFEST_LOOKUPS} in manifest", finder_lookup, finder_setup, _MANIFEST_LOOKUPS))
+
+    # detect_platform on many artifact types
+    artifacts = _make_artifacts(work_dir / "artifacts", true_path)
+
+    def detect_all() -> None:
+        for _ in range(_DETECT_ROUNDS):
+            detect._detect_platform_cached.cache_clear()  # measure detection, not the per-process cache lookup
+            for artifact in artifacts:
+                detect.detect_platform(artifact)
+
+    cases.append(Case("detect_platform", f"detect_platform x{_DETECT_ROUNDS} on {len(artifacts)} artifact types", detect_all, items=_DETECT_ROUNDS * len(artifacts)))
+
+    # tar extraction of large synthetic WASM bundle
+    bundle = _make_wasm_bundle(work_dir / "bundle", _WASM_BUNDLE_MB)
+
+    def extract_bundle() -> None:
+        html = wasm._extract_from_tar_if_needed(bundle)
+        assert html is not None
+        shutil.rmtree(html.parent)
+
+    cases.append(Case("wasm_tar_extract", f"extract {_WASM_BUNDLE_MB}MB WASM bundle tar", extract_bundle))
+
+    # .env parsing
+    env_file = work_dir / ".env"
+    with open(env_file, "w") as f:
+        for index in range(_ENV_FILE_LINES):
+            if index % 10 == 0:
+                f.write(f"WASM_RUNNER_ARGS=\"--arg{index} 'value {index}'\"\n")
+            else:
+                f.write(f"# comment {index}\nOTHER_{index}=value\n")
+
+    def parse_env() -> None:
+        wasm._parse_env_file(env_file)
+
+    cases.append(Case("wasm_parse_env_file", f"_parse_env_file of {_ENV_FILE_LINES} entries", parse_env))
+
+    # RunCommand spawn overhead
+    def run_command() -> None:
+        with _quiet():
+            exit_code = cmd.RunCommand(scope_prefix="[EXEC: true]", cmd=[true_path]).execute()
+        assert exit_code == 0
+
+    cases.append(Case("run_command_spawn", "RunCommand.execute of trivial binary", run_command))
+
+    # Droid log processing (logcat replay at max speed)
+    droid_recording = droid_logs._make_synthetic_recording(work_dir, _DROID_LOG_LINES)
+
+    def droid_log_replay() -> None:
+        result = droid_logs._replay("suite", droid_recording, realtime=False)
+        assert result["exit_reason"] == "completed", result
+
+    cases.append(Case("droid_log_replay", f"droid logcat replay of {_DROID_LOG_LINES} lines", droid_log_replay, items=_DROID_LOG_LINES))
+
+    return cases
+
+
+@contextlib.contextmanager
+def _patched_env(**values: str | None):
+    saved = {key: os.environ.get(key) for key in values}
+    try:
+        for key, value in values.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _make_artifacts(dir: Path, true_path: str) -> list[Path]:
+    dir.mkdir()
+    native = dir / "native.bin"
+    shutil.copy(true_path, native)
+
+    script = dir / "script.py"
+    script.write_text("#!/usr/bin/env python3\nprint('hello')\n")
+
+    apk = dir / "app.apk"
+    shutil.make_archive(str(apk.with_suffix("")), "zip", dir, "script.py")
+    apk.with_suffix(".zip").rename(apk)
+
+    tar = dir / "bundle.tar"
+    with tarfile.open(tar, "w") as f:
+        f.add(script, arcname="bundle.js")
+
+    html = dir / "app.html"
+    html.write_text("<html></html>\n")
+    js = dir / "app.js"
+    js.write_text("console.log('hello')\n")
+    wasm_file = dir / "app.wasm"
+    wasm_file.write_bytes(b"\0asm\1\0\0\0")
+
+    wasm_dir = dir / "app.dir"
+    wasm_dir.mkdir()
+
+    # extension-less file with WASM sibling (realpath+ext detection)
+    sibling = dir / "app"
+    sibling.write_bytes(b"\0" * 64)
+
+    return [native, script, apk, tar, html, js, wasm_file, wasm_dir, sibling]
+
+
+def _make_wasm_bundle(dir: Path, size_mb: int) -> Path:
+    dir.mkdir()
+    (dir / "app.html").write_text("<html><script src='app.js'></script></html>\n")
+    (dir / "app.js").write_text("// loader\n" * 10_000)
+    (dir / "app.wasm").write_bytes(os.urandom(size_mb * 1024 * 1024 // 4))
+    (dir / "app.data").write_bytes(os.urandom(size_mb * 1024 * 1024 * 3 // 4))
+    bundle = dir.parent / "app.tar"
+    with tarfile.open(bundle, "w") as tar:
+        for name in ("app.html", "app.js", "app.wasm", "app.data"):
+            tar.add(dir / name, arcname=name)
+    shutil.rmtree(dir)
+    return bundle
+
+
+################################################################
+def _measure(case: Case, repeat: int) -> dict:
+    if case.setup:
+        case.setup()
+    case.run()  # warmup (page cache, imports, lazy initialization)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.run()
+        times.append(time.perf_counter() - start)
+    median = statistics.median(times)
+    return {
+        "descr": case.descr,
+        "runs": repeat,
+        "min_s": round(min(times), 6),
+        "median_s": round(median, 6),
+        "max_s": round(max(times), 6),
+        "per_item_us": round(median / case.items * 1e6, 3),
+    }
+
+
+def _host_info() -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _compare(results: dict, baseline: dict) -> list[str]:
+    """Print comparison with baseline and return names of regressed cases."""
+    regressed = []
+    baseline_cases = baseline.get("cases", {})
+    for name, result in results["cases"].items():
+        base = baseline_cases.get(name)
+        if not base:
+            print(f"  {name:24} {result['median_s'] * 1000:10.3f}ms  (no baseline)")
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else float("inf")
+        mark = ""
+        if ratio > _REGRESSION_RATIO:
+            mark = "  << SLOWER"
+            regressed.append(name)
+        elif ratio < 1 / _REGRESSION_RATIO:
+            mark = "  >> faster"
+        print(f"  {name:24} {result['median_s'] * 1000:10.3f}ms  baseline {base['median_s'] * 1000:10.3f}ms  x{ratio:.2f}{mark}")
+    return regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Runner benchmark suite (no device, no browser)")
+    parser.add_argument("--repeat", "-n", type=int, default=_DEFAULT_REPEAT, help=f"Measured runs per case (default: {_DEFAULT_REPEAT})")
+    parser.add_argument("--only", action="append", metavar="NAME", help="Run only given case(s)")
+    parser.add_argument("--json", type=Path, metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, default=_DEFAULT_BASELINE, help="Baseline JSON to compare with (default: bench/baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true", help=f"Exit with error when a case is slower than baseline x{_REGRESSION_RATIO}")
+    args = parser.parse_args()
+
+    droid_logs._setup_null_logging(verbose=False)
+
+    results: dict = {"host": _host_info(), "cases": {}}
+    with tempfile.TemporaryDirectory(prefix="runner_bench_") as temp_dir:
+        for case in _make_cases(Path(temp_dir)):
+            if args.only and case.name not in args.only:
+                continue
+            print(f"⏱️  {case.name}: {case.descr}", flush=True)
+            results["cases"][case.name] = _measure(case, args.repeat)
+
+    print("Results:")
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressed = _compare(results, baseline)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline updated: {args.baseline}")
+
+    if regressed:
+        print(f"Slower than baseline: {', '.join(regressed)}")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
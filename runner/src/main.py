@@ -18,6 +18,7 @@ def _parse_args() -> Options:
     parser = argparse.ArgumentParser(
         description="Runner - executor of binary file for target platform",
         formatter_class=argparse.RawDescriptionHelpFormatter,
+        allow_abbrev=False,  # unknown options go to the target as is, not prefix-matched to runner options
     )
     parser.add_argument(
         "--platform",
@@ -33,7 +34,150 @@ def _parse_args() -> Options:
         default=0,
         help="-v debug, -vv debug+time",
     )
-    parser.add_argument("file", help="Target binary file to execute")
+    parser.add_argument(
+        "--compose",
+        action="store_true",
+        help="Treat file as compose spec (JSON) of several targets to run concurrently with readiness probes",
+    )
+    parser.add_argument(
+        "--launch-manifest",
+        metavar="FILE",
+        help="Build-time launch manifest (JSON) of the target to skip platform detection and metadata extraction",
+    )
+    parser.add_argument(
+        "--symbolize",
+        action="store_true",
+        help="Capture output of native binary (exec) to symbolize crash backtraces (droid crashes are symbolized always)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under platform profiler (perf, cProfile, node --cpu-prof, simpleperf), write artifacts to outputs dir and show hot functions",
+    )
+    parser.add_argument(
+        "--capture-log",
+        action="store_true",
+        help="Write complete output to gzip file in outputs dir, show only head/tail and warnings/errors in console",
+    )
+    parser.add_argument(
+        "--console-head",
+        type=int,
+        default=50,
+        metavar="N",
+        help="First lines shown in console with --capture-log (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--console-tail",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Last lines shown in console with --capture-log (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--log-dedup",
+        dest="log_dedup",
+        action="store_true",
+        default=None,
+        help="Collapse repetitive console lines into periodic summaries"
+        " (default: with --capture-log; droid: in logcat tags other than app output as well)",
+    )
+    parser.add_argument(
+        "--no-log-dedup",
+        dest="log_dedup",
+        action="store_false",
+        help="Show repetitive output lines in console as is",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Relaunch prepared command up to N times on failure (setup like extraction or APK install is not repeated)",
+    )
+    parser.add_argument(
+        "--retry-on",
+        choices=["signal", "timeout"],
+        action="append",
+        default=[],
+        help="Retry only on this failure kind, can be repeated (default: any failure); timeout: droid only",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Benchmark: prepare once, launch N times and report min/median/p95/stddev of wall time (and droid first frame time)",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        metavar="M",
+        help="Benchmark: unmeasured launches before the --repeat ones (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--bench-json",
+        metavar="FILE",
+        help="Benchmark results JSON (default: <name>.bench.json in outputs dir)",
+    )
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="Benchmark of droid: relaunch the app without force-stop (warm/hot starts instead of cold)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Rerun on artifact change (inotify), reusing detection, WASM extraction and installed APK while valid",
+    )
+    parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="Quiet time after the last artifact write before rerun (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run python targets via runpy in a forked runner process instead of starting python3",
+    )
+    parser.add_argument(
+        "--slots",
+        metavar="SPEC",
+        help="Host-wide limits of concurrent runs per class, i.e. wasm=4,emrun=1,droid=2 (0: unlimited; env TX_RUNNER_SLOTS)",
+    )
+    parser.add_argument(
+        "--min-free-mem",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="Start governed run only when this much memory is available (env TX_RUNNER_MIN_FREE_MB)",
+    )
+    parser.add_argument(
+        "--doctor",
+        action="store_true",
+        help="Rediscover toolchain (adb, aapt, aapt2, node, emrun), refresh its cache and print it",
+    )
+    parser.add_argument(
+        "--history",
+        action="store_true",
+        help="Show recent runs per target (file: name filter) with launch time and memory regression flags",
+    )
+    parser.add_argument(
+        "--record-history",
+        dest="record_history",
+        action="store_true",
+        default=None,
+        help="Append this run to the local run history (default: for bazel run only; env TX_RUNNER_HISTORY_DB: database path)",
+    )
+    parser.add_argument(
+        "--no-history",
+        dest="record_history",
+        action="store_false",
+        help="Don't append this run to the local run history",
+    )
+    parser.add_argument("file", nargs="?", help="Target binary file to execute")
 
     # Don't use optional positional nargs='*' allowing to capture -x/--x options after file (captured by parse_known_intermixed_args)
     # parser.add_argument('args', nargs='*', help="Arguments to pass to the target binary")
@@ -50,10 +194,39 @@ def _parse_args() -> Options:
     if remain_args:
         log.debug("remain %s", remain_args)
 
+    if parsed_args.doctor:
+        runner.doctor()
+    if parsed_args.history:
+        runner.show_history(parsed_args.file)
+    if not parsed_args.file:
+        parser.error("the following arguments are required: file")
+
     return Options(
         platform=Platform(parsed_args.platform),
         file=Path(parsed_args.file),
         args=remain_args,
+        compose=parsed_args.compose,
+        launch_manifest=Path(parsed_args.launch_manifest) if parsed_args.launch_manifest else None,
+        symbolize=parsed_args.symbolize,
+        profile=parsed_args.profile,
+        capture_log=parsed_args.capture_log,
+        console_head=parsed_args.console_head,
+        console_tail=parsed_args.console_tail,
+        log_dedup=parsed_args.log_dedup,
+        # Opt-in, by default for bazel run only (tests don't write outside their sandbox)
+        history=parsed_args.record_history if parsed_args.record_history is not None else bool(
+            os.environ.get("BUILD_WORKING_DIRECTORY") and not os.environ.get("TEST_TARGET")),
+        retries=parsed_args.retries,
+        retry_on=parsed_args.retry_on,
+        repeat=parsed_args.repeat,
+        warmup=parsed_args.warmup,
+        bench_json=Path(parsed_args.bench_json) if parsed_args.bench_json else None,
+        warm_start=parsed_args.warm_start,
+        watch=parsed_args.watch,
+        watch_debounce=parsed_args.watch_debounce,
+        in_process=parsed_args.in_process,
+        slots=parsed_args.slots,
+        min_free_mem=parsed_args.min_free_mem,
     )
 
 
@@ -1,11 +1,24 @@
+import asyncio
+import dataclasses
 import logging
 import os
 import re
 import sys
+import threading
+import time
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from . import find, detect, cmd, wasm, droid
+# Modules of the common path only: platform and feature modules are imported where used (start-up time of each run)
+from . import find, detect, cmd, capture, retry, governor
 from . import context
-from .context import Platform, Options
+from .context import Platform, Options, RunReason, RunResult
+
+if TYPE_CHECKING:
+    from .manifest import LaunchManifest
+
+__all__ = ["Options", "Platform", "RunReason", "RunResult", "doctor", "run", "show_history", "start"]
 
 log = logging.getLogger(__name__)
 
@@ -28,46 +41,231 @@ def _log_process_info() -> None:
             log.debug("  %s=%s", key, value)
 
 
-def _main(options: Options) -> int:
-    _log_process_info()
+def _load_launch_manifest(options: Options, finder: find.Finder) -> "LaunchManifest | None":
+    if not options.launch_manifest:
+        return None
+    from . import manifest
+    found_manifest, found_in = finder.find_file(options.launch_manifest)
+    if not found_manifest:
+        raise FileNotFoundError(f"Launch manifest not found: {options.launch_manifest}")
+    log.debug(f"Launch manifest: {found_manifest} # {found_in}")
+    return manifest.load(found_manifest)
 
-    finder = find.Finder()
-    found_file, found_in = finder.find_file(options.file)
-    if not found_file:
-        raise FileNotFoundError(f"File not found: {options.file}")
-    log.debug(f"Found: {found_file} # {found_in}")
+
+def _make_command(options: Options, finder: find.Finder, found_file: Path) -> cmd.Command:
+    launch_manifest = _load_launch_manifest(options, finder)
 
     platform = options.platform
     if platform == Platform.AUTO:
-        platform = options.platform = detect.detect_platform(found_file)
+        if launch_manifest:
+            platform = options.platform = launch_manifest.platform
+        else:
+            platform = options.platform = detect.detect_platform(found_file)
     log.debug("starting specific: %s", platform)
+    slot_name = platform.value
 
     if platform == Platform.WASM:
         ctx = context.Context(
             options=options,
             finder=finder,
             found_file=found_file,
+            manifest=launch_manifest,
         )
-        command = wasm.WasmRunner(ctx).make_command()
+        from . import wasm
+        wasm_runner = wasm.WasmRunner(ctx)
+        command = wasm_runner.make_command()
+        slot_name = "emrun" if wasm_runner.options.emrun else "wasm"  # browser is much heavier than node
     elif platform == Platform.DROID:
         ctx = context.Context(
             options=options,
             finder=finder,
             found_file=found_file,
+            manifest=launch_manifest,
+        )
+        from . import droid
+        command = droid.make_command(
+            ctx.found_file,
+            ctx.options.args,
+            ctx.manifest,
+            profile=ctx.options.profile,
+            capture=capture.make_capture(ctx.options, ctx.found_file.stem),
+            finder=ctx.finder,
+            log_dedup=ctx.options.log_dedup,
         )
-        command = droid.DroidCommand(ctx.found_file, ctx.options.args)
     elif platform == Platform.EXEC:
+        from . import profile, symbolize
         command = cmd.RunCommand(
             scope_prefix=f"[EXEC: {found_file.name}]",
-            cmd=[str(found_file)] + options.args)
+            cmd=[str(found_file)] + options.args,
+            symbolizer=symbolize.Symbolizer([found_file, found_file.parent], context.cache_dir("symbols")) if options.symbolize else None,
+            profiler=profile.make_profiler("exec", context.outputs_dir() / found_file.name) if options.profile else None,
+            capture=capture.make_capture(options, found_file.name))
+    elif platform == Platform.PYTHON and options.in_process and hasattr(os, "fork") and threading.current_thread() is threading.main_thread():
+        from . import profile
+        command = cmd.ForkPythonCommand(
+            scope_prefix=f"[PYTHON: {found_file.name}]",
+            script=found_file,
+            args=options.args,
+            profiler=profile.CProfileProfiler(context.outputs_dir() / found_file.stem) if options.profile else None,
+            capture=capture.make_capture(options, found_file.stem))
     elif platform == Platform.PYTHON:
+        if options.in_process and not hasattr(os, "fork"):
+            log.warning("⚠️ In-process mode requires fork(), running python3")
+        elif options.in_process:
+            # run() prepares and executes in worker threads: fork() of a multi-threaded process may deadlock the child
+            log.warning("⚠️ In-process mode requires the main thread, running python3")
+        from . import profile
         command = cmd.RunCommand(
             scope_prefix=f"[PYTHON: {found_file.name}]",
-            cmd=["python3", str(found_file)] + options.args)
+            cmd=["python3", str(found_file)] + options.args,
+            profiler=profile.make_profiler("python", context.outputs_dir() / found_file.stem) if options.profile else None,
+            capture=capture.make_capture(options, found_file.stem))
     else:
         raise ValueError(f"Unsupported platform: {platform}")
+    conditions = {retry.RetryCondition(c) for c in options.retry_on}
+    if retry.RetryCondition.TIMEOUT in conditions and platform != Platform.DROID:
+        # Only droid runs have a timeout (--timeout of logcat monitoring), others would never match it
+        raise ValueError(f"--retry-on timeout is supported for droid only, not {platform.value}")
+    command.retry = retry.RetryPolicy(options.retries, conditions)
+    if options.repeat > 0:
+        _setup_benchmark(command, options, found_file)
+    command.slot = governor.make_slot(slot_name, options)
+    return command
+
 
-    return command.scoped_execute()
+def _setup_benchmark(command: cmd.Command, options: Options, found_file: Path) -> None:
+    if options.retries:
+        log.warning("⚠️ Retries are not used in benchmark mode (it stops at the first failed launch)")
+    from . import benchmark
+    json_path = options.bench_json or context.outputs_dir() / f"{found_file.stem}.bench.json"
+    command.retry = benchmark.BenchmarkPolicy(found_file.stem, options.platform.value, options.repeat, options.warmup, json_path)
+    if options.platform == Platform.DROID:
+        from . import droid  # already imported by the droid command: no import cost for other platforms
+        assert isinstance(command, droid.DroidCommand)
+        command.measure_launch = True
+        command.warm_start = options.warm_start
+    elif options.warm_start:
+        log.warning("⚠️ Warm start applies to droid only")
+
+
+def _find_target(options: Options, finder: find.Finder) -> Path:
+    found_file, found_in = finder.find_file(options.file)
+    if not found_file:
+        raise FileNotFoundError(f"File not found: {options.file}")
+    log.debug(f"Found: {found_file} # {found_in}")
+    return found_file
+
+
+def _main(options: Options) -> int:
+    _log_process_info()
+
+    started = time.monotonic()
+    finder = find.Finder()
+    found_file = _find_target(options, finder)
+
+    if options.compose:
+        if options.watch:
+            log.warning("⚠️ Watch mode is not supported for compose, running once")
+        if options.repeat:
+            log.warning("⚠️ Benchmark mode is not supported for compose, running once")
+        from . import compose
+        command = compose.ComposeCommand(compose.load_spec(found_file), finder, _make_command, f"[COMPOSE: {found_file.name}]", options)
+    elif options.watch:
+        # Same finder and options (platform detected on the first run) are reused by each rerun
+        from . import watch
+        return watch.run(found_file, lambda: _make_command(options, finder, found_file), options.watch_debounce)
+    else:
+        command = _make_command(options, finder, found_file)
+
+    prepared = time.monotonic()
+    exit_code = command.scoped_execute()
+    if options.history and not options.repeat:  # benchmark launches are recorded in its JSON instead
+        # One target per runner process: the largest child is the target itself (adb for droid, measured by sampling instead)
+        peak_rss_kb = command.peak_rss_kb
+        if peak_rss_kb is None and options.platform != Platform.DROID:
+            from . import history
+            peak_rss_kb = history.children_peak_rss_kb()
+        _record_history(options, command, _result(command, exit_code, started, prepared), peak_rss_kb)
+    return exit_code
+
+
+@cache
+def _shared_finder() -> find.Finder:
+    """Finder shared by programmatic runs (runfiles manifest is read once per process)."""
+    return find.Finder()
+
+
+def _prepare(options: Options, finder: find.Finder) -> cmd.Command:
+    found_file = _find_target(options, finder)
+    if options.compose:
+        from . import compose
+        return compose.ComposeCommand(compose.load_spec(found_file), finder, _make_command, f"[COMPOSE: {found_file.name}]", options)
+    return _make_command(options, finder, found_file)
+
+
+def _result(command: cmd.Command, exit_code: int, started: float, prepared: float) -> RunResult:
+    capture_log = getattr(command, "capture", None)
+    return RunResult(
+        exit_code=exit_code,
+        reason=_run_reason(command),
+        prepare_seconds=prepared - started,
+        run_seconds=time.monotonic() - prepared,
+        attempts=list(command.attempts),
+        log_path=capture_log.path if capture_log else None,
+        notes=list(command.finish_notes),
+        error=command.error,
+    )
+
+
+def _record_history(options: Options, command: cmd.Command, result: RunResult, peak_rss_kb: int | None) -> None:
+    capture_log = getattr(command, "capture", None)
+    platform_name = "compose" if options.compose else options.platform.value
+    output = (capture_log.lines, capture_log.bytes) if capture_log else None
+    from . import history
+    history.record(options.file, platform_name, result, peak_rss_kb, output)
+
+
+def _run_reason(command: cmd.Command) -> RunReason:
+    if command.error:
+        return RunReason.ERROR
+    attempt = command.attempts[-1] if command.attempts else None
+    if command.cancelled or (attempt and attempt.cancelled):
+        return RunReason.CANCELLED
+    if attempt and attempt.timeout:
+        return RunReason.TIMEOUT
+    if attempt and attempt.signal is not None:
+        return RunReason.SIGNAL
+    return RunReason.EXITED
+
+
+async def run(options: Options) -> RunResult:
+    """Run target and return its result without exiting the interpreter (API for Python harnesses).
+
+    Runs may be awaited concurrently in one event loop: each command executes in a worker thread,
+    while finder, platform detection, toolchain and extraction caches are shared by all runs of the process.
+    Cancelling the awaiting task stops the target (no more retries) and re-raises CancelledError when it's stopped.
+    Errors before the launch (i.e. file not found) are raised. Logging is not configured: records go to caller's setup.
+    """
+    if options.watch:
+        raise ValueError("Watch mode is not supported by run(), await it again on change instead")
+    options = dataclasses.replace(options, args=list(options.args), retry_on=list(options.retry_on))  # platform is resolved in place
+
+    started = time.monotonic()
+    command = await asyncio.to_thread(_prepare, options, _shared_finder())
+    prepared = time.monotonic()
+    execution = asyncio.ensure_future(asyncio.to_thread(command.scoped_execute))
+    try:
+        exit_code = await asyncio.shield(execution)
+    except asyncio.CancelledError:
+        command.cancel()
+        await asyncio.wait([execution])  # worker thread finishes once the target is stopped
+        raise
+
+    result = _result(command, exit_code, started, prepared)
+    if options.history and not options.repeat:
+        # Children of the process are shared by concurrent runs: peak memory only when measured by the command
+        await asyncio.to_thread(_record_history, options, command, result, command.peak_rss_kb)
+    return result
 
 
 def start(options: Options) -> None:
@@ -79,3 +277,15 @@ def start(options: Options) -> None:
         if isinstance(e, FileNotFoundError):
             sys.exit(1)
         raise
+
+
+def show_history(name_filter: str | None = None) -> None:
+    """Print recent runs per target with regression flags (--history)."""
+    from . import history
+    sys.exit(history.show(name_filter))
+
+
+def doctor() -> None:
+    """Print and refresh toolchain cache (--doctor)."""
+    from . import toolchain
+    sys.exit(toolchain.doctor())
@@ -0,0 +1,112 @@
+"""Benchmark mode (--repeat N [--warmup M] [--bench-json FILE]): statistics of repeated launches of a prepared target.
+
+Like warm retries, only the launch phase is repeated (no detection, extraction, aapt or APK install per run):
+M warmup launches are not measured, then N launches report wall time statistics, for droid also launch-to-first-frame
+time of `am start -W` per launch state (the app is force-stopped before each launch for cold starts, --warm-start keeps it):
+
+    📊 Benchmark app-host: 10 runs (+2 warmup), wall min 0.101s median 0.105s p95 0.120s stddev 0.006s
+
+All launches and statistics are written as JSON (default <outputs dir>/<name>.bench.json) for comparison between builds.
+The benchmark stops at the first failed launch.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from .log import Fore, Style
+from .retry import Attempt, RetryPolicy
+
+log = logging.getLogger(__name__)
+
+
+def stats(values: list[float]) -> dict[str, float]:
+    """min/median/p95 (nearest rank)/stddev/mean of the values (empty dict for no values)."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)],
+        "stddev": statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        "mean": statistics.fmean(ordered),
+        "max": ordered[-1],
+    }
+
+
+def _format(values: dict[str, float], unit: str, digits: int = 3) -> str:
+    return " ".join(f"{name} {values[name]:.{digits}f}{unit}" for name in ("min", "median", "p95", "stddev"))
+
+
+class BenchmarkPolicy(RetryPolicy):
+    """Launch policy of the benchmark: warmup + repeat launches regardless of result, stop on failure."""
+
+    def __init__(self, name: str, platform_name: str, repeat: int, warmup: int, json_path: Path):
+        super().__init__(retries=repeat + warmup - 1)
+        self.name = name
+        self.platform_name = platform_name
+        self.repeat = repeat
+        self.warmup = warmup
+        self.json_path = json_path
+        self._summary: str | None = None
+
+    def record(self, attempts: list[Attempt], attempt: Attempt) -> bool:
+        attempts.append(attempt)
+        kind = f"Warmup {attempt.number}/{self.warmup}" if attempt.number <= self.warmup else f"Run {attempt.number - self.warmup}/{self.repeat}"
+        if attempt.exit_code != 0 or attempt.cancelled:
+            log.error(f"❌ {kind} failed ({attempt}), benchmark stopped")
+            self.report(attempts)
+            return False
+        log.info(f"{Fore.GREEN}{kind}{Style.RESET_ALL} {Style.DIM}({attempt}){Style.RESET_ALL}")
+        if attempt.number >= self.max_attempts:
+            self.report(attempts)
+            return False
+        return True
+
+    def note(self, attempts: list[Attempt]) -> str | None:
+        return self._summary
+
+    def report(self, attempts: list[Attempt]) -> None:
+        """Log statistics of measured launches and write them as JSON."""
+        measured = [a for a in attempts[self.warmup:] if a.exit_code == 0 and not a.cancelled]
+        wall = stats([a.duration for a in measured])
+        first_frame: dict[str, dict[str, float]] = {}
+        for state in sorted({a.launch_state or "?" for a in measured if a.first_frame_ms is not None}):
+            first_frame[state] = stats([a.first_frame_ms for a in measured if a.first_frame_ms is not None and (a.launch_state or "?") == state])
+
+        runs = f"{len(measured)} runs" + (f" (+{min(self.warmup, len(attempts))} warmup)" if self.warmup else "")
+        summary = f"wall {_format(wall, 's')}" if wall else "no successful runs"
+        log.info(f"{Fore.CYAN}📊 Benchmark {self.name}: {runs}, {summary}{Style.RESET_ALL}")
+        self._summary = f"benchmark {runs}" + (f", median {wall['median']:.3f}s" if wall else "")
+        for state, values in first_frame.items():
+            log.info(f"{Fore.CYAN}📊   first frame {state.lower()}: {_format(values, 'ms', digits=0)}{Style.RESET_ALL}")
+
+        data = {
+            "target": self.name,
+            "platform": self.platform_name,
+            "timestamp": time.time(),
+            "host": platform.node(),
+            "cpus": os.cpu_count(),
+            "warmup": self.warmup,
+            "repeat": self.repeat,
+            "wall_seconds": wall,
+            "first_frame_ms": first_frame,
+            "runs": [asdict(a) | {"warmup": a.number <= self.warmup} for a in attempts],
+        }
+        try:
+            self.json_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.json_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+            log.info(f"{Style.DIM}Benchmark results: {self.json_path}{Style.RESET_ALL}")
+        except OSError as e:
+            log.warning(f"⚠️ Benchmark results not written: {e}")
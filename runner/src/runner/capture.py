@@ -0,0 +1,167 @@
+"""Compressed full-log capture with a console window (--capture-log).
+
+Complete output of the child (process stdout/stderr or device logcat) is streamed into gzip file
+in outputs dir (TEST_UNDECLARED_OUTPUTS_DIR under bazel test) by a background writer thread,
+while console gets only the first N lines, the last M lines and every warning/error line in between:
+
+    <head lines>
+    W ... warning in the middle (shown as soon as printed)
+    ... 123456 lines omitted (full log: /outputs/app.log.gz)
+    <tail lines>
+
+Repetitive lines are collapsed in console only (see dedup.py), the file keeps all of them.
+
+Memory is constant regardless of output size: bounded writer queue of fixed size chunks and tail ring buffer.
+"""
+
+from __future__ import annotations
+
+import gzip
+import logging
+import queue
+import re
+import threading
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from .context import Options, outputs_dir
+from .dedup import LogDedup
+
+log = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 64 * 1024
+_MAX_QUEUED_CHUNKS = 64  # up to 4MB in flight, producer waits for the writer beyond that
+_COMPRESS_LEVEL = 1  # fastest: throughput matters more than size for mostly repetitive text logs
+_IMPORTANT_RE = re.compile(r"\b(warning|error|fatal|panic|exception|failed|failure|abort(ed)?|assert(ion)?)\b|Sanitizer", re.IGNORECASE)
+
+
+def make_capture(options: Options, name: str) -> LogCapture | None:
+    """Capture of the command output into <outputs dir>/<name>.log.gz when requested by options."""
+    if not options.capture_log:
+        return None
+    return LogCapture(outputs_dir() / f"{name}.log.gz", options.console_head, options.console_tail, dedup=options.log_dedup is not False)
+
+
+class _GzipWriter(threading.Thread):
+    """Background writer of byte chunks into gzip file."""
+
+    def __init__(self, path: Path):
+        super().__init__(name=f"capture {path.name}", daemon=True)
+        self.path = path
+        self.error: Exception | None = None
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize=_MAX_QUEUED_CHUNKS)
+
+    def put(self, chunk: bytes | None) -> None:
+        """Queue chunk for writing (None finishes the file), blocks while the queue is full."""
+        self._queue.put(chunk)
+
+    def run(self) -> None:
+        try:
+            with gzip.open(self.path, "wb", compresslevel=_COMPRESS_LEVEL) as f:
+                while (chunk := self._queue.get()) is not None:
+                    f.write(chunk)
+        except Exception as e:
+            self.error = e
+            # Keep draining so producer never blocks on a failed writer
+            while self._queue.get() is not None:
+                pass
+
+
+class LogCapture:
+    """Full output into gzip file, head/tail window and important lines to console."""
+
+    def __init__(self, path: Path, head: int, tail: int, dedup: bool = True):
+        self.path = path
+        self.head = head
+        self.tail = tail
+        self.lines = 0
+        self.bytes = 0
+        self._echo: Callable[[str], None] = print
+        self._writer: _GzipWriter | None = None
+        self._chunk: list[bytes] = []
+        self._chunk_size = 0
+        self._shown = 0
+        self._omitted = 0
+        self._tail: deque[tuple[str, bool]] = deque(maxlen=tail)  # (line, shown)
+        self._dedup = LogDedup(self._show) if dedup else None
+
+    def open(self, echo: Callable[[str], None]) -> None:
+        """Start writer, console lines (without line end) are passed to echo."""
+        self._echo = echo
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = _GzipWriter(self.path)
+        self._writer.start()
+        log.debug(f"capture: {self.path} (console head {self.head}, tail {self.tail})")
+
+    def write(self, line: str, important: bool | None = None) -> None:
+        """Line to both full log and console window."""
+        self.save(line)
+        self.show(line, important)
+
+    def save(self, line: str) -> None:
+        """Line to full log only."""
+        data = (line.rstrip("\r\n") + "\n").encode("utf-8", errors="replace")
+        self.lines += 1
+        self.bytes += len(data)
+        self._chunk.append(data)
+        self._chunk_size += len(data)
+        if self._chunk_size >= _CHUNK_SIZE:
+            self._flush_chunk()
+
+    def show(self, line: str, important: bool | None = None, tag: str | None = None, keep: bool = False) -> None:
+        """Line to console window unless suppressed as repetitive (tag, keep: see LogDedup.feed)."""
+        line = line.rstrip("\r\n")
+        if self._dedup:
+            self._dedup.feed(line, important, tag, keep)
+        else:
+            self._show(line, important)
+
+    def _show(self, line: str, important: bool | None = None) -> None:
+        """Line to console window: shown while in head, kept in tail, shown at once when important (warning/error)."""
+        if self._shown < self.head:
+            self._shown += 1
+            self._echo(line)
+            return
+        if important is None:
+            important = bool(_IMPORTANT_RE.search(line))
+        if important:
+            self._echo(line)
+        if len(self._tail) == self._tail.maxlen and self._tail and not self._tail[0][1]:
+            self._omitted += 1  # oldest not shown line leaves the tail
+        elif self.tail == 0 and not important:
+            self._omitted += 1
+        # Important lines stay in the tail (as shown) so it covers exactly the last lines of output
+        self._tail.append((line, important))
+
+    def close(self) -> str | None:
+        """Show tail, finish the file and return finish note (None when capture wasn't opened)."""
+        if not self._writer:
+            return None
+        if self._dedup:
+            self._dedup.flush()
+        self._show_tail()
+        self._flush_chunk()
+        writer, self._writer = self._writer, None
+        writer.put(None)
+        writer.join()
+        if writer.error:
+            log.warning(f"⚠️ Log capture failed: {writer.error}")
+            return "log capture failed"
+        return f"log {self.path} ({self.lines} lines, {self.bytes / 1024 / 1024:.1f}MB)"
+
+    def _show_tail(self) -> None:
+        """Show tail lines (not shown yet) preceded by the count of omitted ones."""
+        if self._omitted:
+            self._echo(f"... {self._omitted} lines omitted (full log: {self.path})")
+            self._omitted = 0
+        while self._tail:
+            line, shown = self._tail.popleft()
+            if not shown:
+                self._echo(line)
+
+    def _flush_chunk(self) -> None:
+        if self._chunk and self._writer:
+            self._writer.put(b"".join(self._chunk))
+        self._chunk = []
+        self._chunk_size = 0
@@ -1,14 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import cProfile
 import logging
 import os
+import runpy
 import shlex
+import signal
 import subprocess
 import sys
+import threading
+import time
+import traceback
 from abc import ABC, abstractmethod
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from .log import Fore, Style
 
-__all__ = ["Command", "RunCommand"]
+if TYPE_CHECKING:
+    from .capture import LogCapture
+    from .governor import Slot
+    from .profile import CProfileProfiler, Profiler
+    from .retry import Attempt
+    from .symbolize import Symbolizer
+
+__all__ = ["Command", "RunCommand", "ForkPythonCommand"]
 
 log = logging.getLogger(__name__)
 
@@ -17,23 +36,75 @@ class Command(ABC):
     """Base interface for executable commands."""
 
     def __init__(self, scope_prefix: str):
+        from .retry import RetryPolicy
+
         self.scope_prefix = scope_prefix
+        self.finish_notes: list[str] = []  # short run summaries shown in the finish line (i.e. resource usage)
+        self.retry = RetryPolicy()  # launch/monitor phase repeats of prepared command (--retries)
+        self.slot: Slot | None = None  # host-wide concurrency token held while executing (governor)
+        self.attempts: list[Attempt] = []  # results of launches by the last execute()
+        self.error: Exception | None = None  # failure of the last scoped_execute()
+        self.peak_rss_kb: int | None = None  # peak memory of the target when measured by the command (droid sampling)
+        self.cancelled = False
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
 
     def scoped_execute(self) -> int:
         Command._log_delimiter_header(self.scope_prefix)
         try:
-            returncode = self.execute()
-            Command._log_delimiter_finish(self.scope_prefix, returncode)
+            returncode = self._execute_in_slot()
+            Command._log_delimiter_finish(self.scope_prefix, returncode, self.finish_notes)
             return returncode
         except Exception as e:
-            Command._log_delimiter_finish(self.scope_prefix, e)
+            self.error = e
+            Command._log_delimiter_finish(self.scope_prefix, e, self.finish_notes)
             return 1
 
+    def _execute_in_slot(self) -> int:
+        if not self.slot:
+            return self.execute()
+        if not self.slot.acquire(lambda: self.cancelled):
+            return 130
+        try:
+            return self.execute()
+        finally:
+            self.slot.release()
+            note = self.slot.note()
+            if note:
+                self.finish_notes.append(note)
+
     @abstractmethod
     def execute(self) -> int:
         """Execute and return exit code."""
         ...
 
+    def cancel(self) -> None:
+        """Stop execution from another thread (cancelled programmatic run): no more launches, running one is stopped."""
+        self.cancelled = True
+        loop, task = self._loop, self._task
+        if loop and task:
+            loop.call_soon_threadsafe(task.cancel)
+
+    def _run_cancellable(self, main: Coroutine[Any, Any, int]) -> int:
+        """Run async implementation in own event loop, its main task is cancelled by cancel()."""
+
+        async def _main() -> int:
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            try:
+                if self.cancelled:
+                    main.close()
+                    raise asyncio.CancelledError()
+                return await main
+            finally:
+                self._loop = self._task = None
+
+        try:
+            return asyncio.run(_main())
+        except asyncio.CancelledError:
+            log.warning("⚠️ Execute cancelled")
+            return 130
+
     @staticmethod
     def _log_delimiter(symbol: str, color: str, length: int = 64) -> None:
         print(f"{color}{symbol * length}{Style.RESET_ALL}", flush=True)
@@ -47,13 +118,14 @@ class Command(ABC):
         Command._log_delimiter(">", Fore.LIGHTBLUE_EX)
 
     @staticmethod
-    def _log_delimiter_finish(scope_prefix: str, exit_code: int | Exception) -> None:
+    def _log_delimiter_finish(scope_prefix: str, exit_code: int | Exception, notes: list[str] | None = None) -> None:
         Command._log_delimiter("<", Fore.LIGHTBLUE_EX)
         finish_prefix = f"{Fore.CYAN}⬅️  {scope_prefix}{Style.RESET_ALL}"
+        finish_notes = f" {Style.DIM}({'; '.join(notes)}){Style.RESET_ALL}" if notes else ""
         if exit_code == 0:
-            log.info(f"{finish_prefix} {Fore.GREEN}✅ Success: {exit_code}{Style.RESET_ALL}")
+            log.info(f"{finish_prefix} {Fore.GREEN}✅ Success: {exit_code}{Style.RESET_ALL}{finish_notes}")
         else:
-            log.error(f"{finish_prefix} {Fore.RED}❌ Error: {exit_code}{Style.RESET_ALL}")
+            log.error(f"{finish_prefix} {Fore.RED}❌ Error: {exit_code}{Style.RESET_ALL}{finish_notes}")
 
 
 class RunCommand(Command):
@@ -65,20 +137,65 @@ class RunCommand(Command):
         cmd: list[str],
         cwd: str | None = None,
         cwd_descr: str | None = None,
+        symbolizer: Symbolizer | None = None,
+        profiler: Profiler | None = None,
+        capture: LogCapture | None = None,
     ):
         Command.__init__(self, scope_prefix)
         self.scope_prefix = scope_prefix
         self.cmd = cmd
         self.cwd = cwd
         self.cwd_descr = cwd_descr
+        self.symbolizer = symbolizer
+        self.profiler = profiler
+        self.capture = capture
+        self._interrupted = False
+        self._proc: subprocess.Popen | None = None
 
     @property
     def descr(self) -> str:
         return Path(self.cmd[0]).name
 
     def execute(self) -> int:
+        from .retry import Attempt
+
+        cmd = self.profiler.wrap(self.cmd) if self.profiler else self.cmd
+        if self.capture:
+            self.capture.open(lambda text: print(text, flush=True))
+        attempts: list[Attempt] = []
+        self.attempts = attempts
+        returncode = 130
+        try:
+            while not self.cancelled:
+                self._interrupted = False
+                started = time.monotonic()
+                returncode = self._execute(cmd)
+                attempt = Attempt(
+                    number=len(attempts) + 1,
+                    exit_code=returncode,
+                    duration=time.monotonic() - started,
+                    signal=-returncode if returncode < 0 else None,  # killed by signal (POSIX)
+                    cancelled=self._interrupted or self.cancelled,
+                )
+                if not self.retry.record(attempts, attempt):
+                    break
+        finally:
+            if self.capture:
+                note = self.capture.close()
+                if note:
+                    self.finish_notes.append(note)
+        note = self.retry.note(attempts)
+        if note:
+            self.finish_notes.append(note)
+        if self.profiler:
+            note = self.profiler.report()
+            if note:
+                self.finish_notes.append(note)
+        return returncode
+
+    def _execute(self, cmd: list[str]) -> int:
         cwd = self.cwd or os.getcwd()
-        cmd_str = shlex.join(self.cmd)
+        cmd_str = shlex.join(cmd)
         cwd_descr = self.cwd_descr if self.cwd_descr else "CWD" if not self.cwd else None
         log.debug("cd %s%s", cwd, f" # {cwd_descr}" if cwd_descr else "")
         log.debug("%s", cmd_str)
@@ -87,14 +204,181 @@ class RunCommand(Command):
         try:
             env = os.environ.copy()
             shell = sys.platform == "win32"
-            result = subprocess.run(self.cmd, cwd=self.cwd, check=False, env=env, shell=shell)
-            return result.returncode
+            if self.symbolizer or self.capture:
+                return self._run_piped(cmd, env, shell)
+            with subprocess.Popen(cmd, cwd=self.cwd, env=env, shell=shell) as proc:
+                self._started(proc)
+                try:
+                    return proc.wait()
+                except BaseException:
+                    proc.kill()  # as subprocess.run() does when interrupted
+                    raise
         except FileNotFoundError as e:
             log.error("❌ Execute not found: %s", e)
             return 127
         except KeyboardInterrupt:
             log.warning("\n⚠️ Execute interrupted")
+            self._interrupted = True
             return 130
         except Exception as e:
             log.error("❌ Execute error: %s", e)
             return 1
+        finally:
+            self._proc = None
+
+    def _started(self, proc: subprocess.Popen) -> None:
+        self._proc = proc
+        if self.cancelled:  # cancel() came before the process was there
+            proc.terminate()
+
+    def cancel(self) -> None:
+        Command.cancel(self)
+        proc = self._proc
+        if proc and proc.poll() is None:
+            log.debug(f"cancel: terminate {proc.pid}")
+            proc.terminate()
+
+    def _run_piped(self, cmd: list[str], env: dict[str, str], shell: bool) -> int:
+        """Run reading output: forwarded or captured, backtrace frames are collected to symbolize them on crash."""
+        from .symbolize import CrashCollector, log_backtrace
+
+        collector = CrashCollector() if self.symbolizer else None
+        with subprocess.Popen(cmd, cwd=self.cwd, env=env, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT) as proc:
+            assert proc.stdout
+            self._started(proc)
+            for line in proc.stdout:
+                if not self.capture:
+                    sys.stdout.buffer.write(line)
+                    sys.stdout.buffer.flush()
+                if self.capture or collector:
+                    text = line.decode("utf-8", errors="replace")
+                    if self.capture:
+                        self.capture.write(text)
+                    if collector:
+                        collector.feed(text)
+        if self.symbolizer and collector and proc.returncode != 0 and collector.frames:
+            log_backtrace(self.symbolizer, collector.frames)
+        return proc.returncode
+
+
+class ForkPythonCommand(RunCommand):
+    """Command that runs Python script via runpy in a forked child of the runner (no second interpreter start-up).
+
+    Modules already imported by the runner are shared with the script copy-on-write.
+    The script runs with the runner interpreter (not python3 from PATH), as `__main__` with its own sys.argv.
+    """
+
+    def __init__(
+        self,
+        scope_prefix: str,
+        script: Path,
+        args: list[str],
+        cwd: str | None = None,
+        profiler: CProfileProfiler | None = None,
+        capture: LogCapture | None = None,
+    ):
+        RunCommand.__init__(self, scope_prefix, [sys.executable, str(script)] + args, cwd=cwd, profiler=profiler, capture=capture)
+        self.script = script
+        self.args = args
+        self.profile_path = profiler.artifact if profiler else None
+        self._pid: int | None = None
+
+    def cancel(self) -> None:
+        Command.cancel(self)
+        pid = self._pid
+        if pid:
+            log.debug(f"cancel: terminate {pid}")
+            os.kill(pid, signal.SIGTERM)
+
+    def _execute(self, cmd: list[str]) -> int:
+        # cmd is informational only: script runs in forked child, profiler (if any) is enabled there in-process
+        log.debug("fork: %s", shlex.join(cmd))
+
+        Command._log_delimiter_start()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_fd, write_fd = os.pipe() if self.capture else (-1, -1)
+        try:
+            pid = os.fork()
+        except OSError as e:
+            log.error("❌ Fork error: %s", e)
+            return 1
+        if pid == 0:
+            if self.capture:
+                os.dup2(write_fd, 1)
+                os.dup2(write_fd, 2)
+                os.close(write_fd)
+                os.close(read_fd)
+            os._exit(_run_script_forked(self.script, self.args, self.cwd, self.profile_path))
+
+        self._pid = pid
+        if self.cancelled:
+            os.kill(pid, signal.SIGTERM)
+        try:
+            if self.capture:
+                os.close(write_fd)
+                with open(read_fd, "rb") as pipe:
+                    for line in pipe:
+                        self.capture.write(line.decode("utf-8", errors="replace"))
+            _, status = os.waitpid(pid, 0)
+            return os.waitstatus_to_exitcode(status)  # negative when killed by signal, as subprocess returncode
+        except KeyboardInterrupt:
+            # Child is in the same process group and got SIGINT as well
+            log.warning("\n⚠️ Execute interrupted")
+            self._interrupted = True
+            os.waitpid(pid, 0)
+            return 130
+        finally:
+            self._pid = None
+
+
+def _system_exit_code(e: SystemExit) -> int:
+    """Exit code of SystemExit as the interpreter computes it (non-int code is printed, exit code 1)."""
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _run_script_forked(script: Path, args: list[str], cwd: str | None, profile_path: Path | None) -> int:
+    """Child side of ForkPythonCommand: run script like `python3 script args`, return exit code."""
+    # Script owns the process now: runner logging setup must not turn its logging.basicConfig() into no-op
+    logging.root.handlers.clear()
+    logging.root.setLevel(logging.WARNING)
+    if cwd:
+        os.chdir(cwd)
+    sys.argv = [str(script)] + args
+    sys.path[0] = str(script.resolve().parent)
+
+    code = 0
+    profiler = cProfile.Profile() if profile_path else None
+    try:
+        if profiler:
+            profiler.enable()
+        runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        code = _system_exit_code(e)
+    except KeyboardInterrupt:
+        traceback.print_exc()
+        code = 130
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        if profiler and profile_path:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+
+    # Interpreter shutdown steps skipped by os._exit(): non-daemon threads, atexit handlers, stdio flush
+    try:
+        for thread in threading.enumerate():
+            if thread is not threading.current_thread() and not thread.daemon:
+                thread.join()
+        atexit._run_exitfuncs()  # pyright: ignore[reportAttributeAccessIssue]
+    except BaseException:
+        traceback.print_exc()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return code
@@ -0,0 +1,434 @@
+"""Compose mode: run several targets concurrently as one group (i.e. server + client + bridge in one test).
+
+Spec is a JSON file:
+
+    {
+        "processes": [
+            {
+                "name": "server",
+                "file": "_main/test/net/server",        # resolved via Finder (runfiles path, CWD, etc.)
+                "args": ["--port", "8080"],
+                "platform": "auto",                     # detected as usual: exec, wasm, droid, python
+                "ready": {"tcp": 8080}                  # or {"tcp": "host:port"}, {"log": "regex"}, {"file": "path"}
+            },
+            {
+                "name": "client",
+                "file": "_main/test/net/client-wasm.dir",
+                "depends_on": ["server"],               # started only when server is ready
+                "primary": true                         # group exit code; others are torn down when it exits
+            }
+        ]
+    }
+
+Processes are started as soon as their dependencies are ready (instead of fixed sleeps),
+their output is multiplexed with name prefixes. Default primary is the last process.
+"ready_timeout" (seconds, default 60) bounds both waiting for dependencies and the process own readiness;
+dependency cycles are rejected when the spec is loaded.
+
+Runner options --profile, --symbolize, --capture-log (with --console-head/--console-tail) and --log-dedup
+apply to every process: profiles, backtraces and log files are per process, console windows are prefixed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from . import detect, find
+from .cmd import Command, RunCommand
+from .context import Options, Platform
+from .log import Fore, Style
+
+if TYPE_CHECKING:
+    from .capture import LogCapture
+    from .profile import Profiler
+    from .symbolize import CrashCollector, Symbolizer
+
+log = logging.getLogger(__name__)
+
+_DEFAULT_READY_TIMEOUT = 60.0
+_READY_POLL_SECONDS = 0.05
+_TERMINATE_GRACE_SECONDS = 5.0
+_STREAM_LIMIT = 1024 * 1024  # longest forwarded line (asyncio default 64 KiB), longer ones are cut
+_PREFIX_COLORS = [Fore.CYAN, Fore.MAGENTA, Fore.YELLOW, Fore.GREEN, Fore.BLUE, Fore.LIGHTRED_EX]
+
+
+@dataclass
+class ReadyProbe:
+    """Readiness condition of the process gating its dependents."""
+
+    tcp: tuple[str, int] | None = None
+    log: re.Pattern[str] | None = None
+    file: Path | None = None
+
+    def __str__(self) -> str:
+        if self.tcp:
+            return f"tcp {self.tcp[0]}:{self.tcp[1]}"
+        if self.log:
+            return f"log '{self.log.pattern}'"
+        if self.file:
+            return f"file {self.file}"
+        return "started"
+
+
+@dataclass
+class ProcessSpec:
+    """Single process of the compose group."""
+
+    name: str
+    file: Path
+    args: list[str] = field(default_factory=list)
+    platform: Platform = Platform.AUTO
+    depends_on: list[str] = field(default_factory=list)
+    ready: ReadyProbe = field(default_factory=ReadyProbe)
+    ready_timeout: float = _DEFAULT_READY_TIMEOUT
+    primary: bool = False
+
+
+def _parse_ready(value: dict | None) -> ReadyProbe:
+    if not value:
+        return ReadyProbe()
+    if "tcp" in value:
+        tcp = str(value["tcp"])
+        host, _, port = tcp.rpartition(":")
+        return ReadyProbe(tcp=(host or "127.0.0.1", int(port)))
+    if "log" in value:
+        return ReadyProbe(log=re.compile(value["log"]))
+    if "file" in value:
+        return ReadyProbe(file=Path(value["file"]))
+    raise ValueError(f"Unknown ready probe: {value}")
+
+
+def load_spec(path: Path) -> list[ProcessSpec]:
+    """Load and validate compose spec."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    specs = []
+    for index, item in enumerate(data["processes"]):
+        specs.append(ProcessSpec(
+            name=item.get("name") or f"p{index}",
+            file=Path(item["file"]),
+            args=list(item.get("args", [])),
+            platform=Platform(item.get("platform", Platform.AUTO.value)),
+            depends_on=list(item.get("depends_on", [])),
+            ready=_parse_ready(item.get("ready")),
+            ready_timeout=float(item.get("ready_timeout", _DEFAULT_READY_TIMEOUT)),
+            primary=bool(item.get("primary", False)),
+        ))
+    if not specs:
+        raise ValueError(f"No processes in compose spec: {path}")
+
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate process names in compose spec: {names}")
+    for spec in specs:
+        for dep in spec.depends_on:
+            if dep not in names:
+                raise ValueError(f"Unknown dependency '{dep}' of '{spec.name}'")
+    _check_cycles(specs)
+    primaries = [spec for spec in specs if spec.primary]
+    if len(primaries) > 1:
+        raise ValueError(f"Multiple primary processes: {[spec.name for spec in primaries]}")
+    if not primaries:
+        specs[-1].primary = True
+    return specs
+
+
+def _check_cycles(specs: list[ProcessSpec]) -> None:
+    """Topological sort of dependencies, raises ValueError naming a cycle (its processes would wait for each other forever)."""
+    depends_on = {spec.name: spec.depends_on for spec in specs}
+    pending = {name: len(set(deps)) for name, deps in depends_on.items()}
+    dependents: dict[str, list[str]] = {name: [] for name in depends_on}
+    for name, deps in depends_on.items():
+        for dep in set(deps):
+            dependents[dep].append(name)
+    ready = [name for name, count in pending.items() if count == 0]
+    while ready:
+        name = ready.pop()
+        del pending[name]
+        for dependent in dependents[name]:
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                ready.append(dependent)
+    if not pending:
+        return
+
+    # Walk dependencies among unsorted processes until one repeats: every one of them is on or leads to a cycle
+    path = [next(iter(pending))]
+    while True:
+        dep = next(dep for dep in depends_on[path[-1]] if dep in pending)
+        if dep in path:
+            cycle = path[path.index(dep):] + [dep]
+            raise ValueError(f"Dependency cycle in compose spec: {' -> '.join(cycle)}")
+        path.append(dep)
+
+
+class _Process:
+    """Running process of the group with its readiness state."""
+
+    def __init__(
+        self,
+        spec: ProcessSpec,
+        cmd: list[str],
+        cwd: str | None,
+        env: dict[str, str] | None,
+        color: str,
+        profiler: Profiler | None = None,
+        capture: LogCapture | None = None,
+        symbolizer: Symbolizer | None = None,
+    ):
+        self.spec = spec
+        self.cmd = profiler.wrap(cmd) if profiler else cmd
+        self.cwd = cwd
+        self.env = env
+        self.profiler = profiler
+        self.capture = capture
+        self.symbolizer = symbolizer
+        self.prefix = f"{color}[{spec.name}]{Style.RESET_ALL}"
+        self.proc: asyncio.subprocess.Process | None = None
+        self.ready = asyncio.Event()
+        self.failed = asyncio.Event()
+        self.started_at: float | None = None
+        self.collector: CrashCollector | None = None
+
+
+class ComposeCommand(Command):
+    """Command running compose group of targets concurrently, gated by readiness probes."""
+
+    def __init__(
+        self,
+        specs: list[ProcessSpec],
+        finder: find.Finder,
+        make_command: Callable[[Options, find.Finder, Path], Command],
+        scope_prefix: str = "[COMPOSE]",
+        options: Options | None = None,
+    ):
+        Command.__init__(self, scope_prefix)
+        self.finder = finder
+        self.options = options or Options(file=Path())
+        self.processes = [
+            self._prepare(spec, make_command, _PREFIX_COLORS[index % len(_PREFIX_COLORS)])
+            for index, spec in enumerate(specs)
+        ]
+
+    def _prepare(self, spec: ProcessSpec, make_command: Callable[[Options, find.Finder, Path], Command], color: str) -> _Process:
+        """Resolve target and make its command line via the same platform commands as single run."""
+        found_file, found_in = self.finder.find_file(spec.file)
+        if not found_file:
+            raise FileNotFoundError(f"File not found: {spec.file} ({spec.name})")
+        log.debug(f"[{spec.name}] found: {found_file} # {found_in}")
+
+        platform = spec.platform
+        if platform == Platform.AUTO:
+            platform = detect.detect_platform(found_file)
+
+        if platform == Platform.DROID:
+            # Droid command runs async logcat processing on its own, so run it as a separate runner process
+            env = os.environ | {
+                "PYTHONPATH": os.pathsep.join(sys.path),
+                "RUNNER_VERBOSE": "1" if log.isEnabledFor(logging.DEBUG) else "0",
+            }
+            cmd = [sys.executable, "-m", "runner.droid", str(found_file)] + self._droid_flags() + spec.args
+            return _Process(spec, cmd, None, env, color)
+
+        options = self.options
+        command = make_command(
+            Options(
+                file=spec.file,
+                args=spec.args,
+                platform=platform,
+                symbolize=options.symbolize,
+                profile=options.profile,
+                capture_log=options.capture_log,
+                console_head=options.console_head,
+                console_tail=options.console_tail,
+                log_dedup=options.log_dedup,
+            ),
+            self.finder,
+            found_file,
+        )
+        if not isinstance(command, RunCommand):
+            raise ValueError(f"Unsupported command for compose: {command.scope_prefix} ({spec.name})")
+        return _Process(spec, command.cmd, command.cwd, None, color, command.profiler, command.capture, command.symbolizer)
+
+    def _droid_flags(self) -> list[str]:
+        """Runner options for a droid process (runner.droid has the same flags)."""
+        options = self.options
+        flags = ["--profile"] if options.profile else []
+        if options.capture_log:
+            flags += ["--capture-log", "--console-head", str(options.console_head), "--console-tail", str(options.console_tail)]
+        if options.log_dedup is not None:
+            flags.append("--log-dedup" if options.log_dedup else "--no-log-dedup")
+        return flags
+
+    def execute(self) -> int:
+        Command._log_delimiter_start()
+        return self._run_cancellable(self._execute_async())
+
+    async def _execute_async(self) -> int:
+        by_name = {process.spec.name: process for process in self.processes}
+        primary = next(process for process in self.processes if process.spec.primary)
+
+        tasks = [asyncio.create_task(self._run(process, by_name)) for process in self.processes]
+        primary_task = tasks[self.processes.index(primary)]
+        failed_waits = [asyncio.create_task(process.failed.wait()) for process in self.processes]
+        try:
+            done, _ = await asyncio.wait([primary_task, *failed_waits], return_when=asyncio.FIRST_COMPLETED)
+            if primary_task in done:
+                exit_code = primary_task.result()
+                log.info(f"{primary.prefix} primary exited: {exit_code}")
+                return exit_code
+            failed = next(process for process in self.processes if process.failed.is_set())
+            log.error(f"{failed.prefix} ❌ failed before primary exit, tearing down the group")
+            return 1
+        finally:
+            for wait_task in failed_waits:
+                wait_task.cancel()
+            await self._teardown(tasks)
+
+    async def _run(self, process: _Process, by_name: dict[str, _Process]) -> int:
+        spec = process.spec
+        try:
+            deadline = time.monotonic() + spec.ready_timeout
+            for dep in spec.depends_on:
+                dependency = by_name[dep]
+                log.debug(f"{process.prefix} waiting for {dep} ({dependency.spec.ready})")
+                try:
+                    await asyncio.wait_for(dependency.ready.wait(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    log.error(f"{process.prefix} ❌ dependency {dep} not ready in {spec.ready_timeout}s")
+                    process.failed.set()
+                    return 1
+
+            log.debug(f"{process.prefix} start: {process.cmd}" + (f" # cwd {process.cwd}" if process.cwd else ""))
+            process.proc = await asyncio.create_subprocess_exec(
+                *process.cmd,
+                cwd=process.cwd,
+                env=process.env,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=_STREAM_LIMIT,
+            )
+            process.started_at = time.monotonic()
+            output_task = asyncio.create_task(self._forward_output(process))
+            probe_task = asyncio.create_task(self._probe_ready(process))
+
+            exit_code = await process.proc.wait()
+            await output_task
+            probe_task.cancel()
+            await asyncio.to_thread(self._finish, process, exit_code)
+            if not spec.primary:
+                log.info(f"{process.prefix} exited: {exit_code}")
+                if exit_code != 0 or not process.ready.is_set():
+                    process.failed.set()
+            return exit_code
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error(f"{process.prefix} ❌ {e}")
+            process.failed.set()
+            return 1
+
+    async def _forward_output(self, process: _Process) -> None:
+        assert process.proc and process.proc.stdout
+        ready_re = process.spec.ready.log
+        capture = process.capture
+        if capture:
+            capture.open(lambda text: print(f"{process.prefix} {text}", flush=True))
+        collector = None
+        if process.symbolizer:
+            from .symbolize import CrashCollector
+            collector = process.collector = CrashCollector()
+        while True:
+            try:
+                line = await process.proc.stdout.readline()
+            except ValueError:
+                # Over the stream limit: the reader drops what it buffered of the line and goes on
+                line = f"... line over {_STREAM_LIMIT} bytes cut\n".encode()
+            if not line:
+                break
+            line_str = line.decode("utf-8", errors="replace").rstrip()
+            if capture:
+                capture.write(line_str)
+            else:
+                print(f"{process.prefix} {line_str}", flush=True)
+            if collector:
+                collector.feed(line_str)
+            if ready_re and not process.ready.is_set() and ready_re.search(line_str):
+                self._set_ready(process)
+
+    def _finish(self, process: _Process, exit_code: int) -> None:
+        """Close capture, symbolize crash backtrace and report profile of the exited process."""
+        notes = []
+        if process.capture:
+            notes.append(process.capture.close())
+        if process.symbolizer and process.collector and exit_code != 0 and process.collector.frames:
+            from .symbolize import log_backtrace
+            log_backtrace(process.symbolizer, process.collector.frames)
+        if process.profiler:
+            notes.append(process.profiler.report())
+        self.finish_notes += [f"{process.spec.name}: {note}" for note in notes if note]
+
+    def _set_ready(self, process: _Process) -> None:
+        assert process.started_at is not None
+        log_ready = log.info if process.spec.ready.tcp or process.spec.ready.log or process.spec.ready.file else log.debug
+        log_ready(f"{process.prefix} ready ({process.spec.ready}) in {time.monotonic() - process.started_at:.3f}s")
+        process.ready.set()
+
+    async def _probe_ready(self, process: _Process) -> None:
+        probe = process.spec.ready
+        deadline = time.monotonic() + process.spec.ready_timeout
+        if probe.log:
+            try:
+                await asyncio.wait_for(process.ready.wait(), timeout=process.spec.ready_timeout)
+            except asyncio.TimeoutError:
+                log.error(f"{process.prefix} ❌ not ready ({probe}) in {process.spec.ready_timeout}s")
+                process.failed.set()
+            return
+
+        while True:
+            if probe.tcp:
+                try:
+                    _, writer = await asyncio.open_connection(*probe.tcp)
+                    writer.close()
+                    break
+                except OSError:
+                    pass
+            elif probe.file:
+                if probe.file.exists():
+                    break
+            else:
+                break
+            if time.monotonic() > deadline:
+                log.error(f"{process.prefix} ❌ not ready ({probe}) in {process.spec.ready_timeout}s")
+                process.failed.set()
+                return
+            await asyncio.sleep(_READY_POLL_SECONDS)
+        self._set_ready(process)
+
+    async def _teardown(self, tasks: list[asyncio.Task]) -> None:
+        for process in self.processes:
+            if process.proc and process.proc.returncode is None:
+                log.debug(f"{process.prefix} terminate")
+                process.proc.terminate()
+        for process in self.processes:
+            if process.proc and process.proc.returncode is None:
+                try:
+                    await asyncio.wait_for(process.proc.wait(), timeout=_TERMINATE_GRACE_SECONDS)
+                except asyncio.TimeoutError:
+                    log.warning(f"{process.prefix} ⚠️ kill after {_TERMINATE_GRACE_SECONDS}s")
+                    process.proc.kill()
+                    await process.proc.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,9 +1,17 @@
+from __future__ import annotations
+
+import os
 from dataclasses import dataclass, field
 from enum import Enum
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from . import find
 
+if TYPE_CHECKING:
+    from .manifest import LaunchManifest
+    from .retry import Attempt
+
 
 class Platform(Enum):
     """Target platform for execution."""
@@ -26,12 +34,76 @@ class Options:
     file: Path
     args: list[str] = field(default_factory=list)
     platform: Platform = Platform.AUTO
+    compose: bool = False
+    launch_manifest: Path | None = None
+    symbolize: bool = False
+    profile: bool = False
+    capture_log: bool = False
+    console_head: int = 50
+    console_tail: int = 100
+    log_dedup: bool | None = None  # collapse repetitive lines in console (captured log files keep all), None: with capture_log, droid: non-app tags
+    history: bool = False  # append run record to the local history database (history.py)
+    retries: int = 0
+    retry_on: list[str] = field(default_factory=list)  # RetryCondition values, empty: any failure
+    repeat: int = 0  # benchmark: measured launches of the prepared command (see benchmark.py)
+    warmup: int = 0  # benchmark: launches before the measured ones
+    bench_json: Path | None = None  # benchmark results (default: <outputs dir>/<name>.bench.json)
+    warm_start: bool = False  # benchmark of droid: relaunch without force-stop
+    watch: bool = False
+    in_process: bool = False
+    watch_debounce: float = 0.5
+    slots: str | None = None  # concurrency limits per class "wasm=4,droid=1" (see governor.py)
+    min_free_mem: int = 0  # MB of available memory required to start a governed run
+
+
+class RunReason(Enum):
+    """How the run ended."""
+
+    EXITED = "exited"  # exit code of the target (success or failure)
+    SIGNAL = "signal"  # killed by signal (native crash)
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+    ERROR = "error"  # runner failed to execute the target
+
+
+@dataclass
+class RunResult:
+    """Result of programmatic run (runner.run)."""
+
+    exit_code: int
+    reason: RunReason
+    prepare_seconds: float  # resolution, detection, extraction, install: up to the first launch
+    run_seconds: float  # launches (all attempts) and their reports
+    attempts: list[Attempt] = field(default_factory=list)
+    log_path: Path | None = None  # complete output captured with capture_log
+    notes: list[str] = field(default_factory=list)  # finish notes (resources, profiles, outputs)
+    error: Exception | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
+
+
+def outputs_dir() -> Path:
+    """Directory for run artifacts: Bazel test undeclared outputs, else working directory of bazel run, else CWD."""
+    for var in ("TEST_UNDECLARED_OUTPUTS_DIR", "BUILD_WORKING_DIRECTORY"):
+        value = os.environ.get(var)
+        if value:
+            return Path(value)
+    return Path.cwd()
+
+
+def cache_dir(name: str) -> Path:
+    """Persistent per-user cache directory of the runner (i.e. symbol indexes), shared between runs."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "tx-runner" / name
 
 
 class Context:
     """Execution context."""
 
-    def __init__(self, options: Options, finder: find.Finder, found_file: Path):
+    def __init__(self, options: Options, finder: find.Finder, found_file: Path, manifest: LaunchManifest | None = None):
         self.options = options
         self.finder = finder
         self.found_file = found_file
+        self.manifest = manifest
@@ -0,0 +1,135 @@
+"""Adaptive suppression of repetitive console output (emulator/GPU driver spam in logcat, progress floods of tests).
+
+Lines are grouped by template (numbers and hex masked, with the logcat tag when known):
+
+    D EGL_emulation: app_time_stats: avg=1.11ms min=0.69ms max=3.75ms count=62
+    D EGL_emulation: app_time_stats: avg=2.05ms min=0.71ms max=9.12ms count=60     # same template
+
+Within each window only the first lines of a template and a limited number of lines per tag reach the console,
+the rest is counted and reported once the window passes (or at the end):
+
+    ... 57 similar lines suppressed in 10s, last: D EGL_emulation: app_time_stats: avg=1.20ms ...
+
+Only the console is affected: captured log files get every line before deduplication.
+Errors, fatal signals and backtrace frames are never suppressed.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+WINDOW_SECONDS = 10.0
+TEMPLATE_BURST = 3  # lines of the same template shown per window
+TAG_LIMIT = 100  # lines of the same tag shown per window
+_MAX_KEYS = 2048  # tracked templates, expired ones are dropped beyond that
+_SWEEP_SECONDS = 1.0
+# Whole tokens only: 0x hex, hex/decimal words with a digit (hashes, counts), leading digits of values with units (1.11ms);
+# digits inside identifiers are kept (file2, arm64)
+_NUMBER_RE = re.compile(r"\b0x[0-9a-fA-F]+\b|\b[0-9a-fA-F]*\d[0-9a-fA-F]*\b|\b(?!0x)\d+(?=[A-Za-z_])")
+_KEEP_RE = re.compile(r"\b(error|fatal|panic|exception|abort(ed)?|assert(ion)?)\b|Sanitizer|backtrace|#\d+ pc ", re.IGNORECASE)
+
+
+def template(line: str) -> str:
+    """Line with numbers (decimal, hex, addresses, hashes) masked."""
+    return _NUMBER_RE.sub("#", line)
+
+
+@dataclass
+class _Window:
+    started: float
+    seen: int = 0
+    suppressed: int = 0
+    last: str = ""
+
+
+class LogDedup:
+    """Console filter of repeated lines, passes shown lines and suppression summaries to emit(line, important)."""
+
+    def __init__(
+        self,
+        emit: Callable[[str, bool | None], None],
+        window: float = WINDOW_SECONDS,
+        burst: int = TEMPLATE_BURST,
+        tag_limit: int = TAG_LIMIT,
+    ):
+        self.emit = emit
+        self.window = window
+        self.burst = burst
+        self.tag_limit = tag_limit
+        self.suppressed = 0
+        self._templates: dict[tuple[str | None, str], _Window] = {}
+        self._tags: dict[str, _Window] = {}
+        self._swept = time.monotonic()
+
+    def feed(self, line: str, important: bool | None = None, tag: str | None = None, keep: bool = False) -> None:
+        """Show line unless it's a repetition over the limits (keep: never suppress, i.e. logcat errors)."""
+        now = time.monotonic()
+        if now - self._swept >= _SWEEP_SECONDS:
+            self._sweep(now)
+        if keep or _KEEP_RE.search(line):
+            self.emit(line, important)
+            return
+
+        key = (tag, template(line))
+        entry = self._current(self._templates, key, now, lambda old: self._report_template(old, now))
+        entry.seen += 1
+        if entry.seen > self.burst:
+            self._suppress(entry, line)
+            return
+        if tag is not None and self.tag_limit > 0:
+            tag_entry = self._current(self._tags, tag, now, lambda old: self._report_tag(tag, old, now))
+            tag_entry.seen += 1
+            if tag_entry.seen > self.tag_limit:
+                self._suppress(tag_entry, line)
+                return
+        self.emit(line, important)
+
+    def flush(self) -> None:
+        """Report all pending suppressions (at the end of output)."""
+        now = time.monotonic()
+        for entry in self._templates.values():
+            self._report_template(entry, now)
+        for tag, entry in self._tags.items():
+            self._report_tag(tag, entry, now)
+        self._templates.clear()
+        self._tags.clear()
+
+    def _current(self, windows: dict, key: object, now: float, report: Callable[[_Window], None]) -> _Window:
+        """Window of the key, a new one when expired (reporting suppressions of the old one)."""
+        entry = windows.get(key)
+        if entry is not None and now - entry.started < self.window:
+            return entry
+        if entry is not None:
+            report(entry)
+        if len(windows) >= _MAX_KEYS:
+            self._sweep(now)
+            if len(windows) >= _MAX_KEYS:
+                windows.clear()  # lots of unique templates within a window: nothing repeats, nothing to report
+        entry = windows[key] = _Window(now)
+        return entry
+
+    def _suppress(self, entry: _Window, line: str) -> None:
+        entry.suppressed += 1
+        entry.last = line
+        self.suppressed += 1
+
+    def _sweep(self, now: float) -> None:
+        """Report and drop expired windows (suppressed spam that stopped gets its summary without a new line)."""
+        self._swept = now
+        for key in [key for key, entry in self._templates.items() if now - entry.started >= self.window]:
+            self._report_template(self._templates.pop(key), now)
+        for tag in [tag for tag, entry in self._tags.items() if now - entry.started >= self.window]:
+            self._report_tag(tag, self._tags.pop(tag), now)
+
+    def _report_template(self, entry: _Window, now: float) -> None:
+        if entry.suppressed:
+            self.emit(f"... {entry.suppressed} similar lines suppressed in {now - entry.started:.1f}s, last: {entry.last}", False)
+            entry.suppressed = 0
+
+    def _report_tag(self, tag: str, entry: _Window, now: float) -> None:
+        if entry.suppressed:
+            self.emit(f"... {entry.suppressed} lines of {tag} suppressed in {now - entry.started:.1f}s (over {self.tag_limit} per {self.window:.0f}s)", False)
+            entry.suppressed = 0
@@ -1,4 +1,6 @@
 import logging
+import os
+from functools import cache
 from pathlib import Path
 
 import filetype
@@ -70,8 +72,19 @@ def _detect_platform(file: Path) -> tuple[Platform, str]:
     return Platform.EXEC, "no platform detected"
 
 
+@cache
+def _detect_platform_cached(file: Path, stat_key: tuple[int, int, int]) -> tuple[Platform, str]:
+    """Detection per artifact version (stat_key: inode, size, mtime), reused by runs in the same process."""
+    return _detect_platform(file)
+
+
 def detect_platform(file: Path) -> Platform:
-    platform, reason = _detect_platform(file)
+    try:
+        st = os.stat(file)  # follows symlinks (runfiles) to the artifact
+        stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    except OSError:
+        stat_key = (0, 0, 0)
+    platform, reason = _detect_platform_cached(file, stat_key)
     log.debug("detected %s (%s)", platform, reason)
     assert platform != Platform.AUTO, "Detection should never return AUTO"
     return platform
@@ -35,14 +35,31 @@ import re
 import shlex
 import subprocess
 import sys
-from dataclasses import dataclass
+import time
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from enum import Enum
 from functools import cache
 from pathlib import Path
 
 from colorama import Style
 
+from .capture import LogCapture
 from .cmd import Command
+from .context import cache_dir, outputs_dir
+from .dedup import LogDedup
+from .droid_assets import push_embedded
+from .droid_devices import DeviceFilter, DeviceLease, lease_device
+from .droid_outputs import pull_device_outputs
+from .droid_profile import SimpleperfProfiler
+from .profile import TOP_N, log_top, top_report_rows
+from .symbolize import CrashCollector, Symbolizer, log_backtrace
+from .droid_sampler import DEFAULT_INTERVAL as _DEFAULT_SAMPLE_INTERVAL, ResourceSampler, parse_am_start_launch_state, parse_am_start_total_time
+from .find import Finder
+from .manifest import LaunchManifest, resolve_embedded
+from .retry import Attempt, RetryCondition, RetryPolicy
+from .toolchain import tool_path
 
 log = logging.getLogger(__name__)
 
@@ -61,52 +78,35 @@ _APP_LOG_PID_RE = re.compile(r"\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\.\d+\s+\d+\s+(\d+
 _START_PROC_RE = re.compile(r"Start proc (\d+):(.+)/", re.IGNORECASE)  # 03-01 18:52:29.862054  1000   586   623 I ActivityManager: Start proc 19859:com.tx/u0a153 for next-top-activity {com.tx/tx.DroidActivity}
 _PROCESS_EXITED_CLEANLY_RE = re.compile(r"Process (\d+) exited cleanly \((\d+)\)", re.IGNORECASE)
 _PROCESS_EXITED_SIGNAL_RE = re.compile(r"Process (\d+) exited due to signal (\d+)", re.IGNORECASE)
+# strip logcat line heads like
+#   "03-03 18:26:33.635544 10126  5118  5118 "
+#   "03-03 18:32:44.810636  root   356   356 "
+_LOGCAT_HEAD_RE = re.compile(r"\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\.\d+\s+.+\s+\d+\s+\d+\s+")
+_LOGCAT_PRIORITY_TAG_RE = re.compile(r"([VDIWEFA])\s+([^:]*?)\s*:")
+# Tags of the app's own output (redirected stdout/stderr, droid glue): never limited per tag, only repeated templates collapse
+_APP_TAGS = frozenset({"stdout", "stderr", "glue.N"})
 
-
-@cache
-def _get_build_tools_dir() -> Path:
-    """Find the latest Android build-tools directory using ANDROID_HOME."""
-    android_home = os.environ.get("ANDROID_HOME")
-    if not android_home:
-        raise EnvironmentError("ANDROID_HOME environment variable is not set")
-    build_tools_dir = Path(android_home) / "build-tools"
-    if not build_tools_dir.is_dir():
-        raise FileNotFoundError(f"build-tools directory not found: {build_tools_dir}")
-    versions = [d for d in build_tools_dir.iterdir() if d.is_dir()]
-    if not versions:
-        raise FileNotFoundError(f"No build-tools versions found in {build_tools_dir}")
-
-    def _version_key(p: Path) -> tuple[int, ...]:
-        try:
-            return tuple(int(x) for x in p.name.split("."))
-        except ValueError:
-            return (0,)
-
-    latest = max(versions, key=_version_key)
-    log.debug(f"Using build-tools: {latest}")
-    return latest
+# APKs installed by this process: (device serial, package) -> (APK identity, UID), reruns (--watch) skip install of unchanged APK
+# (identity: launch manifest content hash or size/mtime/inode of the APK)
+_installed_apks: dict[tuple[str, str], tuple[str, str]] = {}
 
 
+@cache
 def _get_aapt2_path() -> str:
     """Return path to aapt2 from the latest build-tools."""
-    return str(_get_build_tools_dir() / "aapt2")
+    return tool_path("aapt2")
 
 
+@cache
 def _get_aapt_path() -> str:
     """Return path to aapt from the latest build-tools."""
-    return str(_get_build_tools_dir() / "aapt")
+    return tool_path("aapt")
 
 
 @cache
 def _get_adb_path() -> str:
     """Return path to adb from ANDROID_HOME/platform-tools."""
-    android_home = os.environ.get("ANDROID_HOME")
-    if not android_home:
-        raise EnvironmentError("ANDROID_HOME environment variable is not set")
-    adb = Path(android_home) / "platform-tools" / "adb"
-    if not adb.is_file():
-        raise FileNotFoundError(f"adb not found: {adb}")
-    return str(adb)
+    return tool_path("adb")
 
 
 class ExitReason(Enum):
@@ -131,6 +131,7 @@ class LogEvent:
 
     source: LogSource
     line: str
+    received_at: float = field(default_factory=time.monotonic)
 
 
 @dataclass
@@ -140,6 +141,8 @@ class ExitEvent:
     reason: ExitReason
     descr: str | None = None
     exit_code: int | None = None
+    detected_at: float = field(default_factory=time.monotonic)
+    latency: float | None = None  # from receiving the log line to exit detection
 
     def take_exit_code(self) -> int:
         log.info(f"{self.reason}{self.descr and f' {self.descr}' or ''}")
@@ -149,6 +152,22 @@ class ExitEvent:
         return 1
 
 
+def _is_logcat_warning(line: str) -> bool:
+    """Whether logcat line has warning or higher priority (W, E, F, A follow the line head)."""
+    mo = _LOGCAT_HEAD_RE.search(line)
+    return bool(mo) and line[mo.end():mo.end() + 1] in ("W", "E", "F", "A")
+
+
+def _logcat_priority_tag(line: str) -> tuple[str, str] | tuple[None, None]:
+    """Priority letter and tag of logcat line, i.e. ("D", "EGL_emulation")."""
+    mo = _LOGCAT_HEAD_RE.search(line)
+    if mo:
+        mo = _LOGCAT_PRIORITY_TAG_RE.match(line, mo.end())
+        if mo:
+            return mo.group(1), mo.group(2)
+    return None, None
+
+
 def _log_cmd(cmd: list[str] | str) -> None:
     if isinstance(cmd, list):
         cmd_str = shlex.join(cmd)
@@ -187,6 +206,109 @@ def _get_launcher_activity(apk_path: Path) -> str:
     return mo.group(1)
 
 
+@cache
+def _read_apk_identity(apk_path: Path, stat_key: tuple[int, int]) -> tuple[str, str]:
+    """Package name and launcher activity of APK via aapt, cached per APK version (stat_key: size, mtime)."""
+    result = _run([_get_aapt2_path(), "dump", "packagename", str(apk_path)], check=True, capture_output=True, text=True)
+    return result.stdout.strip(), _get_launcher_activity(apk_path)
+
+
+def _file_identity(path: Path) -> str:
+    """Version of the file by stat (size, mtime, inode): no hashing of the whole APK per run."""
+    st = path.stat()
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
+
+
+class LogcatBackend(ABC):
+    """Provider of app and system logcat streams and of the app launch."""
+
+    name = "logcat"  # for the exit event when all streams end without an exit line
+
+    @abstractmethod
+    async def open(self) -> dict[LogSource, AsyncIterator[bytes]]:
+        """Start reading logcat and return raw line streams by source."""
+        ...
+
+    @abstractmethod
+    async def launch(self) -> None:
+        """Launch the app (after logcat streams are opened to not miss its first lines)."""
+        ...
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Stop reading logcat and release resources."""
+        ...
+
+
+class AdbLogcatBackend(LogcatBackend):
+    """Logcat streams of connected device via adb."""
+
+    def __init__(self, command: DroidCommand):
+        self.command = command
+        self._procs: list[asyncio.subprocess.Process] = []
+
+    async def open(self) -> dict[LogSource, AsyncIterator[bytes]]:
+        app_logcat_cmd = [
+            *self.command.adb_cmd,
+            "logcat",
+            f"--uid={self.command.uid}",
+            "-v", "color",
+            "-v", "usec",
+            "-v", "uid",
+            "-T1",
+        ]
+        # Spam as "D EGL_emulation: app_time_stats: avg=1.11ms min=0.69ms max=3.75ms count=62" is read as well
+        # (for capture and recording), console collapses it via LogDedup (with --capture-log or --log-dedup)
+        app_proc = await _run_asyncio(
+            app_logcat_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+
+        system_proc = await _run_asyncio([
+                *self.command.adb_cmd,
+                "logcat",
+                f"--uid={self.command.uid},1000,0",
+                "-v", "color",
+                "-v", "usec",
+                "-v", "uid",
+                "-T1",
+                "-s",
+                "ActivityTaskManager:V",
+                "ActivityManager:V",
+                "Zygote:V",
+                "BootReceiver:I",
+            ],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+
+        self._procs = [app_proc, system_proc]
+        return {
+            LogSource.APP: self._read(app_proc),
+            LogSource.SYSTEM: self._read(system_proc),
+        }
+
+    async def launch(self) -> None:
+        await self.command._run_app()
+
+    async def close(self) -> None:
+        for proc in self._procs:
+            if proc.returncode is None:
+                proc.terminate()
+        # Ensure subprocess transports are closed before event loop shuts down
+        await asyncio.gather(*(proc.wait() for proc in self._procs))
+
+    @staticmethod
+    async def _read(proc: asyncio.subprocess.Process) -> AsyncIterator[bytes]:
+        assert proc.stdout is not None
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            yield line
+
+
 class DroidCommand(Command):
     """Command that runs droid main() directly."""
 
@@ -195,47 +317,186 @@ class DroidCommand(Command):
         apk_path: Path,
         args: list[str] | None = None,
         timeout: int = _DEFAULT_TIMEOUT,
+        logcat_record: Path | None = None,
+        logcat_replay: Path | None = None,
+        logcat_replay_realtime: bool = False,
+        package_name: str | None = None,
+        launcher_activity: str | None = None,
+        sample_interval: float | None = None,
+        profile: bool = False,
+        profile_lib_dirs: list[Path] | None = None,
+        symbol_dirs: list[Path] | None = None,
+        symbolize: bool = True,
+        capture: LogCapture | None = None,
+        device_outputs: list[str] | None = None,
+        embedded: list[tuple[str, Path]] | None = None,
+        device_filter: DeviceFilter | None = None,
+        log_dedup: bool | None = None,
+        apk_hash: str | None = None,
     ):
         Command.__init__(self, f"[DROID: {apk_path.name}]")
         self.apk_path = apk_path
         self.args = args or []
         self.timeout = timeout
-
-        # Get package name from APK
-        result = _run([_get_aapt2_path(), "dump", "packagename", str(apk_path)], check=True, capture_output=True, text=True)
-        package_name = result.stdout.strip()
+        self.logcat_record = logcat_record
+        self.logcat_replay = logcat_replay
+        self.logcat_replay_realtime = logcat_replay_realtime
+        self.exit_event: ExitEvent | None = None
+        self.device_filter = device_filter or DeviceFilter(serial=os.environ.get("ANDROID_SERIAL") or None)
+        self.device: DeviceLease | None = None  # leased for the run, all adb calls go to it
+        self.first_frame_ms: int | None = None
+        self.launch_state: str | None = None
+        self.measure_launch = False  # wait for launch completion (am start -W) to take first frame time (benchmark)
+        self.warm_start = False  # relaunch without force-stop (benchmark of warm/hot starts)
+        self.capture = capture
+        self.log_dedup = log_dedup
+        self.apk_hash = apk_hash  # content hash from launch manifest (build time): APK identity for install skip
+        self.device_outputs = device_outputs or []
+        if self.device_outputs and logcat_replay:
+            log.warning("⚠️ Device outputs require device, not retrieved in replay")
+            self.device_outputs = []
+        self.embedded = embedded or []  # pushed to device instead of APK assets (path in app, local file)
+        if self.embedded and logcat_replay:
+            log.warning("⚠️ Embedded data push requires device, skipped in replay")
+            self.embedded = []
+
+        self.sample_interval = sample_interval
+        if sample_interval and logcat_replay:
+            log.warning("⚠️ Resource sampling requires device, disabled in replay")
+            self.sample_interval = None
+
+        # Unstripped .so are next to APK in build outputs
+        self.symbol_dirs = symbol_dirs or [apk_path.parent]
+        self.symbolizer = Symbolizer(self.symbol_dirs, cache_dir("symbols")) if symbolize else None
+        self.crash_collector = CrashCollector()
+
+        self.profile = profile
+        self.profile_lib_dirs = profile_lib_dirs or self.symbol_dirs
+        if profile and logcat_replay:
+            log.warning("⚠️ Profiling requires device, disabled in replay")
+            self.profile = False
+
+        if logcat_replay:
+            # App identity is taken from the recording, device and APK are not required
+            from . import droid_replay
+            header = droid_replay.read_header(logcat_replay)
+            self.package_name = header.package
+            self.component = header.component
+            self.launcher_activity = header.component.split("/", 1)[-1]
+            self.uid = header.uid
+            log.debug(f"replay: {logcat_replay} package: {self.package_name}, component: {self.component}")
+            return
+
+        if package_name and launcher_activity:
+            # App identity is known at build time (launch manifest), aapt is not required
+            self.package_name = package_name
+            self.launcher_activity = launcher_activity
+            self.component = f"{package_name}/{launcher_activity}"
+            log.debug(f"manifest package: {package_name}, component: {self.component}")
+            return
+
+        # Get package name and launcher activity from APK
+        st = apk_path.stat()
+        package_name, self.launcher_activity = _read_apk_identity(apk_path.resolve(), (st.st_size, st.st_mtime_ns))
         log.debug(f"package: {package_name}")
         self.package_name = package_name
-
-        # Get launcher activity from APK
-        self.launcher_activity = _get_launcher_activity(apk_path)
         self.component = f"{package_name}/{self.launcher_activity}"
         log.debug(f"launcher_activity: {self.launcher_activity}, component: {self.component}")
 
     def execute(self) -> int:
         """Execute and return exit code. Runs async logic via asyncio.run()."""
-        return asyncio.run(self._execute_async())
+        return self._run_cancellable(self._execute_async())
 
-    async def _execute_async(self) -> int:
-        await _run_async([_get_adb_path(), "shell", "am", "force-stop", self.package_name], check=True)
-        await _run_async([_get_adb_path(), "install", str(self.apk_path)], check=True)
-
-        self.uid = self._get_package_uid(self.package_name)
-        log.debug(f"UID {self.uid} for package {self.package_name}")
+    @property
+    def adb_cmd(self) -> list[str]:
+        """adb command addressing the leased device."""
+        return [_get_adb_path(), "-s", self.device.serial] if self.device else [_get_adb_path()]
 
-        Command._log_delimiter_start()
+    async def _execute_async(self) -> int:
+        if not self.logcat_replay:
+            self.device = await asyncio.to_thread(
+                lease_device, _get_adb_path(), self.device_filter, self.package_name, lambda: self.cancelled
+            )
+            if self.device is None:
+                return 130
+            self.finish_notes.append(self.device.note())
         try:
-            exit_event = await self._run_app_and_handle_logs()
-            return exit_event.take_exit_code()
+            return await self._install_and_run()
         finally:
-            #await _run_async([_get_adb_path(), "shell", "am", "force-stop", self.package_name], check=True)
-            pass
-
-    @staticmethod
-    def _get_package_uid(package_name: str) -> str:
+            if self.device:
+                self.device.release()
+                self.device = None
+
+    async def _install_and_run(self) -> int:
+        if not self.logcat_replay:
+            await _run_async([*self.adb_cmd, "shell", "am", "force-stop", self.package_name], check=True)
+            apk_identity = self.apk_hash or _file_identity(self.apk_path)
+            key = (self.device.serial if self.device else "", self.package_name)
+            installed = _installed_apks.get(key)
+            if installed and installed[0] == apk_identity:
+                self.uid = installed[1]
+                log.debug(f"APK is unchanged ({apk_identity[:16]}), install skipped")
+            else:
+                await _run_async([*self.adb_cmd, "install", str(self.apk_path)], check=True)
+                self.uid = self._get_package_uid(self.package_name)
+                _installed_apks[key] = (apk_identity, self.uid)
+            log.debug(f"UID {self.uid} for package {self.package_name}")
+            if self.embedded:
+                pushed = await asyncio.to_thread(push_embedded, self.adb_cmd, self.package_name, self.embedded)
+                log.debug(str(pushed))
+                self.finish_notes.append(str(pushed))
+
+        if self.capture:
+            self.capture.open(log.info)
+        attempts: list[Attempt] = []
+        self.attempts = attempts
+        try:
+            while True:
+                if attempts and not self.logcat_replay and not self.warm_start:
+                    # Warm retry: APK is installed already, only relaunch the app
+                    await _run_async([*self.adb_cmd, "shell", "am", "force-stop", self.package_name], check=True)
+                Command._log_delimiter_start()
+                self.crash_collector = CrashCollector()
+                self.first_frame_ms = None
+                self.launch_state = None
+                started = time.monotonic()
+                self.exit_event = await self._run_app_and_handle_logs()
+                if self.exit_event.reason != ExitReason.COMPLETED and self.symbolizer and self.crash_collector.frames:
+                    log_backtrace(self.symbolizer, self.crash_collector.frames)
+                exit_code = self.exit_event.take_exit_code()
+                died = self.exit_event.reason == ExitReason.PROCESS_DIED
+                attempt = Attempt(
+                    number=len(attempts) + 1,
+                    exit_code=exit_code,
+                    duration=time.monotonic() - started,
+                    signal=self.exit_event.exit_code - 128 if died and self.exit_event.exit_code is not None else None,
+                    timeout=self.exit_event.reason == ExitReason.TIMEOUT,
+                    cancelled=self.exit_event.reason == ExitReason.CANCELLED,
+                    first_frame_ms=self.first_frame_ms,
+                    launch_state=self.launch_state,
+                )
+                if not self.retry.record(attempts, attempt):
+                    break
+            if self.device_outputs:
+                pulled = await asyncio.to_thread(
+                    pull_device_outputs, self.adb_cmd, self.package_name, self.device_outputs, outputs_dir() / "device"
+                )
+                self.finish_notes.append(str(pulled))
+            return exit_code
+        finally:
+            #await _run_async([*self.adb_cmd, "shell", "am", "force-stop", self.package_name], check=True)
+            if self.capture:
+                note = self.capture.close()
+                if note:
+                    self.finish_notes.append(note)
+            note = self.retry.note(attempts)
+            if note:
+                self.finish_notes.append(note)
+
+    def _get_package_uid(self, package_name: str) -> str:
         """Get UID of installed package from pm list. Raises ValueError if not found."""
         result = _run(
-            [_get_adb_path(), "shell", "pm", "list", "package", "-U", package_name],
+            [*self.adb_cmd, "shell", "pm", "list", "package", "-U", package_name],
             check=True,
             capture_output=True,
             text=True,
@@ -246,76 +507,82 @@ class DroidCommand(Command):
         uid = uid_line.split("uid:")[1]
         return uid
 
-    def _run_app(self) -> None:
-        """Launch app via am start. Passes tx.argv extra when args are provided."""
+    async def _run_app(self) -> None:
+        """Launch app via am start. Passes tx.argv extra when args are provided.
+
+        When sampling resources, waits for launch completion (-W) to take launch-to-first-frame time
+        (in a thread: logcat lines of the starting app are handled meanwhile).
+        """
+        wait = ["-W"] if self.sample_interval or self.measure_launch else []
         if self.args:
             args_str = " ".join(self.args)
             # Pass as single shell string so "foo bar" survives device shell parsing
-            am_cmd = f"am start -n {self.component} --es {_TX_ARGV_EXTRA} {shlex.quote(args_str)}"
-            cmd = [_get_adb_path(), "shell", am_cmd]
+            am_cmd = shlex.join(["am", "start", *wait, "-n", self.component]) + f" --es {_TX_ARGV_EXTRA} {shlex.quote(args_str)}"
+            cmd = [*self.adb_cmd, "shell", am_cmd]
         else:
-            cmd = [_get_adb_path(), "shell", "am", "start", "-n", self.component]
+            cmd = [*self.adb_cmd, "shell", "am", "start", *wait, "-n", self.component]
         log.debug(f"am start: component={self.component}, args={self.args}")
-        _run(cmd, check=True, capture_output=True, text=True)
+        result = await _run_async(cmd, check=True, capture_output=True, text=True)
+        if wait:
+            self.first_frame_ms = parse_am_start_total_time(result.stdout)
+            self.launch_state = parse_am_start_launch_state(result.stdout)
+            log.debug(f"first frame: {self.first_frame_ms}ms ({self.launch_state})")
+
+    def _make_logcat_backend(self) -> LogcatBackend:
+        if self.logcat_replay:
+            from . import droid_replay
+            return droid_replay.ReplayLogcatBackend(self.logcat_replay, realtime=self.logcat_replay_realtime)
+        return AdbLogcatBackend(self)
 
     async def _run_app_and_handle_logs(self) -> ExitEvent:
         """Start logcat processes, wait for exit condition, return exit code."""
         self.app_pid = None
         event_queue: asyncio.Queue[LogEvent | ExitEvent] = asyncio.Queue()
 
-        app_logcat_cmd = [
-            _get_adb_path(),
-            "logcat",
-            f"--uid={self.uid}",
-            "-v", "color",
-            "-v", "usec",
-            "-v", "uid",
-            "-T1",
-        ]
-        if not log.isEnabledFor(logging.DEBUG):
-            # default suppress spam as "D EGL_emulation: app_time_stats: avg=1.11ms min=0.69ms max=3.75ms count=62"
-            app_logcat_cmd += ["*:V", "EGL_emulation:I"]
-        app_proc = await _run_asyncio(
-            app_logcat_cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-        )
+        recorder = None
+        if self.logcat_record:
+            from . import droid_replay
+            recorder = droid_replay.LogcatRecorder(
+                self.logcat_record,
+                droid_replay.RecordingHeader(package=self.package_name, component=self.component, uid=self.uid),
+            )
 
-        system_proc = await _run_asyncio([
-                _get_adb_path(),
-                "logcat",
-                f"--uid={self.uid},1000,0",
-                "-v", "color",
-                "-v", "usec",
-                "-v", "uid",
-                "-T1",
-                "-s",
-                "ActivityTaskManager:V",
-                "ActivityManager:V",
-                "Zygote:V",
-                "BootReceiver:I",
-            ],
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-        )
+        self.logcat_backend = backend = self._make_logcat_backend()
+        streams = await backend.open()
+
+        sampler = None
+        if self.sample_interval:
+            sampler = ResourceSampler(self.adb_cmd, self.package_name, lambda: self.app_pid, self.sample_interval)
+            await sampler.start()
+
+        profiler = None
+        if self.profile:
+            # Retries keep the earlier recordings: <apk>.perf.data, <apk>.attempt2.perf.data, ...
+            number = len(self.attempts) + 1
+            output_base = outputs_dir() / (self.apk_path.stem + (f".attempt{number}" if number > 1 else ""))
+            profiler = SimpleperfProfiler(self.adb_cmd, self.package_name, output_base, self.profile_lib_dirs)
+            await profiler.start()
+
+        open_streams = len(streams)
 
         async def emit_logcat_events(
-            proc: asyncio.subprocess.Process,
+            stream: AsyncIterator[bytes],
             source: LogSource,
         ) -> None:
-            assert proc.stdout is not None
+            nonlocal open_streams
             try:
-                while True:
-                    line = await proc.stdout.readline()
-                    if not line:
-                        break
+                async for line in stream:
                     line_str = line.decode("utf-8", errors="replace").rstrip()
+                    if recorder:
+                        recorder.write(source, line_str)
                     if line_str:
                         await event_queue.put(LogEvent(source, line_str))
             except asyncio.CancelledError:
-                pass
-            finally:
-                proc.terminate()
+                return
+            # Nothing more to detect the exit from (recording without exit line, logcat killed): don't wait for timeout
+            open_streams -= 1
+            if not open_streams:
+                await event_queue.put(ExitEvent(ExitReason.PROCESS_DIED, f"{backend.name} ended without exit line"))
 
         async def emit_timeout_event() -> None:
             if self.timeout <= 0:
@@ -324,26 +591,48 @@ class DroidCommand(Command):
             await asyncio.sleep(self.timeout)
             await event_queue.put(ExitEvent(ExitReason.TIMEOUT, f"{self.timeout}s timeout reached"))
 
-        app_logcat_task = asyncio.create_task(emit_logcat_events(app_proc, LogSource.APP))
-        system_logcat_task = asyncio.create_task(emit_logcat_events(system_proc, LogSource.SYSTEM))
+        app_logcat_task = asyncio.create_task(emit_logcat_events(streams[LogSource.APP], LogSource.APP))
+        system_logcat_task = asyncio.create_task(emit_logcat_events(streams[LogSource.SYSTEM], LogSource.SYSTEM))
         timeout_task = asyncio.create_task(emit_timeout_event())
 
-        self._run_app()
+        capture = self.capture
+
+        await backend.launch()
+
+        debug_enabled = log.isEnabledFor(logging.DEBUG)
+
+        # Console only: capture file and recording get all lines.
+        # Without capture only repeated templates collapse (no per-tag limit): by default in other tags than app's own output
+        # (emulator/GPU spam), for every line with --log-dedup
+        dedup = LogDedup(lambda text, important: log.info(text), tag_limit=0) if self.log_dedup is not False and not capture else None
+        dedup_app_output = bool(self.log_dedup)
+
+        def _log_app_line(text: str, line: str) -> None:
+            priority, tag = _logcat_priority_tag(line)
+            keep = priority in ("E", "F", "A")
+            app_output = tag in _APP_TAGS
+            if app_output:
+                tag = None  # app's own output: no per-tag limit (test results must reach the console)
+            if capture:
+                capture.show(text, important=_is_logcat_warning(line), tag=tag, keep=keep)
+            elif dedup and (dedup_app_output or not app_output):
+                dedup.feed(text, tag=tag, keep=keep)
+            else:
+                log.info(text)
 
         def _log_line(source: LogSource, line: str) -> None:
+            self.crash_collector.feed(line)  # native backtrace frames (tombstone) for symbolization on crash
+            if capture:
+                capture.save(f"[{source.value}] {line}")  # full logcat of app and system regardless of console
             prefix = f"{Style.DIM}[{source.value}]{Style.RESET_ALL}"
-            if log.isEnabledFor(logging.DEBUG):
+            if debug_enabled:
                 if source == LogSource.APP:
-                    log.info(f"{prefix} {line}")
+                    _log_app_line(f"{prefix} {line}", line)
                 else:
                     log.debug(f"{prefix} {line}")
             else:
-                # strip logcat line heads like 
-                #   "03-03 18:26:33.635544 10126  5118  5118 "
-                #   "03-03 18:32:44.810636  root   356   356 "
                 if source == LogSource.APP:
-                    line = re.sub(r"\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\.\d+\s+.+\s+\d+\s+\d+\s+", "", line)
-                    log.info(f"{line}")
+                    _log_app_line(_LOGCAT_HEAD_RE.sub("", line, count=1), line)
 
 
         def _log_remaining_lines() -> None:
@@ -371,6 +660,32 @@ class DroidCommand(Command):
                 self.app_pid = int(mo.group(1))
                 log.debug(f"PID {self.app_pid} from system log '{_START_PROC_RE.pattern}' -> {mo.groups()}")
 
+        def _detect_exit(item: LogEvent) -> tuple[ExitEvent | None, float]:
+            """Check log line for exit condition, return exit event (if detected) and tail seconds to wait for."""
+            if item.source == LogSource.APP:
+                _ensure_app_pid_from_app_log(item.line)
+                mo = _VM_EXITING_RE.search(item.line)
+                if mo:
+                    exit_code = int(mo.group(1))
+                    return ExitEvent(ExitReason.COMPLETED, f"'{_VM_EXITING_RE.pattern}' -> {mo.groups()}", exit_code), _DEFAULT_TAIL_SECONDS
+                if _FATAL_EXCEPTION_RE.search(item.line):
+                    return ExitEvent(ExitReason.FATAL_EXCEPTION, f"'{_FATAL_EXCEPTION_RE.pattern}'"), _DEFAULT_TAIL_SECONDS
+                mo = _FATAL_SIGNAL_RE.search(item.line)
+                if mo:
+                    signal_num = int(mo.group(1))
+                    return ExitEvent(ExitReason.PROCESS_DIED, f"'{_FATAL_SIGNAL_RE.pattern}' -> {mo.groups()}", 128 + signal_num), _CRASH_TAIL_SECONDS
+            else:
+                _ensure_app_pid_from_system_log(item.line)
+                mo = _PROCESS_EXITED_CLEANLY_RE.search(item.line)
+                if mo and self.app_pid is not None and int(mo.group(1)) == self.app_pid:
+                    exit_code = int(mo.group(2))
+                    return ExitEvent(ExitReason.COMPLETED, f"'{_PROCESS_EXITED_CLEANLY_RE.pattern}' -> {mo.groups()}", exit_code), _CRASH_TAIL_SECONDS
+                mo = _PROCESS_EXITED_SIGNAL_RE.search(item.line)
+                if mo and self.app_pid is not None and int(mo.group(1)) == self.app_pid:
+                    signal_num = int(mo.group(2))
+                    return ExitEvent(ExitReason.PROCESS_DIED, f"'{_PROCESS_EXITED_SIGNAL_RE.pattern}' -> {mo.groups()}", 128 + signal_num), _CRASH_TAIL_SECONDS
+            return None, _DEFAULT_TAIL_SECONDS
+
         # Handle events from app and system logcat until exit condition is detected (normal or abnormal)
         tail_seconds = _DEFAULT_TAIL_SECONDS
         try:
@@ -381,31 +696,11 @@ class DroidCommand(Command):
                 assert isinstance(item, LogEvent)
 
                 _log_line(item.source, item.line)
-                if item.source == LogSource.APP:
-                    _ensure_app_pid_from_app_log(item.line)
-                    mo = _VM_EXITING_RE.search(item.line)
-                    if mo:
-                        exit_code = int(mo.group(1))
-                        return ExitEvent(ExitReason.COMPLETED, f"'{_VM_EXITING_RE.pattern}' -> {mo.groups()}", exit_code)
-                    if _FATAL_EXCEPTION_RE.search(item.line):
-                        return ExitEvent(ExitReason.FATAL_EXCEPTION, f"'{_FATAL_EXCEPTION_RE.pattern}'")
-                    mo = _FATAL_SIGNAL_RE.search(item.line)
-                    if mo:
-                        signal_num = int(mo.group(1))
-                        tail_seconds = _CRASH_TAIL_SECONDS
-                        return ExitEvent(ExitReason.PROCESS_DIED, f"'{_FATAL_SIGNAL_RE.pattern}' -> {mo.groups()}", 128 + signal_num)
-                else:
-                    _ensure_app_pid_from_system_log(item.line)
-                    mo = _PROCESS_EXITED_CLEANLY_RE.search(item.line)
-                    if mo and self.app_pid is not None and int(mo.group(1)) == self.app_pid:
-                        exit_code = int(mo.group(2))
-                        tail_seconds = _CRASH_TAIL_SECONDS
-                        return ExitEvent(ExitReason.COMPLETED, f"'{_PROCESS_EXITED_CLEANLY_RE.pattern}' -> {mo.groups()}", exit_code)
-                    mo = _PROCESS_EXITED_SIGNAL_RE.search(item.line)
-                    if mo and self.app_pid is not None and int(mo.group(1)) == self.app_pid:
-                        signal_num = int(mo.group(2))
-                        tail_seconds = _CRASH_TAIL_SECONDS
-                        return ExitEvent(ExitReason.PROCESS_DIED, f"'{_PROCESS_EXITED_SIGNAL_RE.pattern}' -> {mo.groups()}", 128 + signal_num)
+                exit_event, tail_seconds = _detect_exit(item)
+                if exit_event:
+                    exit_event.latency = exit_event.detected_at - item.received_at
+                    log.debug(f"exit detected in {exit_event.latency * 1000:.3f}ms")
+                    return exit_event
         except asyncio.CancelledError:
             return ExitEvent(ExitReason.CANCELLED)
         finally:
@@ -419,15 +714,222 @@ class DroidCommand(Command):
             except asyncio.CancelledError:
                 pass
 
-            # Ensure subprocess transports are closed before event loop shuts down
-            await asyncio.gather(app_proc.wait(), system_proc.wait())
+            await backend.close()
+            if recorder:
+                recorder.close()
+            if sampler:
+                await sampler.stop()
+                self._report_resources(sampler)
+            if profiler:
+                await self._report_profile(profiler)
 
             _log_remaining_lines()
+            if dedup:
+                dedup.flush()
+
+    def _report_resources(self, sampler: ResourceSampler) -> None:
+        sampler.first_frame_ms = self.first_frame_ms
+        summary = sampler.summary()
+        if summary.rss_max_kb is not None:
+            self.peak_rss_kb = max(self.peak_rss_kb or 0, summary.rss_max_kb)
+        csv_path, json_path = sampler.write(outputs_dir() / f"{self.apk_path.stem}.resources")
+        log.debug(f"resources: {csv_path}, {json_path}")
+        self.finish_notes.append(str(summary))
+
+    async def _report_profile(self, profiler: SimpleperfProfiler) -> None:
+        if not await profiler.stop():
+            self.finish_notes.append("profile failed")
+            return
+        reports = await asyncio.to_thread(profiler.report)
+        for report in reports:
+            log.debug(f"profile report: {report}")
+        if profiler.report_txt in reports:
+            log_top(f"Top {TOP_N} functions ({profiler.report_txt.name})", top_report_rows(profiler.report_txt.read_text()))
+        self.finish_notes.append(f"profile {profiler.perf_data}" + (f" (+{len(reports)} reports)" if reports else ""))
+
+
+def _add_logcat_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--logcat-record",
+        type=Path,
+        metavar="FILE",
+        help="Save raw app and system logcat streams with timestamps into FILE (JSON lines)",
+    )
+    parser.add_argument(
+        "--logcat-replay",
+        type=Path,
+        metavar="FILE",
+        help="Replay recorded logcat FILE instead of running on device",
+    )
+    parser.add_argument(
+        "--logcat-replay-realtime",
+        action="store_true",
+        help="Replay with original timing (default: maximum speed)",
+    )
+
+
+def _add_sampler_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--sample-resources",
+        action="store_true",
+        help="Sample app CPU/memory and launch-to-first-frame time on device (CSV/JSON written to outputs dir)",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=_DEFAULT_SAMPLE_INTERVAL,
+        metavar="SECONDS",
+        help="Resource sampling interval (default: %(default)s)",
+    )
+
+
+def _add_profile_arguments(parser: argparse.ArgumentParser) -> None:
+    # --profile itself is an option of the universal runner (all platforms), droid CLI adds its own
+    parser.add_argument(
+        "--profile-lib",
+        type=Path,
+        action="append",
+        metavar="DIR",
+        help="Directory with unstripped .so for profile symbols (default: APK directory)",
+    )
+
+
+def _add_symbolize_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--symbols",
+        type=Path,
+        action="append",
+        metavar="DIR",
+        help="Directory with unstripped .so to symbolize native crash backtraces (default: APK directory)",
+    )
+    parser.add_argument(
+        "--no-symbolize",
+        action="store_true",
+        help="Don't symbolize native crash backtraces",
+    )
+
+
+def _add_capture_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--capture-log",
+        action="store_true",
+        help="Write complete logcat to gzip file in outputs dir, show only head/tail and warnings/errors in console",
+    )
+    parser.add_argument(
+        "--console-head",
+        type=int,
+        default=50,
+        metavar="N",
+        help="First lines shown in console with --capture-log (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--console-tail",
+        type=int,
+        default=100,
+        metavar="N",
+        help="Last lines shown in console with --capture-log (default: %(default)s)",
+    )
+
+
+def _add_device_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--device-output",
+        action="append",
+        metavar="PATH",
+        help="Device directory to retrieve into outputs dir after exit, relative to app data dir (run-as) or absolute, can be repeated",
+    )
+
+
+def _add_device_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--serial",
+        metavar="SERIAL",
+        default=os.environ.get("ANDROID_SERIAL") or None,
+        help="Run on this device only (default: ANDROID_SERIAL or any free connected device)",
+    )
+    parser.add_argument(
+        "--device-abi",
+        metavar="ABI",
+        help="Run on a device supporting this ABI only, e.g. arm64-v8a",
+    )
+    parser.add_argument(
+        "--device-min-api",
+        type=int,
+        metavar="N",
+        help="Run on a device with API level N or newer only",
+    )
+
+
+def _device_filter(parsed_args: argparse.Namespace) -> DeviceFilter:
+    return DeviceFilter(serial=parsed_args.serial, abi=parsed_args.device_abi, min_api=parsed_args.device_min_api)
+
+
+def _add_retry_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Relaunch the app up to N times on failure without reinstalling (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--retry-on",
+        choices=[c.value for c in RetryCondition],
+        action="append",
+        default=[],
+        help="Retry only on this failure kind (native crash signal or timeout), can be repeated (default: any failure)",
+    )
+
+
+def make_command(
+    apk_path: Path,
+    args: list[str],
+    launch_manifest: LaunchManifest | None = None,
+    profile: bool = False,
+    capture: LogCapture | None = None,
+    finder: Finder | None = None,
+    log_dedup: bool | None = None,
+) -> DroidCommand:
+    """Make command for universal runner, taking droid-specific options from args (others are passed to the app)."""
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)  # no prefix matches of app options
+    _add_logcat_arguments(parser)
+    _add_sampler_arguments(parser)
+    _add_profile_arguments(parser)
+    _add_symbolize_arguments(parser)
+    _add_device_output_arguments(parser)
+    _add_device_arguments(parser)
+    parsed_args, remain_args = parser.parse_known_intermixed_args(args)
+    log.debug(f"Droid: {parsed_args}, args for app: {remain_args}")
+
+    embedded = None
+    if launch_manifest and launch_manifest.embedded_mode == "push" and finder:
+        embedded = resolve_embedded(finder, launch_manifest.embedded)
+
+    return DroidCommand(
+        apk_path,
+        args=remain_args,
+        logcat_record=parsed_args.logcat_record,
+        logcat_replay=parsed_args.logcat_replay,
+        logcat_replay_realtime=parsed_args.logcat_replay_realtime,
+        package_name=launch_manifest.package_name if launch_manifest else None,
+        apk_hash=launch_manifest.content_hash if launch_manifest else None,
+        launcher_activity=launch_manifest.launcher_activity if launch_manifest else None,
+        sample_interval=parsed_args.sample_interval if parsed_args.sample_resources else None,
+        profile=profile,
+        profile_lib_dirs=parsed_args.profile_lib,
+        symbol_dirs=parsed_args.symbols,
+        symbolize=not parsed_args.no_symbolize,
+        capture=capture,
+        device_outputs=parsed_args.device_output,
+        embedded=embedded,
+        device_filter=_device_filter(parsed_args),
+        log_dedup=log_dedup,
+    )
 
 
 def main(args: list[str]) -> int:
     """Run APK on device (CLI entry point). Returns 0 on success, 1 on error."""
-    parser = argparse.ArgumentParser(description="Droid Runner - Run build on device and capture its native logs")
+    parser = argparse.ArgumentParser(description="Droid Runner - Run build on device and capture its native logs", allow_abbrev=False)
     parser.add_argument(
         "file",
         metavar="file [args ...]",
@@ -440,15 +942,64 @@ def main(args: list[str]) -> int:
         default=_DEFAULT_TIMEOUT,
         help=f"Timeout in seconds (default: {_DEFAULT_TIMEOUT})",
     )
+    parser.add_argument(
+        "--log-dedup",
+        dest="log_dedup",
+        action="store_true",
+        default=None,
+        help="Collapse repetitive logcat lines in console into periodic summaries"
+        " (default: with --capture-log, else in other tags than app output only)",
+    )
+    parser.add_argument(
+        "--no-log-dedup",
+        dest="log_dedup",
+        action="store_false",
+        help="Show repetitive logcat lines in console as is",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record native profile of the app with simpleperf from launch to exit (perf.data and reports written to outputs dir)",
+    )
+    _add_logcat_arguments(parser)
+    _add_sampler_arguments(parser)
+    _add_profile_arguments(parser)
+    _add_symbolize_arguments(parser)
+    _add_capture_arguments(parser)
+    _add_retry_arguments(parser)
+    _add_device_output_arguments(parser)
+    _add_device_arguments(parser)
     parsed_args, remain_args = parser.parse_known_intermixed_args(args)
     log.debug(f"Droid: {parsed_args}, args for app: {remain_args}")
 
-    return DroidCommand(
-        Path(parsed_args.file),
+    apk_path = Path(parsed_args.file)
+    capture = None
+    if parsed_args.capture_log:
+        capture = LogCapture(outputs_dir() / f"{apk_path.stem}.log.gz", parsed_args.console_head, parsed_args.console_tail, parsed_args.log_dedup is not False)
+    command = DroidCommand(
+        apk_path,
         args=remain_args,
         timeout=parsed_args.timeout,
-    ).scoped_execute()
+        logcat_record=parsed_args.logcat_record,
+        logcat_replay=parsed_args.logcat_replay,
+        logcat_replay_realtime=parsed_args.logcat_replay_realtime,
+        sample_interval=parsed_args.sample_interval if parsed_args.sample_resources else None,
+        profile=parsed_args.profile,
+        profile_lib_dirs=parsed_args.profile_lib,
+        symbol_dirs=parsed_args.symbols,
+        symbolize=not parsed_args.no_symbolize,
+        capture=capture,
+        device_outputs=parsed_args.device_output,
+        device_filter=_device_filter(parsed_args),
+        log_dedup=parsed_args.log_dedup,
+    )
+    command.retry = RetryPolicy(parsed_args.retries, {RetryCondition(c) for c in parsed_args.retry_on})
+    return command.scoped_execute()
 
 
 if __name__ == "__main__":
-    sys.exit(main(sys.argv[1:]) or 0)
+    # Run via package module to share types (LogSource, etc.) with lazily imported submodules (i.e. droid_replay)
+    from runner import droid
+    from runner.log import setup_logging
+    setup_logging(verbose=os.environ.get("RUNNER_VERBOSE") == "1")
+    sys.exit(droid.main(sys.argv[1:]) or 0)
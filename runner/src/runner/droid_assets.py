@@ -0,0 +1,135 @@
+"""Delta push of embedded data to device for DroidCommand (embedded mode "push", see rules/embedded.bzl).
+
+Instead of packing embedded files into APK assets (any data change rebuilds and reinstalls APK),
+they are kept in the app external files directory, where the glue (Droid::Glue::FindPushedEmbeddedFile) looks first:
+
+    /sdcard/Android/data/<package>/files/embedded/data/fonts/Roboto.ttf
+    /sdcard/Android/data/<package>/files/embedded/.manifest.sha256     # "<sha256>  <path>" lines of pushed files
+
+The device manifest is compared with hashes of local files, so only changed files are sent
+(in a single tar stream unpacked by device `tar`) and files removed from the layout are deleted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import shlex
+import subprocess
+import tarfile
+import time
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".manifest.sha256"
+
+
+@dataclass
+class PushedData:
+    """Summary of embedded data sync."""
+
+    files: int = 0
+    bytes: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"embedded data pushed {self.files} files {self.bytes / 1024:.1f}KB"
+            f" ({self.unchanged} unchanged, {self.removed} removed) in {self.seconds:.1f}s"
+        )
+
+
+def device_dir(package_name: str) -> str:
+    """Device directory of pushed embedded data (external files dir of the app, writable by adb shell)."""
+    return f"/sdcard/Android/data/{package_name}/files/embedded"
+
+
+@cache
+def _sha256(path: Path, stat_key: tuple[int, int]) -> str:
+    """Content hash of local file, cached per file version (stat_key: size, mtime) for reruns."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _local_manifest(files: list[tuple[str, Path]]) -> dict[str, str]:
+    hashes = {}
+    for path, source in files:
+        st = source.stat()
+        hashes[path] = _sha256(source, (st.st_size, st.st_mtime_ns))
+    return hashes
+
+
+def _parse_manifest(text: str) -> dict[str, str]:
+    hashes = {}
+    for line in text.splitlines():
+        digest, sep, path = line.partition("  ")
+        if sep and path:
+            hashes[path] = digest
+    return hashes
+
+
+def _format_manifest(hashes: dict[str, str]) -> bytes:
+    return "".join(f"{digest}  {path}\n" for path, digest in sorted(hashes.items())).encode()
+
+
+def _read_device_manifest(adb_cmd: list[str], directory: str) -> dict[str, str]:
+    cmd = adb_cmd + ["exec-out", f"cat {shlex.quote(f'{directory}/{MANIFEST_NAME}')} 2>/dev/null"]
+    log.debug(f"[run] {shlex.join(cmd)}")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    # Missing manifest (first push or cleared app data): everything is pushed
+    return _parse_manifest(result.stdout) if result.returncode == 0 else {}
+
+
+def _push_tar(adb_cmd: list[str], directory: str, sources: dict[str, Path], manifest: bytes) -> None:
+    """Stream changed files and the new manifest (last: written only when files are complete) as tar into directory."""
+    quoted = shlex.quote(directory)
+    cmd = adb_cmd + ["shell", f"mkdir -p {quoted} && tar -xf - -C {quoted}"]
+    log.debug(f"[run] {shlex.join(cmd)}")
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+        assert proc.stdin
+        try:
+            with tarfile.open(fileobj=proc.stdin, mode="w|") as tar:
+                for path, source in sorted(sources.items()):
+                    tar.add(source, arcname=path)
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = len(manifest)
+                info.mtime = int(time.time())
+                tar.addfile(info, io.BytesIO(manifest))
+        finally:
+            proc.stdin.close()
+        stderr = proc.stderr.read() if proc.stderr else b""
+    if proc.returncode != 0:
+        raise RuntimeError(f"Embedded data push failed: {proc.returncode}: {stderr.decode(errors='replace').strip()[-500:]}")
+
+
+def push_embedded(adb_cmd: list[str], package_name: str, files: list[tuple[str, Path]]) -> PushedData:
+    """Sync embedded files (path in app, local file) into device directory of the app, sending only changed ones."""
+    result = PushedData()
+    started = time.monotonic()
+    directory = device_dir(package_name)
+    local = _local_manifest(files)
+    device = _read_device_manifest(adb_cmd, directory)
+
+    removed = sorted(set(device) - set(local))
+    if removed:
+        cmd = adb_cmd + ["shell", "cd " + shlex.quote(directory) + " && rm -f " + shlex.join(removed)]
+        log.debug(f"[run] {shlex.join(cmd)}")
+        subprocess.run(cmd, check=True, capture_output=True)
+        result.removed = len(removed)
+
+    changed = {path: source for path, source in files if device.get(path) != local[path]}
+    result.unchanged = len(local) - len(changed)
+    if changed or removed:
+        for path, source in changed.items():
+            log.debug(f"embedded push: {path} ({source.stat().st_size} bytes)")
+            result.files += 1
+            result.bytes += source.stat().st_size
+        _push_tar(adb_cmd, directory, changed, _format_manifest(local))
+    result.seconds = time.monotonic() - started
+    return result
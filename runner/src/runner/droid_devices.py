@@ -0,0 +1,153 @@
+"""Device lease pool for parallel DroidCommand runs (bazel test --jobs=N over several attached devices).
+
+Connected devices (`adb devices`, state "device") matching optional filters are leased exclusively per run
+via lock files shared by all runner processes (next to the governor slots):
+
+    /tmp/tx-runner-<uid>/slots/devices/<serial>.lock     # "<pid> <package>" of the holder, for humans
+
+The lease is an flock: it's released by the kernel when the holder exits in any way (crash, kill -9, timeout of Bazel),
+so stale leases are recovered by construction, without pid checks racing with pid reuse.
+Runs wait while all matching devices are busy; every adb call of the run then gets `-s <serial>`.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import subprocess
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+
+from .governor import fcntl, slots_dir
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+_POLL_SECONDS = 0.5
+_SERIAL_UNSAFE_RE = re.compile(r"[^A-Za-z0-9._-]")
+
+
+@dataclass(frozen=True)
+class DeviceInfo:
+    """Connected device with properties used by filters."""
+
+    serial: str
+    abis: tuple[str, ...]
+    api: int
+
+    def __str__(self) -> str:
+        return f"{self.serial} ({'/'.join(self.abis) or '?'}, API {self.api or '?'})"
+
+
+@dataclass
+class DeviceFilter:
+    """Requirements of the run to the device (None: any)."""
+
+    serial: str | None = None  # --serial or ANDROID_SERIAL
+    abi: str | None = None
+    min_api: int | None = None
+
+    def matches(self, device: DeviceInfo) -> bool:
+        if self.serial and device.serial != self.serial:
+            return False
+        if self.abi and self.abi not in device.abis:
+            return False
+        if self.min_api and device.api < self.min_api:
+            return False
+        return True
+
+    def __str__(self) -> str:
+        parts = [f"serial {self.serial}" if self.serial else "", f"ABI {self.abi}" if self.abi else "", f"API >= {self.min_api}" if self.min_api else ""]
+        return ", ".join(p for p in parts if p) or "any"
+
+
+def list_serials(adb: str) -> list[str]:
+    """Serials of devices ready for commands (unauthorized/offline ones are skipped)."""
+    result = subprocess.run([adb, "devices"], check=True, capture_output=True, text=True)
+    serials = []
+    for line in result.stdout.splitlines()[1:]:
+        serial, _, state = line.partition("\t")
+        if serial and state.strip() == "device":
+            serials.append(serial)
+    return serials
+
+
+@cache
+def device_info(adb: str, serial: str) -> DeviceInfo:
+    """ABIs and API level of the device (cached per process: they don't change while connected)."""
+    result = subprocess.run(
+        [adb, "-s", serial, "shell", "getprop ro.product.cpu.abilist; getprop ro.build.version.sdk"],
+        capture_output=True,
+        text=True,
+    )
+    lines = result.stdout.splitlines() + ["", ""]
+    abis = tuple(abi for abi in lines[0].strip().split(",") if abi)
+    api = int(lines[1].strip()) if lines[1].strip().isdigit() else 0
+    return DeviceInfo(serial, abis, api)
+
+
+class DeviceLease:
+    """Exclusive use of a device by this run until release()."""
+
+    def __init__(self, device: DeviceInfo, fd: int | None, waited: float):
+        self.device = device
+        self.serial = device.serial
+        self.waited = waited
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def note(self) -> str:
+        waited = f" after {self.waited:.1f}s wait" if self.waited >= 0.05 else ""
+        return f"device {self.device}{waited}"
+
+
+def _try_lock(serial: str, holder: str) -> int | None:
+    directory = slots_dir() / "devices"
+    directory.mkdir(parents=True, exist_ok=True)
+    fd = os.open(directory / f"{_SERIAL_UNSAFE_RE.sub('_', serial)}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        assert fcntl is not None
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    os.ftruncate(fd, 0)
+    os.write(fd, f"{os.getpid()} {holder}\n".encode())
+    return fd
+
+
+def lease_device(adb: str, device_filter: DeviceFilter, holder: str, cancelled: Callable[[], bool] = lambda: False) -> DeviceLease | None:
+    """Lease a free matching device, waiting while all matching ones are busy.
+
+    Raises when no connected device matches, returns None when cancelled while waiting.
+    """
+    started = time.monotonic()
+    announced = False
+    while not cancelled():
+        matching = [info for info in (device_info(adb, serial) for serial in list_serials(adb)) if device_filter.matches(info)]
+        if not matching:
+            raise RuntimeError(f"No connected device matches ({device_filter}), see `adb devices`")
+        if fcntl is None:
+            # No file locks (Windows): first matching device, not exclusive
+            return DeviceLease(matching[0], None, 0.0)
+
+        # Start from a different device per process to spread lock attempts
+        first = os.getpid() % len(matching)
+        for info in matching[first:] + matching[:first]:
+            fd = _try_lock(info.serial, holder)
+            if fd is not None:
+                lease = DeviceLease(info, fd, time.monotonic() - started if announced else 0.0)
+                log.debug(f"device lease: {info} after {lease.waited:.2f}s")
+                return lease
+        if not announced:
+            log.info(f"{Fore.YELLOW}⏳ Waiting for device (all {len(matching)} matching '{device_filter}' are busy){Style.RESET_ALL}")
+            announced = True
+        time.sleep(_POLL_SECONDS)
+    return None
@@ -0,0 +1,84 @@
+"""Retrieval of device-side test outputs (XML reports, traces, screenshots) for DroidCommand (--device-output).
+
+Declared device directories are packed by device `tar` and streamed back through a single `adb exec-out` pipe,
+members are unpacked one by one while reading (no archive in memory or on disk) into <outputs dir>/device:
+
+    --device-output files/results                   # relative: app data directory (via run-as, debuggable apps)
+    --device-output /sdcard/Android/data/<pkg>/files/shots   # absolute: device path readable by shell
+"""
+
+from __future__ import annotations
+
+import logging
+import shlex
+import subprocess
+import tarfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class PulledOutputs:
+    """Summary of unpacked device outputs."""
+
+    dest: Path
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return f"device outputs {self.files} files {self.bytes / 1024 / 1024:.1f}MB in {self.seconds:.1f}s -> {self.dest}"
+
+
+def _tar_command(package_name: str, paths: list[str]) -> str:
+    """Device shell command writing tar of paths to stdout (errors, i.e. missing paths, don't corrupt the stream)."""
+    app_paths = [p for p in paths if not p.startswith("/")]
+    device_paths = [p.lstrip("/") for p in paths if p.startswith("/")]
+    commands = []
+    if app_paths:
+        # run-as starts in the app data directory, so relative paths are resolved against it
+        commands.append(f"run-as {shlex.quote(package_name)} tar -cf - {shlex.join(app_paths)} 2>/dev/null")
+    if device_paths:
+        commands.append(f"tar -cf - -C / {shlex.join(device_paths)} 2>/dev/null")
+    # Concatenated archives are read as one with ignore_zeros
+    return "; ".join(commands)
+
+
+def pull_device_outputs(adb_cmd: list[str], package_name: str, paths: list[str], dest: Path) -> PulledOutputs:
+    """Stream device paths as tar and unpack them into dest incrementally."""
+    result = PulledOutputs(dest)
+    started = time.monotonic()
+    dest.mkdir(parents=True, exist_ok=True)
+    cmd = adb_cmd + ["exec-out", _tar_command(package_name, paths)]
+    log.debug(f"[run] {shlex.join(cmd)}")
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
+        assert proc.stdout
+        try:
+            # "r|": sequential stream, members are extracted as they arrive
+            with tarfile.open(fileobj=proc.stdout, mode="r|", ignore_zeros=True) as tar:
+                for member in tar:
+                    if hasattr(tarfile, "data_filter"):
+                        tar.extract(member, dest, filter="data")
+                    else:
+                        tar.extract(member, dest)
+                    if member.isfile():
+                        result.files += 1
+                        result.bytes += member.size
+                        log.debug(f"device output: {member.name} ({member.size} bytes)")
+        except tarfile.ReadError as e:
+            if result.files:
+                log.warning(f"⚠️ Device outputs are incomplete: {e}")  # stream cut after some members
+            else:
+                # Empty stream: none of the paths exist (or app is not debuggable for run-as)
+                log.debug(f"device outputs: {e}")
+        except tarfile.TarError as e:
+            log.warning(f"⚠️ Device outputs are incomplete: {e}")
+            proc.kill()
+        _, stderr = proc.communicate()
+    if proc.returncode != 0:
+        log.warning(f"⚠️ adb exec-out failed: {proc.returncode}: {stderr.decode(errors='replace').strip()[-500:]}")
+    result.seconds = time.monotonic() - started
+    return result
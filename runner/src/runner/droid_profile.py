@@ -0,0 +1,200 @@
+"""Native profiling of the app via simpleperf for DroidCommand (--profile).
+
+simpleperf binary for device ABI is pushed from NDK once and cached on device (re-pushed when its hash changes),
+falling back to /system/bin/simpleperf of the device when NDK is not available.
+Recording waits for the app process (--app) so it covers the whole run from launch to the detected exit,
+then perf.data is pulled into outputs dir and, with NDK, reported with symbols of unstripped .so from build outputs:
+
+    <apk>.perf.data         # raw recording (i.e. for Android Studio / report_html.py)
+    <apk>.perf.report.txt   # report by dso/symbol with call graph
+    <apk>.perf.script.txt   # perf-script-like samples for flamegraph tools (stackcollapse-perf.pl, inferno)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+from .toolchain import tool_path
+
+log = logging.getLogger(__name__)
+
+_DEVICE_DIR = "/data/local/tmp"
+_DEVICE_SIMPLEPERF = f"{_DEVICE_DIR}/simpleperf"
+_DEVICE_SIMPLEPERF_STAMP = f"{_DEVICE_DIR}/simpleperf.sha256"
+_SYSTEM_SIMPLEPERF = "/system/bin/simpleperf"
+_DEVICE_PERF_DATA = f"{_DEVICE_DIR}/tx_perf.data"
+_STOP_TIMEOUT = 30.0
+_ABI_TO_ARCH = {
+    "arm64-v8a": "arm64",
+    "armeabi-v7a": "arm",
+    "x86_64": "x86_64",
+    "x86": "x86",
+}
+
+
+def get_ndk_dir() -> Path | None:
+    """NDK from ANDROID_NDK_HOME or the latest of ANDROID_HOME/ndk/* (None if not installed)."""
+    try:
+        return Path(tool_path("ndk"))
+    except OSError as e:
+        log.debug(f"profile: {e}")
+        return None
+
+
+def _get_host_simpleperf(scripts_dir: Path) -> Path | None:
+    """Host simpleperf binary shipped with NDK (simpleperf/bin/<os>/x86_64/simpleperf)."""
+    host_os = {"darwin": "darwin", "win32": "windows"}.get(sys.platform, "linux")
+    path = scripts_dir / "bin" / host_os / "x86_64" / ("simpleperf.exe" if host_os == "windows" else "simpleperf")
+    return path if path.is_file() else None
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class SimpleperfProfiler:
+    """Records the app process with simpleperf on device and collects the results."""
+
+    def __init__(self, adb_cmd: list[str], package_name: str, output_base: Path, lib_dirs: list[Path]):
+        self.adb_cmd = adb_cmd
+        self.package_name = package_name
+        self.perf_data = output_base.with_name(output_base.name + ".perf.data")
+        self.report_txt = output_base.with_name(output_base.name + ".perf.report.txt")
+        self.script_txt = output_base.with_name(output_base.name + ".perf.script.txt")
+        self.lib_dirs = lib_dirs
+        self._record: asyncio.subprocess.Process | None = None
+        self._record_pid: str | None = None
+
+    def _adb(self, *args: str, check: bool = True) -> subprocess.CompletedProcess[str]:
+        cmd = self.adb_cmd + list(args)
+        log.debug(f"[run] {shlex.join(cmd)}")
+        return subprocess.run(cmd, check=check, capture_output=True, text=True)
+
+    def _prepare_simpleperf(self) -> str:
+        """Device path of simpleperf: NDK binary pushed once (cached by hash), else system one."""
+        ndk_dir = get_ndk_dir()
+        abi = self._adb("shell", "getprop", "ro.product.cpu.abi").stdout.strip()
+        arch = _ABI_TO_ARCH.get(abi)
+        local = ndk_dir / "simpleperf" / "bin" / "android" / arch / "simpleperf" if ndk_dir and arch else None
+        if not local or not local.is_file():
+            log.debug(f"simpleperf: NDK binary not found (abi {abi!r}), using {_SYSTEM_SIMPLEPERF}")
+            return _SYSTEM_SIMPLEPERF
+
+        local_hash = _file_sha256(local)
+        device_hash = self._adb("shell", f"cat {_DEVICE_SIMPLEPERF_STAMP} 2>/dev/null", check=False).stdout.strip()
+        if device_hash == local_hash:
+            log.debug(f"simpleperf: cached on device {_DEVICE_SIMPLEPERF} ({local_hash[:12]})")
+            return _DEVICE_SIMPLEPERF
+
+        log.debug(f"simpleperf: push {local} ({local_hash[:12]}, device: {device_hash[:12] or 'none'})")
+        self._adb("push", str(local), _DEVICE_SIMPLEPERF)
+        self._adb("shell", f"chmod a+x {_DEVICE_SIMPLEPERF} && echo {local_hash} > {_DEVICE_SIMPLEPERF_STAMP}")
+        return _DEVICE_SIMPLEPERF
+
+    async def start(self) -> None:
+        """Start recording before app launch: simpleperf waits for the app process."""
+        simpleperf = await asyncio.to_thread(self._prepare_simpleperf)
+        # The shell prints its pid and execs simpleperf in place, so stop() signals only this recording
+        cmd = self.adb_cmd + [
+            "shell",
+            f"cd {_DEVICE_DIR} && echo $$ && exec {simpleperf} record --app {shlex.quote(self.package_name)} -g"
+            f" -o {_DEVICE_PERF_DATA}",
+        ]
+        log.debug(f"[run] {shlex.join(cmd)}")
+        self._record = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        assert self._record.stdout
+        try:
+            line = await asyncio.wait_for(self._record.stdout.readline(), timeout=_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            line = b""
+        pid = line.decode("utf-8", errors="replace").strip()
+        self._record_pid = pid if pid.isdigit() else None
+        if pid and not self._record_pid:
+            log.debug(f"[simpleperf] {pid}")
+
+    async def stop(self) -> bool:
+        """Stop recording (if the app didn't exit on its own) and pull perf.data. Returns whether it's pulled."""
+        if not self._record:
+            return False
+        if self._record.returncode is None:
+            if self._record_pid:
+                # SIGINT makes simpleperf finish writing perf.data (same as app_profiler.py does)
+                await asyncio.to_thread(self._adb, "shell", f"kill -INT {self._record_pid}", check=False)
+            else:
+                log.warning("⚠️ simpleperf pid is unknown, stopping the adb session")
+                self._record.terminate()
+        try:
+            output, _ = await asyncio.wait_for(self._record.communicate(), timeout=_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning(f"⚠️ simpleperf did not stop in {_STOP_TIMEOUT}s")
+            self._record.kill()
+            await self._record.wait()
+            return False
+        for line in output.decode("utf-8", errors="replace").splitlines():
+            log.debug(f"[simpleperf] {line}")
+        if self._record.returncode != 0:
+            log.warning(f"⚠️ simpleperf record failed: {self._record.returncode} (app is not debuggable/profileable?)")
+            return False
+
+        await asyncio.to_thread(self._adb, "pull", _DEVICE_PERF_DATA, str(self.perf_data))
+        await asyncio.to_thread(self._adb, "shell", f"rm -f {_DEVICE_PERF_DATA}", check=False)
+        log.debug(f"profile: {self.perf_data}")
+        return True
+
+    def report(self) -> list[Path]:
+        """Report perf.data with NDK scripts using unstripped libraries, return written reports."""
+        ndk_dir = get_ndk_dir()
+        scripts_dir = ndk_dir / "simpleperf" if ndk_dir else None
+        if not scripts_dir or not (scripts_dir / "report_sample.py").is_file():
+            log.debug("profile: NDK simpleperf scripts not found, report skipped")
+            return []
+
+        # Binary cache with symbols: unstripped .so from build outputs matched by build id
+        binary_cache = self.perf_data.with_name(self.perf_data.name + ".binary_cache")
+        lib_args = ["-lib", *(str(lib_dir) for lib_dir in self.lib_dirs)] if self.lib_dirs else []
+        self._run_script(scripts_dir / "binary_cache_builder.py", ["-i", str(self.perf_data), *lib_args], output=None,
+                         cwd=binary_cache.parent)
+        # binary_cache_builder.py writes "binary_cache" into CWD
+        produced = binary_cache.parent / "binary_cache"
+        if produced.is_dir():
+            shutil.rmtree(binary_cache, ignore_errors=True)
+            produced.replace(binary_cache)
+        symfs = ["--symfs", str(binary_cache)] if binary_cache.is_dir() else []
+
+        reports = []
+        host_simpleperf = _get_host_simpleperf(scripts_dir)
+        if host_simpleperf:
+            report_cmd = [str(host_simpleperf), "report", "-i", str(self.perf_data), "-g", "--sort", "dso,symbol", *symfs,
+                          "-o", str(self.report_txt)]
+            if self._run("simpleperf report", report_cmd, output=None):
+                reports.append(self.report_txt)
+        if self._run_script(scripts_dir / "report_sample.py", ["-i", str(self.perf_data), *symfs], output=self.script_txt):
+            reports.append(self.script_txt)
+        return reports
+
+    @staticmethod
+    def _run(name: str, cmd: list[str], output: Path | None, cwd: Path | None = None) -> bool:
+        log.debug(f"[run] {shlex.join(cmd)}")
+        with open(output, "w") if output else open(os.devnull, "w") as stdout:
+            result = subprocess.run(cmd, cwd=cwd, stdout=stdout, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            log.warning(f"⚠️ {name} failed: {result.returncode}: {result.stderr.strip()[-500:]}")
+            return False
+        return True
+
+    @staticmethod
+    def _run_script(script: Path, args: list[str], output: Path | None, cwd: Path | None = None) -> bool:
+        return SimpleperfProfiler._run(script.name, [sys.executable, str(script), *args], output, cwd)
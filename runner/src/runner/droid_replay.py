@@ -0,0 +1,160 @@
+"""Logcat record/replay for DroidCommand.
+
+Recording saves raw app and system logcat lines with timestamps (relative to the start of the run)
+as JSON lines, preceded by a header with the app identity:
+
+    {"version": 1, "package": "com.tx", "component": "com.tx/tx.DroidActivity", "uid": "10153"}
+    {"t": 0.012345, "s": "sys", "l": "03-01 18:52:29.862054  1000   586   623 I ActivityManager: Start proc ..."}
+    {"t": 0.104512, "s": "app", "l": "03-01 18:52:29.954321 10153 19859 19859 I stdout  : hello"}
+
+Replay feeds recorded lines into the same exit-detection and output code of DroidCommand
+at original speed (realtime) or at maximum speed, without a device.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TextIO
+
+from .droid import LogcatBackend, LogSource
+
+log = logging.getLogger(__name__)
+
+_RECORDING_VERSION = 1
+_REPLAY_QUEUE_SIZE = 1024
+_REPLAY_BATCH_LINES = 256  # yield to event loop between batches at maximum speed (as chunked pipe reads do)
+
+
+@dataclass
+class RecordingHeader:
+    """Identity of the recorded app."""
+
+    package: str
+    component: str
+    uid: str
+
+
+@dataclass
+class RecordedLine:
+    """Raw logcat line with its offset from the start of the recording."""
+
+    time: float
+    source: LogSource
+    line: str
+
+
+class LogcatRecorder:
+    """Writes raw logcat lines with timestamps into a recording file."""
+
+    def __init__(self, path: Path, header: RecordingHeader):
+        self.path = path
+        self._file: TextIO = open(path, "w", encoding="utf-8")
+        self._start = time.monotonic()
+        self._write({"version": _RECORDING_VERSION} | vars(header))
+        log.debug(f"recording logcat: {path}")
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+
+    def write(self, source: LogSource, line: str) -> None:
+        self._write({"t": round(time.monotonic() - self._start, 6), "s": source.value, "l": line})
+
+    def close(self) -> None:
+        self._file.close()
+        log.debug(f"recorded logcat: {self.path}")
+
+
+def read_header(path: Path) -> RecordingHeader:
+    with open(path, "r", encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    version = record.get("version")
+    if version != _RECORDING_VERSION:
+        raise ValueError(f"Unsupported logcat recording version {version}: {path}")
+    return RecordingHeader(package=record["package"], component=record["component"], uid=record["uid"])
+
+
+def read_lines(path: Path) -> Iterator[RecordedLine]:
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()  # header
+        for text in f:
+            record = json.loads(text)
+            yield RecordedLine(record["t"], LogSource(record["s"]), record["l"])
+
+
+def write_recording(path: Path, header: RecordingHeader, lines: Iterator[RecordedLine]) -> None:
+    """Write recording from prepared lines (i.e. synthetic logs for benchmarks)."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": _RECORDING_VERSION} | vars(header)))
+        f.write("\n")
+        for item in lines:
+            f.write(json.dumps({"t": item.time, "s": item.source.value, "l": item.line}, ensure_ascii=False))
+            f.write("\n")
+
+
+class ReplayLogcatBackend(LogcatBackend):
+    """Feeds recorded lines instead of device logcat; the app "launch" starts playback."""
+
+    name = "replay"
+
+    def __init__(self, path: Path, realtime: bool = False):
+        self.path = path
+        self.realtime = realtime
+        self.fed_lines = 0
+        self.started_at: float | None = None
+        self._queues: dict[LogSource, asyncio.Queue[bytes | None]] = {}
+        self._feed_task: asyncio.Task | None = None
+
+    async def open(self) -> dict[LogSource, AsyncIterator[bytes]]:
+        self._queues = {source: asyncio.Queue(_REPLAY_QUEUE_SIZE) for source in LogSource}
+        return {source: self._read(queue) for source, queue in self._queues.items()}
+
+    async def launch(self) -> None:
+        log.debug(f"replay logcat ({'realtime' if self.realtime else 'max speed'}): {self.path}")
+        self._feed_task = asyncio.create_task(self._feed())
+
+    async def close(self) -> None:
+        if self._feed_task:
+            self._feed_task.cancel()
+            try:
+                await self._feed_task
+            except asyncio.CancelledError:
+                pass
+
+    @staticmethod
+    async def _read(queue: asyncio.Queue[bytes | None]) -> AsyncIterator[bytes]:
+        while True:
+            line = await queue.get()
+            if line is None:
+                break
+            yield line
+
+    async def _feed(self) -> None:
+        self.started_at = start = time.monotonic()
+        try:
+            for item in read_lines(self.path):
+                if self.realtime:
+                    delay = start + item.time - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                elif self.fed_lines % _REPLAY_BATCH_LINES == 0:
+                    await asyncio.sleep(0)
+                await self._queues[item.source].put(item.line.encode("utf-8") + b"\n")
+                self.fed_lines += 1
+        except asyncio.CancelledError:
+            # Run is over and streams are not read anymore: end them without blocking on full queues
+            for queue in self._queues.values():
+                if not queue.full():
+                    queue.put_nowait(None)
+            raise
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"⚠️ replay stopped: {self.path}: {e!r}")
+        # End of streams (as logcat processes exit): readers get it after all lines, however full the queues are
+        for queue in self._queues.values():
+            await queue.put(None)
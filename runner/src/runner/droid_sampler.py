@@ -0,0 +1,237 @@
+"""Time-series resource sampling of the app process on device for DroidCommand.
+
+Once app PID is known, CPU usage, RSS (/proc/<pid>/stat, statm) and PSS (/proc/<pid>/smaps_rollup via run-as,
+only for debuggable apps) are sampled periodically through a single persistent `adb shell` (no process per sample).
+Results are written as CSV and JSON:
+
+    t,cpu_percent,rss_kb,pss_kb,threads
+    0.501,87.9,81234,60312,23
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import json
+import logging
+import re
+import shlex
+import statistics
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.5
+_END_MARKER = "__TX_SAMPLE_END__"
+_SHELL_TIMEOUT = 5.0
+_DEFAULT_PAGE_SIZE = 4096
+_DEFAULT_CLK_TCK = 100
+_PSS_RE = re.compile(r"^Pss:\s+(\d+)\s+kB", re.MULTILINE)
+_AM_START_TOTAL_TIME_RE = re.compile(r"^TotalTime:\s+(\d+)", re.MULTILINE)
+_AM_START_LAUNCH_STATE_RE = re.compile(r"^LaunchState:\s+(\w+)", re.MULTILINE)
+
+
+@dataclass
+class ResourceSample:
+    """Resource usage of the app process at the moment (t is seconds from sampling start)."""
+
+    t: float
+    cpu_percent: float | None
+    rss_kb: int
+    pss_kb: int | None
+    threads: int
+
+
+@dataclass
+class ResourceSummary:
+    """Aggregated samples with launch-to-first-frame time."""
+
+    samples: int = 0
+    cpu_avg_percent: float | None = None
+    cpu_max_percent: float | None = None
+    rss_max_kb: int | None = None
+    pss_max_kb: int | None = None
+    first_frame_ms: int | None = None
+
+    def __str__(self) -> str:
+        parts = []
+        if self.first_frame_ms is not None:
+            parts.append(f"first frame {self.first_frame_ms}ms")
+        if self.cpu_avg_percent is not None and self.cpu_max_percent is not None:
+            parts.append(f"cpu avg {self.cpu_avg_percent:.1f}% max {self.cpu_max_percent:.1f}%")
+        if self.rss_max_kb is not None:
+            parts.append(f"rss max {self.rss_max_kb / 1024:.1f}MB")
+        if self.pss_max_kb is not None:
+            parts.append(f"pss max {self.pss_max_kb / 1024:.1f}MB")
+        parts.append(f"{self.samples} samples")
+        return ", ".join(parts)
+
+
+def parse_am_start_total_time(output: str) -> int | None:
+    """Launch-to-first-frame time (ms) from `am start -W` output."""
+    mo = _AM_START_TOTAL_TIME_RE.search(output)
+    return int(mo.group(1)) if mo else None
+
+
+def parse_am_start_launch_state(output: str) -> str | None:
+    """COLD, WARM or HOT start from `am start -W` output (API 29+)."""
+    mo = _AM_START_LAUNCH_STATE_RE.search(output)
+    return mo.group(1) if mo else None
+
+
+def _parse_stat(stat: str) -> tuple[int, int]:
+    """CPU ticks (utime + stime) and threads count from /proc/<pid>/stat."""
+    # comm (2nd field) may contain spaces, so split after its closing parenthesis
+    fields = stat[stat.rindex(")") + 2:].split()
+    # fields[0] is state (3rd field in proc(5)): utime=14, stime=15, num_threads=20
+    return int(fields[11]) + int(fields[12]), int(fields[17])
+
+
+class ResourceSampler:
+    """Samples app process resources through a persistent adb shell until stopped."""
+
+    def __init__(
+        self,
+        adb_cmd: list[str],
+        package_name: str,
+        get_pid: Callable[[], int | None],
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.adb_cmd = adb_cmd
+        self.package_name = package_name
+        self.get_pid = get_pid
+        self.interval = interval
+        self.samples: list[ResourceSample] = []
+        self.first_frame_ms: int | None = None
+        self._shell: asyncio.subprocess.Process | None = None
+        self._task: asyncio.Task | None = None
+        self._page_size = _DEFAULT_PAGE_SIZE
+        self._clk_tck = _DEFAULT_CLK_TCK
+        self._pss_enabled = True
+
+    async def start(self) -> None:
+        cmd = self.adb_cmd + ["shell", "-T"]  # no PTY: commands are read from stdin, output is not mangled
+        log.debug(f"[run] {shlex.join(cmd)} # sampler shell")
+        self._shell = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        config = await self._query("getconf PAGESIZE; getconf CLK_TCK")
+        values = config.split()
+        if len(values) == 2 and all(value.isdigit() for value in values):
+            self._page_size, self._clk_tck = int(values[0]), int(values[1])
+        log.debug(f"sampler: page size {self._page_size}, clock ticks {self._clk_tck}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._shell and self._shell.returncode is None:
+            assert self._shell.stdin
+            try:
+                self._shell.stdin.write(b"exit\n")
+                self._shell.stdin.close()
+                await asyncio.wait_for(self._shell.wait(), timeout=_SHELL_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                self._shell.kill()
+                await self._shell.wait()
+
+    async def _query(self, command: str) -> str:
+        """Run command in the persistent shell, return its output (until end marker)."""
+        assert self._shell and self._shell.stdin and self._shell.stdout
+        self._shell.stdin.write(f"{command}; echo {_END_MARKER}\n".encode())
+        await self._shell.stdin.drain()
+        lines = []
+        while True:
+            line = await asyncio.wait_for(self._shell.stdout.readline(), timeout=_SHELL_TIMEOUT)
+            if not line:
+                raise EOFError("sampler shell exited")
+            text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            if text == _END_MARKER:
+                return "\n".join(lines)
+            lines.append(text)
+
+    async def _run(self) -> None:
+        pid = None
+        while pid is None:
+            pid = self.get_pid()
+            if pid is None:
+                await asyncio.sleep(self.interval)
+        log.debug(f"sampler: PID {pid}, interval {self.interval}s")
+
+        stat_cmd = f"cat /proc/{pid}/stat /proc/{pid}/statm 2>/dev/null"
+        pss_cmd = f"run-as {shlex.quote(self.package_name)} cat /proc/{pid}/smaps_rollup 2>/dev/null"
+        started = time.monotonic()
+        prev_ticks: int | None = None
+        prev_time = started
+        try:
+            while True:
+                output = await self._query(stat_cmd)
+                now = time.monotonic()
+                lines = output.splitlines()
+                if len(lines) < 2:
+                    log.debug(f"sampler: process {pid} is gone")
+                    break
+
+                ticks, threads = _parse_stat(lines[0])
+                rss_kb = int(lines[1].split()[1]) * self._page_size // 1024
+                cpu_percent = None
+                if prev_ticks is not None and now > prev_time:
+                    cpu_percent = round((ticks - prev_ticks) / self._clk_tck / (now - prev_time) * 100, 1)
+                prev_ticks, prev_time = ticks, now
+
+                pss_kb = None
+                if self._pss_enabled:
+                    mo = _PSS_RE.search(await self._query(pss_cmd))
+                    if mo:
+                        pss_kb = int(mo.group(1))
+                    else:
+                        log.debug("sampler: PSS is not available (app is not debuggable?)")
+                        self._pss_enabled = False
+
+                self.samples.append(ResourceSample(round(now - started, 3), cpu_percent, rss_kb, pss_kb, threads))
+                await asyncio.sleep(self.interval)
+        except (EOFError, asyncio.TimeoutError, ValueError, IndexError) as e:
+            log.debug(f"sampler: stopped: {e!r}")
+
+    def summary(self) -> ResourceSummary:
+        summary = ResourceSummary(samples=len(self.samples), first_frame_ms=self.first_frame_ms)
+        cpu = [s.cpu_percent for s in self.samples if s.cpu_percent is not None]
+        if cpu:
+            summary.cpu_avg_percent = round(statistics.fmean(cpu), 1)
+            summary.cpu_max_percent = max(cpu)
+        if self.samples:
+            summary.rss_max_kb = max(s.rss_kb for s in self.samples)
+        pss = [s.pss_kb for s in self.samples if s.pss_kb is not None]
+        if pss:
+            summary.pss_max_kb = max(pss)
+        return summary
+
+    def write(self, base_path: Path) -> tuple[Path, Path]:
+        """Write samples as <base>.csv and <base>.json (with summary), return written paths."""
+        csv_path = base_path.with_name(base_path.name + ".csv")
+        json_path = base_path.with_name(base_path.name + ".json")
+        fields = list(ResourceSample.__dataclass_fields__)
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for sample in self.samples:
+                writer.writerow(asdict(sample))
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "package": self.package_name,
+                "interval": self.interval,
+                "summary": asdict(self.summary()),
+                "samples": [asdict(sample) for sample in self.samples],
+            }, f, indent=2)
+            f.write("\n")
+        return csv_path, json_path
@@ -0,0 +1,163 @@
+"""Host-wide concurrency governor of heavy runs (node, browser via emrun, adb devices).
+
+Parallel Bazel tests are separate runner processes, so slots are token files in a directory shared by all of them:
+a run holds an exclusive lock (flock, released by the kernel when the process dies, so nothing goes stale)
+on one of N slot files of its class for the whole launch/monitor phase and waits (polling) while all are busy:
+
+    /tmp/tx-runner-<uid>/slots/wasm/0.lock ... wasm/<N-1>.lock
+
+Limits per class come from defaults, TX_RUNNER_SLOTS env var and --slots ("wasm=4,emrun=1,droid=2", 0: unlimited).
+With --min-free-mem (TX_RUNNER_MIN_FREE_MB) the run is admitted only when enough memory is available as well.
+Bazel sandbox may give each test private /tmp: set TX_RUNNER_SLOTS_DIR to a shared writable directory then
+(--test_env=TX_RUNNER_SLOTS_DIR=/var/tmp/slots --sandbox_writable_path=/var/tmp/slots).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from .context import Options
+from .log import Fore, Style
+
+try:
+    import fcntl
+except ImportError:  # Windows: runs are not governed
+    fcntl = None  # type: ignore[assignment]
+
+log = logging.getLogger(__name__)
+
+_POLL_SECONDS = 0.2
+_MEMORY_WAIT_MAX_SECONDS = 60.0  # memory may be taken by something else than governed runs: admit anyway after that
+_REPORT_WAIT_SECONDS = 0.05  # shorter waits are not worth a finish note
+
+
+def default_limits() -> dict[str, int]:
+    """Slot limits per class when not configured: node per core, a few browsers (droid runs are limited by device leases)."""
+    cpus = os.cpu_count() or 1
+    return {"wasm": cpus, "emrun": max(1, cpus // 4)}
+
+
+def parse_limits(spec: str | None) -> dict[str, int]:
+    """Limits from "name=N,name=N" (raises ValueError on malformed spec)."""
+    limits = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Invalid slots spec item (expected name=N): {item!r}")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+def slots_dir() -> Path:
+    """Directory shared by all runner processes of the user (not TMPDIR: Bazel sets it per test)."""
+    value = os.environ.get("TX_RUNNER_SLOTS_DIR")
+    if value:
+        return Path(value)
+    base = Path("/tmp") if sys.platform != "win32" else Path(tempfile.gettempdir())
+    return base / f"tx-runner-{os.getuid() if hasattr(os, 'getuid') else 0}" / "slots"
+
+
+def _available_memory_mb() -> int | None:
+    """MemAvailable of Linux /proc/meminfo (None elsewhere)."""
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def make_slot(name: str, options: Options) -> Slot | None:
+    """Slot of the class for the run, None when the class is unlimited or locks are not supported."""
+    limits = default_limits() | parse_limits(os.environ.get("TX_RUNNER_SLOTS")) | parse_limits(options.slots)
+    limit = limits.get(name, 0)
+    if limit <= 0 or fcntl is None:
+        return None
+    min_free_mb = options.min_free_mem or int(os.environ.get("TX_RUNNER_MIN_FREE_MB") or 0)
+    return Slot(name, limit, slots_dir() / name, min_free_mb)
+
+
+class Slot:
+    """One of limited host-wide execution tokens of a class, held via file lock."""
+
+    def __init__(self, name: str, limit: int, directory: Path, min_free_mb: int = 0):
+        self.name = name
+        self.limit = limit
+        self.directory = directory
+        self.min_free_mb = min_free_mb
+        self.index: int | None = None
+        self.waited = 0.0
+        self._fd: int | None = None
+        self._memory_warned = False
+
+    def acquire(self, cancelled: Callable[[], bool] = lambda: False) -> bool:
+        """Wait for a free slot (and memory), return False when cancelled while waiting."""
+        assert fcntl is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+        started = time.monotonic()
+        announced = False
+        while not cancelled():
+            memory_ok = self._memory_admits(time.monotonic() - started)
+            if memory_ok and self._try_lock():
+                self.waited = time.monotonic() - started
+                log.debug(f"slot: {self.name} #{self.index} of {self.limit} after {self.waited:.2f}s")
+                return True
+            if not announced:
+                reason = f"all {self.limit} busy" if memory_ok else f"less than {self.min_free_mb}MB memory available"
+                log.info(f"{Fore.YELLOW}⏳ Waiting for {self.name} slot ({reason}){Style.RESET_ALL}")
+                announced = True
+            time.sleep(_POLL_SECONDS)
+        return False
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)  # closing releases the lock
+            self._fd = None
+
+    def note(self) -> str | None:
+        """Finish note with the wait time (None when admitted at once)."""
+        if self.waited < _REPORT_WAIT_SECONDS:
+            return None
+        return f"waited {self.waited:.1f}s for {self.name} slot"
+
+    def _try_lock(self) -> bool:
+        assert fcntl is not None
+        # Start from a different slot per process to spread lock attempts
+        first = os.getpid() % self.limit
+        for offset in range(self.limit):
+            index = (first + offset) % self.limit
+            fd = os.open(self.directory / f"{index}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                continue
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode())  # holder for humans, lock itself is the token
+            self._fd = fd
+            self.index = index
+            return True
+        return False
+
+    def _memory_admits(self, waited: float) -> bool:
+        if not self.min_free_mb:
+            return True
+        available = _available_memory_mb()
+        if available is None or available >= self.min_free_mb:
+            return True
+        if waited >= _MEMORY_WAIT_MAX_SECONDS:
+            if not self._memory_warned:
+                log.warning(f"⚠️ Only {available}MB memory available after {waited:.0f}s wait, starting {self.name} anyway")
+                self._memory_warned = True
+            return True
+        return False
@@ -0,0 +1,248 @@
+"""Local run history (SQLite) with regression flags: `runner --history [FILTER]`.
+
+Runs append a record to ~/.cache/tx-runner/history/runs.sqlite (TX_RUNNER_HISTORY_DB to override) when opted in:
+by default under `bazel run` only (tests don't write outside their sandbox), --record-history/--no-history override it.
+A record has target (hash of the path as given, so runfiles/sandbox locations of the same target match), platform,
+phase timings, exit reason, peak RSS, captured output volume and host info.
+
+A run is flagged when its launch time or peak memory deviates from the baseline of recent successful runs
+of the same target on the same host (median and MAD of the last runs, with relative and absolute minimums
+so that noise of fast tests is not reported):
+
+    ⚠️ History: run 2.31s is +45% vs median 1.59s of last 12 runs
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .context import RunResult, cache_dir
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+BASELINE_RUNS = 20  # recent successful runs compared with
+_MIN_BASELINE_RUNS = 5
+_MAD_FACTOR = 4.0  # deviation in robust standard deviations (1.4826 * MAD)
+_MIN_RELATIVE = 0.15
+_MIN_ABSOLUTE = {"run_seconds": 0.05, "peak_rss_kb": 4096}
+_SHOWN_RUNS = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    target TEXT NOT NULL,
+    name TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    exit_code INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    prepare_seconds REAL NOT NULL,
+    run_seconds REAL NOT NULL,
+    peak_rss_kb INTEGER,
+    output_lines INTEGER,
+    output_bytes INTEGER,
+    host TEXT NOT NULL,
+    cpus INTEGER,
+    load REAL
+);
+CREATE INDEX IF NOT EXISTS runs_target ON runs (target, started);
+"""
+_COLUMNS = (
+    "started", "target", "name", "platform", "exit_code", "reason", "attempts", "prepare_seconds", "run_seconds",
+    "peak_rss_kb", "output_lines", "output_bytes", "host", "cpus", "load",
+)
+
+
+@dataclass
+class RunRecord:
+    """Row of the runs table."""
+
+    started: float
+    target: str
+    name: str
+    platform: str
+    exit_code: int
+    reason: str
+    attempts: int
+    prepare_seconds: float
+    run_seconds: float
+    peak_rss_kb: int | None
+    output_lines: int | None
+    output_bytes: int | None
+    host: str
+    cpus: int | None
+    load: float | None
+
+
+def db_path() -> Path:
+    value = os.environ.get("TX_RUNNER_HISTORY_DB")
+    return Path(value) if value else cache_dir("history") / "runs.sqlite"
+
+
+def target_key(file: Path, platform_name: str) -> str:
+    """Stable id of the target: hash of the path as given (not resolved) and platform."""
+    return hashlib.sha256(f"{file.as_posix()}\0{platform_name}".encode()).hexdigest()[:16]
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)  # parallel tests append concurrently
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def _load() -> float | None:
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def record(
+    file: Path,
+    platform_name: str,
+    result: RunResult,
+    peak_rss_kb: int | None = None,
+    output: tuple[int, int] | None = None,
+) -> RunRecord | None:
+    """Append the run and warn about deviations from the baseline. History failures never fail the run."""
+    run = RunRecord(
+        started=time.time() - result.prepare_seconds - result.run_seconds,
+        target=target_key(file, platform_name),
+        name=file.as_posix(),
+        platform=platform_name,
+        exit_code=result.exit_code,
+        reason=result.reason.value,
+        attempts=len(result.attempts),
+        prepare_seconds=round(result.prepare_seconds, 4),
+        run_seconds=round(result.run_seconds, 4),
+        peak_rss_kb=peak_rss_kb,
+        output_lines=output[0] if output else None,
+        output_bytes=output[1] if output else None,
+        host=platform.node(),
+        cpus=os.cpu_count(),
+        load=_load(),
+    )
+    try:
+        with _connect(db_path()) as connection:
+            baseline = _baseline(connection, run)
+            connection.execute(
+                f"INSERT INTO runs ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [getattr(run, column) for column in _COLUMNS],
+            )
+        connection.close()
+    except (sqlite3.Error, OSError) as e:
+        log.debug(f"history: not recorded: {e}")
+        return None
+    if run.exit_code == 0:
+        for message in deviations(run, baseline):
+            log.warning(f"⚠️ History: {message}")
+    return run
+
+
+def _rows(connection: sqlite3.Connection, query: str, params: tuple) -> list[RunRecord]:
+    cursor = connection.execute(f"SELECT {', '.join(_COLUMNS)} FROM runs {query}", params)
+    return [RunRecord(*row) for row in cursor.fetchall()]
+
+
+def _baseline(connection: sqlite3.Connection, run: RunRecord) -> list[RunRecord]:
+    """Recent successful runs of the target on the host before the run."""
+    return _rows(
+        connection,
+        "WHERE target = ? AND host = ? AND exit_code = 0 AND started < ? ORDER BY started DESC LIMIT ?",
+        (run.target, run.host, run.started, BASELINE_RUNS),
+    )
+
+
+def _deviation(metric: str, value: float | None, baseline: list[float]) -> float | None:
+    """Relative deviation from the baseline median when significant, None otherwise."""
+    if value is None or len(baseline) < _MIN_BASELINE_RUNS:
+        return None
+    median = statistics.median(baseline)
+    mad = statistics.median(abs(x - median) for x in baseline)
+    delta = value - median
+    threshold = max(_MAD_FACTOR * 1.4826 * mad, _MIN_RELATIVE * median, _MIN_ABSOLUTE[metric])
+    if abs(delta) <= threshold or median <= 0:
+        return None
+    return delta / median
+
+
+def deviations(run: RunRecord, baseline: list[RunRecord]) -> list[str]:
+    """Descriptions of significant launch time and memory deviations of the run."""
+    messages = []
+    durations = [r.run_seconds for r in baseline]
+    change = _deviation("run_seconds", run.run_seconds, durations)
+    if change is not None:
+        messages.append(f"run {run.run_seconds:.2f}s is {change:+.0%} vs median {statistics.median(durations):.2f}s of last {len(durations)} runs")
+    memory = [r.peak_rss_kb for r in baseline if r.peak_rss_kb is not None]
+    change = _deviation("peak_rss_kb", run.peak_rss_kb, memory)
+    if change is not None:
+        messages.append(f"peak RSS {run.peak_rss_kb / 1024:.0f}MB is {change:+.0%} vs median {statistics.median(memory) / 1024:.0f}MB of last {len(memory)} runs")
+    return messages
+
+
+def _flags(run: RunRecord, baseline: list[RunRecord]) -> str:
+    flags = []
+    change = _deviation("run_seconds", run.run_seconds, [r.run_seconds for r in baseline])
+    if change is not None:
+        flags.append(f"run {change:+.0%}")
+    change = _deviation("peak_rss_kb", run.peak_rss_kb, [r.peak_rss_kb for r in baseline if r.peak_rss_kb is not None])
+    if change is not None:
+        flags.append(f"rss {change:+.0%}")
+    return f"{Fore.YELLOW}⚠️ {', '.join(flags)}{Style.RESET_ALL}" if flags else ""
+
+
+def show(name_filter: str | None = None) -> int:
+    """Print recent runs per target with trends and regression flags (--history). Returns 0."""
+    path = db_path()
+    if not path.exists():
+        print(f"No run history yet ({path})")
+        return 0
+    with _connect(path) as connection:
+        runs = _rows(connection, "WHERE name LIKE ? ORDER BY started", (f"%{name_filter or ''}%",))
+    connection.close()
+
+    by_target: dict[str, list[RunRecord]] = {}
+    for run in runs:
+        by_target.setdefault(run.target, []).append(run)
+    print(f"{Fore.CYAN}📈 Run history {Style.DIM}({path}){Style.RESET_ALL}")
+    for target_runs in sorted(by_target.values(), key=lambda r: r[-1].started):
+        last = target_runs[-1]
+        ok = [r.run_seconds for r in target_runs if r.exit_code == 0]
+        trend = f", median run {statistics.median(ok):.2f}s" if ok else ""
+        print(f"\n{Style.BRIGHT}{last.name}{Style.RESET_ALL} ({last.platform}) {len(target_runs)} runs{trend}")
+        print(f"  {'started':<19} {'exit':>5} {'reason':<9} {'prepare':>8} {'run':>8} {'rss':>7} {'output':>8}  host")
+        for index in range(max(0, len(target_runs) - _SHOWN_RUNS), len(target_runs)):
+            run = target_runs[index]
+            baseline = [r for r in reversed(target_runs[:index]) if r.exit_code == 0 and r.host == run.host][:BASELINE_RUNS]
+            rss = f"{run.peak_rss_kb / 1024:.0f}MB" if run.peak_rss_kb is not None else "-"
+            output = f"{run.output_bytes / 1024:.0f}KB" if run.output_bytes is not None else "-"
+            flags = _flags(run, baseline) if run.exit_code == 0 else ""
+            print(
+                f"  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run.started))} {run.exit_code:>5} {run.reason:<9}"
+                f" {run.prepare_seconds:>7.2f}s {run.run_seconds:>7.2f}s {rss:>7} {output:>8}  {run.host} {flags}".rstrip()
+            )
+    return 0
+
+
+def children_peak_rss_kb() -> int | None:
+    """Peak RSS of the largest finished child process (the target in a CLI run: one target per runner process)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if not peak:
+        return None
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KB on Linux
@@ -0,0 +1,75 @@
+"""Build-time launch manifest (generated by launch_manifest rule, see rules/launch_manifest.bzl).
+
+When present (--launch-manifest), it replaces run time discovery: platform detection,
+HTML/JS lookup in WASM output directory and aapt calls for APK package and launcher activity.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .context import Platform
+from .find import Finder
+
+log = logging.getLogger(__name__)
+
+_MANIFEST_VERSION = 1
+
+
+@dataclass
+class EmbeddedFile:
+    """Embedded data file: path inside the app and its runfiles location."""
+
+    path: str
+    rlocation: str
+
+
+@dataclass
+class LaunchManifest:
+    """Launch facts fixed at build time."""
+
+    platform: Platform
+    content_hash: str
+    html: str | None = None
+    js: str | None = None
+    apk: str | None = None
+    package_name: str | None = None
+    launcher_activity: str | None = None
+    embedded: list[EmbeddedFile] = field(default_factory=list)
+    embedded_mode: str | None = None  # WASM: "preload" or "nodefs", droid: "assets" or "push" (see rules/embedded.bzl)
+
+
+def load(path: Path) -> LaunchManifest:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    version = data.get("version")
+    if version != _MANIFEST_VERSION:
+        raise ValueError(f"Unsupported launch manifest version {version}: {path}")
+
+    entry = data.get("entry", {})
+    manifest = LaunchManifest(
+        platform=Platform(data["platform"]),
+        content_hash=data["content_hash"],
+        html=entry.get("html"),
+        js=entry.get("js"),
+        apk=entry.get("apk"),
+        # Empty when not found in text AndroidManifest.xml (i.e. declared via manifest_values only)
+        package_name=entry.get("package") or None,
+        launcher_activity=entry.get("activity") or None,
+        embedded=[EmbeddedFile(item["path"], item["rlocation"]) for item in data.get("embedded", [])],
+        embedded_mode=data.get("embedded_mode") or None,
+    )
+    log.debug(f"launch manifest: {manifest}")
+    return manifest
+
+
+def resolve_embedded(finder: Finder, embedded: list[EmbeddedFile]) -> list[tuple[str, Path]]:
+    """Path in app and resolved host file of each embedded file (raises when not in runfiles)."""
+    files = []
+    for item in embedded:
+        found, _ = finder.find_file(Path(item.rlocation))
+        if not found:
+            raise FileNotFoundError(f"Embedded file not found in runfiles: {item.rlocation} ({item.path})")
+        files.append((item.path.lstrip("/"), found.resolve()))
+    return files
@@ -0,0 +1,177 @@
+"""Unified --profile: wraps platform commands with the matching profiler and summarizes hot functions.
+
+- EXEC: `perf record -g` (<name>.perf.data), summary from `perf report`
+- PYTHON: `cProfile` (<name>.prof), summary from pstats
+- WASM (node): `node --cpu-prof --heap-prof` (<name>.node-prof/*.cpuprofile, *.heapprofile), summary from CPU profile samples
+- DROID: simpleperf (see droid_profile.py)
+
+Artifacts are written to outputs dir (TEST_UNDECLARED_OUTPUTS_DIR under bazel test).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+TOP_N = 15
+_PERF_REPORT_ROW_RE = re.compile(r"^\s*(\d+\.\d+)%\s+(.*)$")
+
+
+def log_top(title: str, rows: list[str]) -> None:
+    """Log top-N hot functions summary."""
+    if not rows:
+        return
+    log.info(f"{Fore.YELLOW}{title}:{Style.RESET_ALL}")
+    for row in rows:
+        log.info(f"  {row}")
+
+
+def top_report_rows(report: str) -> list[str]:
+    """Top-N rows of perf/simpleperf text report ("12.34%  dso  symbol"), call graph lines are skipped."""
+    rows = []
+    for line in report.splitlines():
+        mo = _PERF_REPORT_ROW_RE.match(line)
+        if mo:
+            rows.append(f"{mo.group(1):>6}%  {' '.join(mo.group(2).split())}")
+            if len(rows) == TOP_N:
+                break
+    return rows
+
+
+class Profiler(ABC):
+    """Profiler of a command line, producing artifacts in outputs dir."""
+
+    def __init__(self, output_base: Path):
+        self.output_base = output_base
+
+    @property
+    @abstractmethod
+    def artifact(self) -> Path:
+        """Main profile artifact (file or directory)."""
+        ...
+
+    @abstractmethod
+    def wrap(self, cmd: list[str]) -> list[str]:
+        """Command line running under profiler."""
+        ...
+
+    @abstractmethod
+    def top(self) -> list[str]:
+        """Hot functions summary rows (most expensive first)."""
+        ...
+
+    def report(self) -> str | None:
+        """Log summary, return finish note (None when profile wasn't produced)."""
+        if not self.artifact.exists():
+            log.warning(f"⚠️ Profile not produced: {self.artifact}")
+            return None
+        try:
+            log_top(f"Top {TOP_N} functions ({self.artifact.name})", self.top())
+        except Exception as e:
+            log.warning(f"⚠️ Profile summary failed: {e}")
+        return f"profile {self.artifact}"
+
+
+class PerfProfiler(Profiler):
+    """Native binary via Linux perf."""
+
+    @property
+    def artifact(self) -> Path:
+        return self.output_base.with_name(self.output_base.name + ".perf.data")
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        return ["perf", "record", "-g", "-o", str(self.artifact), "--"] + cmd
+
+    def top(self) -> list[str]:
+        result = subprocess.run(
+            ["perf", "report", "-i", str(self.artifact), "--stdio", "--no-children", "-g", "none", "--sort", "dso,symbol"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return top_report_rows(result.stdout)
+
+
+class CProfileProfiler(Profiler):
+    """Python script via cProfile (deterministic, stdlib)."""
+
+    @property
+    def artifact(self) -> Path:
+        return self.output_base.with_name(self.output_base.name + ".prof")
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        # python3 script args -> python3 -m cProfile -o file script args
+        return [cmd[0], "-m", "cProfile", "-o", str(self.artifact)] + cmd[1:]
+
+    def top(self) -> list[str]:
+        import pstats
+
+        stats = pstats.Stats(str(self.artifact))
+        total = stats.total_tt or 1  # pyright: ignore[reportAttributeAccessIssue]
+        entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)  # pyright: ignore[reportAttributeAccessIssue]
+        rows = []
+        for (file, line, func), (_, calls, tottime, cumtime, _) in entries[:TOP_N]:
+            location = f"{Path(file).name}:{line}" if line else file
+            rows.append(f"{tottime / total * 100:5.1f}%  {tottime:8.3f}s self {cumtime:8.3f}s cum {calls:>8} calls  {func} ({location})")
+        return rows
+
+
+class NodeProfiler(Profiler):
+    """WASM in Node.js via V8 CPU and heap sampling profilers."""
+
+    @property
+    def artifact(self) -> Path:
+        return self.output_base.with_name(self.output_base.name + ".node-prof")
+
+    def wrap(self, cmd: list[str]) -> list[str]:
+        shutil.rmtree(self.artifact, ignore_errors=True)  # summary is taken from the only profile of the run
+        prof_dir = str(self.artifact)
+        return [cmd[0], "--cpu-prof", f"--cpu-prof-dir={prof_dir}", "--heap-prof", f"--heap-prof-dir={prof_dir}"] + cmd[1:]
+
+    def top(self) -> list[str]:
+        cpu_profiles = sorted(self.artifact.glob("*.cpuprofile"))
+        if not cpu_profiles:
+            return []
+        with open(cpu_profiles[-1], "r", encoding="utf-8") as f:
+            profile = json.load(f)
+
+        # Self time per node from samples weighted by time deltas, aggregated by function
+        nodes = {node["id"]: node["callFrame"] for node in profile["nodes"]}
+        self_us: dict[int, int] = defaultdict(int)
+        for node_id, delta in zip(profile.get("samples", []), profile.get("timeDeltas", [])):
+            self_us[node_id] += max(delta, 0)
+        by_function: dict[str, int] = defaultdict(int)
+        for node_id, us in self_us.items():
+            frame = nodes[node_id]
+            name = frame["functionName"] or "(anonymous)"
+            url = Path(frame["url"]).name if frame["url"] else ""
+            key = f"{name} ({url}:{frame['lineNumber'] + 1})" if url else name
+            by_function[key] += us
+
+        total = sum(by_function.values()) or 1
+        top = sorted(by_function.items(), key=lambda item: item[1], reverse=True)[:TOP_N]
+        return [f"{us / total * 100:5.1f}%  {us / 1000:9.1f}ms  {key}" for key, us in top]
+
+
+def make_profiler(kind: str, output_base: Path) -> Profiler | None:
+    """Profiler for command kind ("exec", "python", "node"), None when its tool is not available."""
+    if kind == "exec":
+        if not shutil.which("perf"):
+            log.warning("⚠️ perf not found, native profiling is skipped")
+            return None
+        return PerfProfiler(output_base)
+    if kind == "python":
+        return CProfileProfiler(output_base)
+    if kind == "node":
+        return NodeProfiler(output_base)
+    raise ValueError(f"Unsupported profiler kind: {kind}")
@@ -0,0 +1,94 @@
+"""Warm retries of the launch/monitor phase (--retries N [--retry-on signal|timeout]).
+
+Unlike Bazel --flaky_test_attempts (rerunning the whole wrapper), only the launch of already prepared command
+is repeated: runfiles resolution, detection, extraction, aapt calls and APK install are done once.
+Only droid runs have a timeout (--timeout of logcat monitoring), so --retry-on timeout is rejected for other platforms.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from enum import Enum
+
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+
+class RetryCondition(Enum):
+    """Failure kind to retry on (none given: any failure)."""
+
+    SIGNAL = "signal"
+    TIMEOUT = "timeout"
+
+
+@dataclass
+class Attempt:
+    """Result of a single launch."""
+
+    number: int
+    exit_code: int
+    duration: float
+    signal: int | None = None
+    timeout: bool = False
+    cancelled: bool = False
+    first_frame_ms: int | None = None  # droid: launch-to-first-frame of `am start -W` (sampling, benchmark)
+    launch_state: str | None = None  # droid: COLD, WARM or HOT start reported by `am start -W`
+
+    def __str__(self) -> str:
+        if self.cancelled:
+            result = "cancelled"
+        elif self.timeout:
+            result = "timeout"
+        elif self.signal is not None:
+            result = f"signal {self.signal}"
+        else:
+            result = f"exit {self.exit_code}"
+        return f"#{self.number} {result} in {self.duration:.2f}s"
+
+
+@dataclass
+class RetryPolicy:
+    """How many times and on which failures to repeat the launch."""
+
+    retries: int = 0
+    conditions: set[RetryCondition] = field(default_factory=set)
+
+    @property
+    def max_attempts(self) -> int:
+        return self.retries + 1
+
+    def should_retry(self, attempt: Attempt) -> bool:
+        if attempt.exit_code == 0 or attempt.cancelled or attempt.number >= self.max_attempts:
+            return False
+        if not self.conditions:
+            return True
+        return (RetryCondition.SIGNAL in self.conditions and attempt.signal is not None) or (
+            RetryCondition.TIMEOUT in self.conditions and attempt.timeout
+        )
+
+    def record(self, attempts: list[Attempt], attempt: Attempt) -> bool:
+        """Add attempt result, log it and return whether to launch again."""
+        attempts.append(attempt)
+        if self.retries == 0:
+            return False
+        retry = self.should_retry(attempt)
+        if attempt.exit_code == 0:
+            log.info(f"{Fore.GREEN}Attempt {attempt.number}/{self.max_attempts} passed{Style.RESET_ALL} {Style.DIM}({attempt}){Style.RESET_ALL}")
+        elif retry:
+            log.warning(f"⚠️ Attempt {attempt.number}/{self.max_attempts} failed ({attempt}), retrying")
+        else:
+            log.error(f"❌ Attempt {attempt.number}/{self.max_attempts} failed ({attempt})")
+        return retry
+
+    def note(self, attempts: list[Attempt]) -> str | None:
+        """Finish note of the launches."""
+        return attempts_note(attempts)
+
+
+def attempts_note(attempts: list[Attempt]) -> str | None:
+    """Finish note with per-attempt results (None for a single attempt)."""
+    if len(attempts) < 2:
+        return None
+    return f"{len(attempts)} attempts: {', '.join(str(attempt) for attempt in attempts)}"
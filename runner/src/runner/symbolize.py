@@ -0,0 +1,369 @@
+"""Native crash backtrace symbolization against unstripped libraries from the build.
+
+Frames are taken from crash output lines:
+
+    #00 pc 000000000004f5c4  /data/app/~~x/com.tx-y/lib/arm64/libapp.so (BuildId: 1a2b3c...)   # Android tombstone
+    #0 0x55d4c3a1b2c4  (/path/to/app+0x1b2c4)                                                 # sanitizers
+    /path/to/app(+0x1b2c4)[0x55d4c3a1b2c4]                                                     # glibc backtrace_symbols
+
+Each library is matched by build id (by file name when the frame has none) and indexed once: symbol table (.symtab, else .dynsym)
+is stored as sorted arrays of addresses/sizes/name offsets keyed by build id in the cache directory,
+so repeated crashes in the same binary are symbolized by bisect lookups without external symbolizer per frame.
+"""
+
+from __future__ import annotations
+
+import array
+import bisect
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import subprocess
+import time
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+# Libraries of the system, not expected in symbol dirs of the build
+_SYSTEM_MODULE_PREFIXES = ("/system/", "/apex/", "/vendor/", "/lib/", "/lib64/", "/usr/")
+
+_INDEX_MAGIC = b"TXSYM001"
+_INDEX_HEADER = struct.Struct("=8sQQ")  # magic, count, names size
+
+_ELF_MAGIC = b"\x7fELF"
+_SHT_SYMTAB = 2
+_SHT_NOTE = 7
+_SHT_DYNSYM = 11
+_NT_GNU_BUILD_ID = 3
+_STT_FUNC = 2
+
+_FRAME_RES = [
+    # Android tombstone: "#00 pc 000000000004f5c4  /path/libapp.so (foo()+20) (BuildId: 1a2b...)"
+    re.compile(r"#(?P<index>\d+) pc (?P<offset>[0-9a-fA-F]+)\s+(?P<module>/\S+)(?:.*\(BuildId: (?P<build_id>[0-9a-fA-F]+)\))?"),
+    # Sanitizers (unsymbolized): "#0 0x55d4c3a1b2c4  (/path/app+0x1b2c4) (BuildId: 1a2b...)"
+    re.compile(r"#(?P<index>\d+) 0x[0-9a-fA-F]+\s+\((?P<module>/[^+()]+)\+0x(?P<offset>[0-9a-fA-F]+)\)(?: \(BuildId: (?P<build_id>[0-9a-fA-F]+)\))?"),
+    # glibc backtrace_symbols: "/path/app(+0x1b2c4)[0x55d4c3a1b2c4]"
+    re.compile(r"(?P<module>/[^\s()]+)\(\+0x(?P<offset>[0-9a-fA-F]+)\)\[0x[0-9a-fA-F]+\]"),
+]
+
+
+@dataclass
+class Frame:
+    """Backtrace frame: offset in the module (relative to its load base)."""
+
+    index: int
+    offset: int
+    module: str
+    build_id: str | None = None
+    text: str = ""  # original frame text (shown as is when not symbolized)
+
+
+def parse_frame(line: str, next_index: int = 0) -> Frame | None:
+    """Parse backtrace frame from output line (None when the line isn't a frame)."""
+    if "0x" not in line and " pc " not in line:
+        return None  # fast path for regular lines
+    for frame_re in _FRAME_RES:
+        mo = frame_re.search(line)
+        if mo:
+            index = mo.group("index") if "index" in frame_re.groupindex else None
+            build_id = mo.group("build_id") if "build_id" in frame_re.groupindex else None
+            return Frame(
+                index=int(index) if index is not None else next_index,
+                offset=int(mo.group("offset"), 16),
+                module=mo.group("module"),
+                build_id=build_id.lower() if build_id else None,
+                text=line[mo.start():].strip(),
+            )
+    return None
+
+
+class CrashCollector:
+    """Collects backtrace frames from output lines (the latest backtrace only)."""
+
+    def __init__(self):
+        self.frames: list[Frame] = []
+
+    def feed(self, line: str) -> None:
+        frame = parse_frame(line, len(self.frames))
+        if frame is None:
+            return
+        if frame.index == 0 and self.frames:
+            self.frames = []  # new backtrace (i.e. next thread or repeated crash)
+        self.frames.append(frame)
+
+
+def _read_elf(path: Path, with_symbols: bool = True) -> tuple[str | None, list[tuple[int, int, bytes]]]:
+    """Build id and function symbols (address, size, name) of ELF file."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:4] != _ELF_MAGIC:
+            raise ValueError(f"Not an ELF file: {path}")
+        is_64 = data[4] == 2
+        endian = "<" if data[5] == 1 else ">"
+        if is_64:
+            shoff, = struct.unpack_from(endian + "Q", data, 0x28)
+            shentsize, shnum = struct.unpack_from(endian + "HH", data, 0x3A)
+            section_fmt = struct.Struct(endian + "IIQQQQIIQQ")
+            symbol_fmt = struct.Struct(endian + "IBBHQQ")
+        else:
+            shoff, = struct.unpack_from(endian + "I", data, 0x20)
+            shentsize, shnum = struct.unpack_from(endian + "HH", data, 0x2E)
+            section_fmt = struct.Struct(endian + "IIIIIIIIII")
+            symbol_fmt = struct.Struct(endian + "IIIBBH")
+
+        # (type, offset, size, link, entsize)
+        sections = []
+        for index in range(shnum):
+            fields = section_fmt.unpack_from(data, shoff + index * shentsize)
+            sections.append((fields[1], fields[4], fields[5], fields[6], fields[9]))
+
+        build_id = None
+        for sh_type, offset, size, _, _ in sections:
+            if sh_type != _SHT_NOTE:
+                continue
+            pos, end = offset, offset + size
+            while pos + 12 <= end:
+                namesz, descsz, note_type = struct.unpack_from(endian + "III", data, pos)
+                name_pos = pos + 12
+                desc_pos = name_pos + ((namesz + 3) & ~3)
+                if note_type == _NT_GNU_BUILD_ID and data[name_pos:name_pos + namesz] == b"GNU\0":
+                    build_id = data[desc_pos:desc_pos + descsz].hex()
+                    break
+                pos = desc_pos + ((descsz + 3) & ~3)
+            if build_id:
+                break
+
+        symbols = []
+        if not with_symbols:
+            return build_id, symbols
+
+        symtab = next((s for s in sections if s[0] == _SHT_SYMTAB), None) or next((s for s in sections if s[0] == _SHT_DYNSYM), None)
+        if symtab:
+            _, offset, size, link, entsize = symtab
+            strtab_offset = sections[link][1]
+            for pos in range(offset, offset + size, entsize or symbol_fmt.size):
+                if is_64:
+                    st_name, st_info, _, st_shndx, st_value, st_size = symbol_fmt.unpack_from(data, pos)
+                else:
+                    st_name, st_value, st_size, st_info, _, st_shndx = symbol_fmt.unpack_from(data, pos)
+                if st_info & 0xF != _STT_FUNC or st_shndx == 0 or st_value == 0:
+                    continue
+                name_end = data.find(b"\0", strtab_offset + st_name)
+                symbols.append((st_value & ~1, st_size, data[strtab_offset + st_name:name_end]))  # ~1: thumb bit
+        return build_id, symbols
+
+
+def read_build_id(path: Path) -> str | None:
+    """Build id of ELF file (None if not ELF or without build id note)."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(4) != _ELF_MAGIC:
+                return None
+        return _read_elf(path, with_symbols=False)[0]
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+@cache
+def _build_id(path: Path, stat_key: tuple[int, int]) -> str | None:
+    """Build id cached per file version (stat_key: size, mtime): every frame of a library looks it up."""
+    return read_build_id(path)
+
+
+def _cached_build_id(path: Path) -> str | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return _build_id(path, (st.st_size, st.st_mtime_ns))
+
+
+class SymbolIndex:
+    """Sorted function symbols of a library for bisect lookups."""
+
+    def __init__(self, addrs: array.array, sizes: array.array, name_offsets: array.array, names: bytes):
+        self.addrs = addrs
+        self.sizes = sizes
+        self.name_offsets = name_offsets
+        self.names = names
+
+    @classmethod
+    def build(cls, symbols: list[tuple[int, int, bytes]]) -> SymbolIndex:
+        addrs, sizes, name_offsets = array.array("Q"), array.array("Q"), array.array("I")
+        names = bytearray()
+        last_addr = None
+        for addr, size, name in sorted(symbols, key=lambda s: (s[0], -s[1])):
+            if addr == last_addr:
+                continue  # aliases: keep the largest
+            last_addr = addr
+            addrs.append(addr)
+            sizes.append(size)
+            name_offsets.append(len(names))
+            names += name + b"\0"
+        return cls(addrs, sizes, name_offsets, bytes(names))
+
+    @classmethod
+    def load(cls, path: Path) -> SymbolIndex:
+        data = path.read_bytes()
+        magic, count, names_size = _INDEX_HEADER.unpack_from(data)
+        if magic != _INDEX_MAGIC:
+            raise ValueError(f"Unsupported symbol index: {path}")
+        pos = _INDEX_HEADER.size
+        arrays = []
+        for typecode in ("Q", "Q", "I"):
+            values = array.array(typecode)
+            end = pos + count * values.itemsize
+            values.frombytes(data[pos:end])
+            arrays.append(values)
+            pos = end
+        return cls(*arrays, data[pos:pos + names_size])
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, len(self.addrs), len(self.names)))
+            f.write(self.addrs.tobytes())
+            f.write(self.sizes.tobytes())
+            f.write(self.name_offsets.tobytes())
+            f.write(self.names)
+        temp_path.replace(path)  # atomic for concurrent runs
+
+    def lookup(self, offset: int) -> tuple[str, int] | None:
+        """Symbol name and offset in it for the address."""
+        index = bisect.bisect_right(self.addrs, offset) - 1
+        if index < 0:
+            return None
+        addr, size = self.addrs[index], self.sizes[index]
+        if size and offset >= addr + size:
+            return None
+        name_start = self.name_offsets[index]
+        name = self.names[name_start:self.names.index(b"\0", name_start)].decode("utf-8", errors="replace")
+        return name, offset - addr
+
+
+def _demangle(names: list[str]) -> dict[str, str]:
+    """Demangle C++ names with single c++filt process (identity when not available)."""
+    mangled = sorted({name for name in names if name.startswith("_Z")})
+    tool = shutil.which("llvm-cxxfilt") or shutil.which("c++filt")
+    if not mangled or not tool:
+        return {}
+    try:
+        result = subprocess.run([tool], input="\n".join(mangled), capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        log.debug(f"demangle failed: {e}")
+        return {}
+    return dict(zip(mangled, result.stdout.splitlines()))
+
+
+class Symbolizer:
+    """Symbolizes frames against libraries found in search dirs, with persistent per-build-id indexes."""
+
+    def __init__(self, search_paths: list[Path], cache_dir: Path | None):
+        self.search_paths = search_paths
+        self.cache_dir = cache_dir
+        self._libraries: dict[str, Path] | None = None  # build id or file name -> path
+        self._indexes: dict[str, SymbolIndex | None] = {}
+        self.missing: dict[str, str | None] = {}  # module path -> build id of frames without matching library
+
+    def _scan_libraries(self) -> dict[str, Path]:
+        libraries: dict[str, Path] = {}
+        for search_path in self.search_paths:
+            if search_path.is_file():
+                candidates = [search_path]
+            elif search_path.is_dir():
+                candidates = [p for p in search_path.rglob("*.so") if p.is_file()]
+            else:
+                continue
+            for candidate in candidates:
+                build_id = _cached_build_id(candidate)
+                if build_id:
+                    libraries.setdefault(build_id, candidate)
+                libraries.setdefault(candidate.name, candidate)
+        log.debug(f"symbolize: {len(libraries)} library keys in {[str(p) for p in self.search_paths]}")
+        return libraries
+
+    def _find_library(self, frame: Frame) -> tuple[Path, str | None] | None:
+        if self._libraries is None:
+            self._libraries = self._scan_libraries()
+        path = (frame.build_id and self._libraries.get(frame.build_id)) or self._libraries.get(Path(frame.module).name)
+        if not path:
+            return None
+        build_id = _cached_build_id(path)
+        if frame.build_id and build_id and build_id != frame.build_id:
+            log.debug(f"symbolize: {path} has build id {build_id}, frame {frame.build_id}")
+            return None  # other build of the library (i.e. stripped copy or stale output): symbols would be wrong
+        return path, frame.build_id or build_id
+
+    def _get_index(self, path: Path, build_id: str | None) -> SymbolIndex | None:
+        key = build_id or str(path)
+        if key in self._indexes:
+            return self._indexes[key]
+
+        index = None
+        index_path = self.cache_dir / f"{build_id}.idx" if self.cache_dir and build_id else None
+        if index_path and index_path.is_file():
+            try:
+                index = SymbolIndex.load(index_path)
+                log.debug(f"symbolize: index {index_path} ({len(index.addrs)} symbols)")
+            except (OSError, ValueError, struct.error) as e:
+                log.debug(f"symbolize: broken index {index_path}: {e}")
+        if index is None:
+            try:
+                _, symbols = _read_elf(path)
+            except (OSError, ValueError, struct.error) as e:
+                log.debug(f"symbolize: cannot read {path}: {e}")
+                symbols = None
+            if symbols is not None:
+                index = SymbolIndex.build(symbols)
+                log.debug(f"symbolize: indexed {path} ({len(index.addrs)} symbols)")
+                if index_path:
+                    try:
+                        index.save(index_path)
+                    except OSError as e:
+                        log.debug(f"symbolize: cannot store index {index_path}: {e}")
+        self._indexes[key] = index
+        return index
+
+    def symbolize(self, frames: list[Frame]) -> list[str]:
+        """Formatted frames with function+offset where found."""
+        resolved = []
+        for frame in frames:
+            found = self._find_library(frame)
+            if not found and not frame.module.startswith(_SYSTEM_MODULE_PREFIXES):
+                self.missing[frame.module] = frame.build_id
+            index = self._get_index(*found) if found else None
+            resolved.append(index.lookup(frame.offset) if index else None)
+
+        demangled = _demangle([symbol[0] for symbol in resolved if symbol])
+        lines = []
+        for frame, symbol in zip(frames, resolved):
+            module = Path(frame.module).name
+            if symbol:
+                name, offset = symbol
+                lines.append(f"#{frame.index:02d} pc {frame.offset:08x}  {module}  {demangled.get(name, name)}+{offset}")
+            else:
+                lines.append(frame.text)
+        return lines
+
+
+def log_backtrace(symbolizer: Symbolizer, frames: list[Frame]) -> None:
+    """Log symbolized backtrace of the crash."""
+    started = time.monotonic()
+    lines = symbolizer.symbolize(frames)
+    log.debug(f"symbolized {len(frames)} frames in {(time.monotonic() - started) * 1000:.1f}ms")
+    log.info(f"{Fore.YELLOW}Symbolized backtrace:{Style.RESET_ALL}")
+    for line in lines:
+        log.info(f"  {line}")
+    for module, build_id in symbolizer.missing.items():
+        log.warning(
+            f"⚠️ No unstripped library {Path(module).name}{f' with build id {build_id}' if build_id else ''}"
+            f" in {', '.join(str(p) for p in symbolizer.search_paths)}: pass --symbols DIR with unstripped .so of the build"
+        )
+    symbolizer.missing.clear()
@@ -0,0 +1,212 @@
+"""Persistent toolchain discovery cache shared between runner processes (`runner --doctor` prints and refreshes it).
+
+Resolved paths and versions of adb, aapt/aapt2, the NDK, node and emrun are kept in ~/.cache/tx-runner/toolchain/toolchain.json.
+An entry is valid while its key is the same (relevant env var and mtimes of directories where the tool was searched)
+and the tool file itself is unchanged, so a lookup costs a few stat calls instead of directory listings and PATH walks.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import asdict, dataclass
+from functools import cache
+from pathlib import Path
+
+from .context import cache_dir
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+TOOLS = ("adb", "aapt", "aapt2", "ndk", "node", "emrun")
+_CACHE_VERSION = 1
+_VERSION_TIMEOUT = 10.0
+_ADB_VERSION_RE = re.compile(r"^Version (\S+)", re.MULTILINE)
+_ADB_PROTOCOL_RE = re.compile(r"version (\S+)")
+
+
+@dataclass
+class Tool:
+    """Resolved tool with cache validation data."""
+
+    name: str
+    path: str
+    version: str | None
+    key: list[str]
+    mtime_ns: int
+
+
+def _cache_file() -> Path:
+    return cache_dir("toolchain") / "toolchain.json"
+
+
+def _mtime_ns(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _android_home() -> Path:
+    android_home = os.environ.get("ANDROID_HOME")
+    if not android_home:
+        raise EnvironmentError("ANDROID_HOME environment variable is not set")
+    return Path(android_home)
+
+
+def _version_key(p: Path) -> tuple[int, ...]:
+    try:
+        return tuple(int(x) for x in p.name.split("."))
+    except ValueError:
+        return (0,)
+
+
+def _path_dirs() -> list[Path]:
+    return [Path(d) for d in os.environ.get("PATH", "").split(os.pathsep) if d]
+
+
+def _key(name: str) -> list[str]:
+    """Validity key: env var and mtimes of searched directories (a new build-tools version or PATH entry changes it)."""
+    if name == "adb":
+        platform_tools = _android_home() / "platform-tools"
+        return [str(platform_tools), str(_mtime_ns(platform_tools))]
+    if name in ("aapt", "aapt2"):
+        build_tools = _android_home() / "build-tools"
+        return [str(build_tools), str(_mtime_ns(build_tools))]
+    if name == "ndk":
+        android_home = os.environ.get("ANDROID_HOME")
+        ndk_root = Path(android_home) / "ndk" if android_home else None
+        return [os.environ.get("ANDROID_NDK_HOME", ""), str(ndk_root or ""), str(_mtime_ns(ndk_root) if ndk_root else 0)]
+    return [os.environ.get("PATH", "")] + [str(_mtime_ns(d)) for d in _path_dirs()]
+
+
+def _discover(name: str) -> tuple[Path, str | None]:
+    """Full discovery of the tool: its path and version (raises when not found)."""
+    if name == "adb":
+        adb = _android_home() / "platform-tools" / "adb"
+        if not adb.is_file():
+            raise FileNotFoundError(f"adb not found: {adb}")
+        output = _run_version([str(adb), "version"])
+        mo = _ADB_VERSION_RE.search(output) or _ADB_PROTOCOL_RE.search(output)
+        return adb, mo.group(1) if mo else None
+
+    if name in ("aapt", "aapt2"):
+        build_tools_dir = _android_home() / "build-tools"
+        if not build_tools_dir.is_dir():
+            raise FileNotFoundError(f"build-tools directory not found: {build_tools_dir}")
+        versions = [d for d in build_tools_dir.iterdir() if d.is_dir()]
+        if not versions:
+            raise FileNotFoundError(f"No build-tools versions found in {build_tools_dir}")
+        latest = max(versions, key=_version_key)
+        log.debug(f"Using build-tools: {latest}")
+        return latest / name, latest.name  # version of build-tools (tools don't report a stable one)
+
+    if name == "ndk":
+        ndk_home = os.environ.get("ANDROID_NDK_HOME")
+        if ndk_home and Path(ndk_home).is_dir():
+            return Path(ndk_home), None
+        ndk_root = _android_home() / "ndk"
+        versions = [d for d in ndk_root.iterdir() if d.is_dir()] if ndk_root.is_dir() else []
+        if not versions:
+            raise FileNotFoundError(f"No NDK versions found in {ndk_root}")
+        latest = max(versions, key=_version_key)
+        log.debug(f"Using NDK: {latest}")
+        return latest, latest.name
+
+    found = shutil.which(name)
+    if not found:
+        raise FileNotFoundError(f"{name} not found in PATH")
+    path = Path(found)
+    if name == "node":
+        return path, _run_version([found, "--version"]).strip() or None
+    # emrun is a script of emsdk: version is in emscripten-version.txt next to it
+    version_file = path.resolve().parent / "emscripten-version.txt"
+    version = version_file.read_text().strip().strip('"') if version_file.is_file() else None
+    return path, version
+
+
+def _run_version(cmd: list[str]) -> str:
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=_VERSION_TIMEOUT)
+        return result.stdout
+    except (OSError, subprocess.TimeoutExpired) as e:
+        log.debug(f"toolchain: {cmd[0]} version failed: {e}")
+        return ""
+
+
+@cache
+def _load() -> dict[str, Tool]:
+    try:
+        with open(_cache_file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != _CACHE_VERSION:
+            return {}
+        return {name: Tool(**item) for name, item in data.get("tools", {}).items()}
+    except (OSError, ValueError, TypeError) as e:
+        log.debug(f"toolchain: cache is not loaded: {e}")
+        return {}
+
+
+def _save(tools: dict[str, Tool]) -> None:
+    """Write cache atomically (concurrent runners may read it)."""
+    path = _cache_file()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=path.parent, prefix="toolchain.", suffix=".tmp", delete=False, encoding="utf-8") as f:
+            json.dump({"version": _CACHE_VERSION, "tools": {name: asdict(tool) for name, tool in tools.items()}}, f, indent=2)
+            f.write("\n")
+        os.replace(f.name, path)
+    except OSError as e:
+        log.debug(f"toolchain: cache is not saved: {e}")
+
+
+def _is_valid(tool: Tool, key: list[str]) -> bool:
+    return tool.key == key and _mtime_ns(Path(tool.path)) == tool.mtime_ns
+
+
+def resolve(name: str, refresh: bool = False) -> Tool:
+    """Resolved tool from cache when still valid, else discovered and cached. Raises when not found."""
+    tools = _load()
+    key = _key(name)
+    tool = tools.get(name)
+    if tool and not refresh and _is_valid(tool, key):
+        return tool
+
+    path, version = _discover(name)
+    tool = Tool(name=name, path=str(path), version=version, key=key, mtime_ns=_mtime_ns(path))
+    log.debug(f"toolchain: {name} {tool.version or ''} {tool.path}")
+    tools[name] = tool
+    _save(tools)
+    return tool
+
+
+def tool_path(name: str) -> str:
+    """Path of the tool, raising when it's not found."""
+    return resolve(name).path
+
+
+def which(name: str) -> str:
+    """Path of PATH tool (i.e. node), its bare name when not found (spawn reports it as usual)."""
+    try:
+        return resolve(name).path
+    except OSError:
+        return name
+
+
+def doctor() -> int:
+    """Rediscover all tools, refresh the cache and print them. Returns 0."""
+    print(f"{Fore.CYAN}🩺 Toolchain {Style.DIM}({_cache_file()}){Style.RESET_ALL}")
+    for name in TOOLS:
+        try:
+            tool = resolve(name, refresh=True)
+            print(f"  {Fore.GREEN}✅ {name:<6}{Style.RESET_ALL} {tool.version or '?':<24} {tool.path}")
+        except OSError as e:
+            print(f"  {Fore.RED}❌ {name:<6}{Style.RESET_ALL} {e}")
+    print(f"{Style.DIM}Python {sys.version.split()[0]}: {sys.executable}{Style.RESET_ALL}")
+    return 0
@@ -6,17 +6,26 @@ Supports both test mode (bazel test) and run mode (bazel run).
 """
 
 import argparse
+import hashlib
 import logging
 import os
+import shutil
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from colorama import Fore, Style
 
 import runner.cmd
-from .context import Context
+from . import profile, wasm_nodefs
+from .capture import make_capture
+from .toolchain import which
+from .context import Context, cache_dir, outputs_dir
 
 log = logging.getLogger(__name__)
 
+_EXTRACT_CACHE_ENTRIES = 8
+_EXTRACT_CACHE_MIN_AGE = 24 * 3600  # seconds since last use: younger entries may be in use by a concurrent run
+
 
 @dataclass
 class EmrunOptions:
@@ -73,6 +82,119 @@ def _parse_env_file(env_file: Path) -> list[str]:
         return []
 
 
+def _extract_tar_cached(tar_path: Path) -> Path:
+    """Extract tar into extraction cache keyed by the archive version, reusing previous extraction (i.e. reruns in --watch).
+
+    The version is path and stat (size, mtime, inode), not a content hash: no read of the whole archive per run.
+    Falls back to a temporary directory when the cache is not writable (i.e. read-only home in a sandbox).
+    """
+    import tempfile
+
+    try:
+        return _extract_into_cache(tar_path)
+    except OSError as e:
+        temp_dir = Path(tempfile.mkdtemp(prefix="wasm_runner_"))
+        log.debug(f"Extraction cache is not usable ({e}), extracting to: {temp_dir}")
+        _extract_all(tar_path, temp_dir)
+        return temp_dir
+
+
+def _extract_into_cache(tar_path: Path) -> Path:
+    import tempfile
+
+    st = tar_path.stat()
+    version = f"{tar_path.resolve()}\0{st.st_size}\0{st.st_mtime_ns}\0{st.st_ino}"
+    digest = hashlib.sha256(version.encode()).hexdigest()[:16]
+    root = cache_dir("wasm")
+    target = root / digest
+    if target.is_dir():
+        log.debug(f"Extraction cache hit: {target}")
+        os.utime(target)  # keep recently used entries on pruning
+        return target
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f"{digest}.", dir=root))
+    log.debug(f"Extracting to: {staging}")
+    try:
+        _extract_all(tar_path, staging)
+        staging.rename(target)
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not target.is_dir():
+            raise
+        # Concurrent run has extracted the same archive first
+
+    try:
+        _prune_extract_cache(root)
+    except OSError as e:
+        log.debug(f"Extraction cache prune failed: {e}")  # i.e. entry removed by a concurrent prune
+    return target
+
+
+def _prune_extract_cache(root: Path) -> None:
+    """Remove least recently used entries beyond the limit, except ones used lately (concurrent runs may still read them)."""
+    now = time.time()
+    entries = sorted(((p.stat().st_mtime, p) for p in root.iterdir() if p.is_dir() and "." not in p.name), reverse=True)
+    for mtime, stale in entries[_EXTRACT_CACHE_ENTRIES:]:
+        if now - mtime < _EXTRACT_CACHE_MIN_AGE:
+            continue
+        log.debug(f"Extraction cache prune: {stale}")
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def _extract_all(tar_path: Path, target: Path) -> None:
+    import tarfile
+
+    with tarfile.open(tar_path, 'r') as tar:
+        # Use filter='data' to avoid deprecation warning in Python 3.14+
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(target, filter='data')
+        else:
+            tar.extractall(target)
+
+
+def _extract_from_tar_if_needed(base_path: Path) -> Path | None:
+    """Extract files from tar archive if the base file is a tar archive."""
+    import tarfile
+
+    # Check it is a directory (already extracted, e.g. via wasm_cc_binary rule)
+    if base_path.is_dir():
+        log.debug(f"Found directory: {base_path}")
+        html_files = list[Path](base_path.glob("*.html"))
+        if len(html_files) == 0:
+            raise FileNotFoundError(f"No HTML file found in directory: {base_path}")
+        if len(html_files) > 1:
+            raise FileNotFoundError(
+                f"Multiple HTML files found in directory {base_path}: {[f.name for f in html_files]}"
+            )
+        return html_files[0]
+
+    # Check it is a tar archive
+    tar_path = base_path
+    if tarfile.is_tarfile(tar_path):
+        log.debug(f"Found tar archive: {tar_path}")
+
+        try:
+            extracted_dir = _extract_tar_cached(tar_path)
+
+            # Return the HTML file path from extracted files
+            html_name = base_path.with_suffix('.html').name
+            extracted_html = extracted_dir / html_name
+
+            if extracted_html.exists():
+                log.debug(f"Successfully extracted HTML file: {extracted_html}")
+                return extracted_html
+            else:
+                log.debug(f"HTML file not found in extracted archive: {html_name}")
+                return None
+
+        except Exception as e:
+            log.warning(f"⚠️ Cannot extract {tar_path}: {e}")
+            return None
+
+    return None
+
+
 def _read_env_file(ctx: Context) -> list[str]:
     """Read .env file (in the same directory as the target file) and extract WASM_RUNNER_ARGS arguments."""
 
@@ -98,6 +220,7 @@ Examples:
   %(prog)s file -n                  # Run via emrun, show browser, no kill existing instances
   %(prog)s file -s -d               # Run via emrun, show browser with DevTools
         """,
+        allow_abbrev=False,
     )
 
     parser.add_argument(
@@ -200,64 +323,30 @@ class WasmRunner:
 
         log.info(f"{Fore.CYAN}⚙️  WASM Runner {Style.DIM}{args}")
         self.options = _parse_arguments(ctx, args)
-
-    def _extract_from_tar_if_needed(self, base_path: Path) -> Path | None:
-        """Extract files from tar archive if the base file is a tar archive."""
-        import tarfile
-        import tempfile
-
-        # Check it is a directory (already extracted, e.g. via wasm_cc_binary rule)
-        if base_path.is_dir():
-            log.debug(f"Found directory: {base_path}")
-            html_files = list[Path](base_path.glob("*.html"))
-            if len(html_files) == 0:
-                raise FileNotFoundError(f"No HTML file found in directory: {base_path}")
-            if len(html_files) > 1:
-                raise FileNotFoundError(
-                    f"Multiple HTML files found in directory {base_path}: {[f.name for f in html_files]}"
-                )
-            return html_files[0]
-
-        # Check it is a tar archive
-        tar_path = base_path
-        if tarfile.is_tarfile(tar_path):
-            log.debug(f"Found tar archive: {tar_path}")
-
-            # Create temporary directory for extraction
-            temp_dir = Path(tempfile.mkdtemp(prefix="wasm_runner_"))
-            log.debug(f"Extracting to temporary directory: {temp_dir}")
-
-            try:
-                with tarfile.open(tar_path, 'r') as tar:
-                    # Use filter='data' to avoid deprecation warning in Python 3.14+
-                    if hasattr(tarfile, 'data_filter'):
-                        tar.extractall(temp_dir, filter='data')
-                    else:
-                        tar.extractall(temp_dir)
-
-                # Return the HTML file path from extracted files
-                html_name = base_path.with_suffix('.html').name
-                extracted_html = temp_dir / html_name
-
-                if extracted_html.exists():
-                    log.debug(f"Successfully extracted HTML file: {extracted_html}")
-                    return extracted_html
-                else:
-                    log.debug(f"HTML file not found in extracted archive: {html_name}")
-                    return None
-
-            except Exception as e:
-                log.debug(f"Error extracting tar archive: {e}")
-                return None
-
-        return None
+        self.manifest = ctx.manifest
+        self.finder = ctx.finder
+        self.profile = ctx.options.profile
+        self.capture = make_capture(ctx.options, ctx.found_file.stem)
+
+    def _find_manifest_entry(self, file_path: str, name: str | None) -> Path | None:
+        """Entry file from launch manifest when running output directory (no glob/extraction required)."""
+        if not name or not Path(file_path).is_dir():
+            return None
+        entry = Path(file_path) / name
+        log.debug(f"manifest entry: {entry}")
+        return entry
 
     def _find_html_file(self, file_path: str) -> Path:
         """Find the HTML file, handling different execution contexts."""
 
+        if self.manifest:
+            entry = self._find_manifest_entry(file_path, self.manifest.html)
+            if entry:
+                return entry
+
         # Expect path as tar archive
         current_tar_base = Path(file_path)
-        extracted = self._extract_from_tar_if_needed(current_tar_base)
+        extracted = _extract_from_tar_if_needed(current_tar_base)
         if extracted:
             return extracted
 
@@ -265,10 +354,15 @@ class WasmRunner:
 
     def _find_js_file(self, file_path: str) -> Path:
         """Find the JS file for Node.js execution."""
-        
+
+        if self.manifest:
+            entry = self._find_manifest_entry(file_path, self.manifest.js)
+            if entry:
+                return entry
+
         # Expect path as tar archive
         current_tar_base = Path(file_path)
-        extracted = self._extract_from_tar_if_needed(current_tar_base)
+        extracted = _extract_from_tar_if_needed(current_tar_base)
         if extracted:
             # Convert HTML path to JS path
             js_file = extracted.with_suffix('.js')
@@ -278,6 +372,9 @@ class WasmRunner:
 
         raise FileNotFoundError(f"JS file not found in TAR: {file_path}")
 
+    def _is_nodefs_embedded(self) -> bool:
+        return bool(self.manifest and self.manifest.embedded_mode == "nodefs" and self.manifest.embedded)
+
     def _make_cmd_with_node(self, js_file: Path, args: list[str]) -> list[str]:
         """Run WASM using Node.js (console mode)."""
         log.debug(f"WASM Node.js mode (via node)")
@@ -287,8 +384,15 @@ class WasmRunner:
         if args:
             log.debug(f"args: {' '.join(args)}")
 
+        node_args = []
+        if self._is_nodefs_embedded():
+            assert self.manifest
+            preload = wasm_nodefs.make_preload_script(self.finder, self.manifest.embedded)
+            if preload:
+                node_args += ['--require', str(preload)]
+
         # Use just the filename since cwd will be set to the directory
-        return ['node', js_file.name] + args
+        return [which('node')] + node_args + [js_file.name] + args
 
     def _make_cmd_with_emrun(self, html_file: Path, args: list[str], emrun: EmrunOptions) -> list[str]:
         """Run WASM using emrun (browser mode)."""
@@ -300,7 +404,7 @@ class WasmRunner:
 
         # https://emscripten.org/docs/compiling/Running-html-files-with-emrun.html#controlling-log-output
         cmd = [
-            'emrun',
+            which('emrun'),
             # '--verbose',  # Print detailed information about emrun internal steps.
             # '--system_info',  # Print detailed information about the current system before launching.
             # '--browser_info',  # Print information about which browser is about to be launched.
@@ -339,7 +443,12 @@ class WasmRunner:
     def make_command(self) -> runner.cmd.Command:
         options = self.options
 
+        profiler = None
         if options.emrun:
+            if self.profile:
+                log.warning("⚠️ Profiling is supported in Node.js mode only (use browser DevTools with --devtool)")
+            if self._is_nodefs_embedded():
+                log.warning("⚠️ Embedded data is mounted via NODEFS in Node.js mode only, it's not available in browser")
             html_file = self._find_html_file(options.file)
             cmd = self._make_cmd_with_emrun(html_file, options.args, options.emrun)
             file_name = html_file.name
@@ -350,9 +459,13 @@ class WasmRunner:
             file_name = js_file.name
             # Set cwd to JS file directory so Node.js can find .data and .wasm files
             cwd = str(js_file.parent)
+            if self.profile:
+                profiler = profile.make_profiler("node", outputs_dir() / js_file.stem)
 
         return runner.cmd.RunCommand(
-            scope_prefix=f"[WASM: {cmd[0]}: {file_name}]",
+            scope_prefix=f"[WASM: {Path(cmd[0]).stem}: {file_name}]",
             cmd=cmd,
             cwd=cwd,
+            profiler=profiler,
+            capture=self.capture,
         )
\ No newline at end of file
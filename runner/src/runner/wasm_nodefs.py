@@ -0,0 +1,135 @@
+"""Runtime mount of embedded data for Node.js WASM runs (embedded mode "nodefs", see rules/embedded.bzl).
+
+Instead of packing embedded files into .data blob (--preload-file: read whole and copied into MEMFS before main),
+directories of the embedded layout are mounted into emscripten FS via NODEFS, so files are read lazily from host.
+Files are scattered over runfiles, so the layout (path in app -> runfiles location) is assembled once
+as a tree of hard links in ~/.cache/tx-runner/wasm-embedded/<hash> and its top level directories are mounted:
+
+    data/fonts/Roboto.ttf  ->  <cache>/<hash>/data/fonts/Roboto.ttf  (mounted as /data)
+
+Mounting is done by a generated script preloaded with `node --require`: it declares Module with preRun hook
+in front of the emscripten glue source (predefined global Module is shadowed by `var Module` of CommonJS module),
+so the binary has to be linked with `-lnodefs.js -sFORCE_FILESYSTEM=1` (done by the "nodefs" mode).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .context import cache_dir
+from .find import Finder
+from .manifest import EmbeddedFile, resolve_embedded
+
+log = logging.getLogger(__name__)
+
+_CACHE_ENTRIES = 8
+_CACHE_MIN_AGE = 24 * 3600  # seconds since last use: younger trees may be mounted by a concurrent run
+
+_PRELOAD_TEMPLATE = r"""
+// Generated by runner (wasm_nodefs.py): mount embedded data directories from host via NODEFS before main()
+const NodeModule = require("module");
+const entry = require("fs").realpathSync(process.argv[1]);
+const mounts = @MOUNTS@;
+// Declared in scope of the emscripten glue, which keeps existing Module (`var Module = typeof Module != ...`)
+// and where FS and NODEFS are visible to the preRun hook
+const prefix = "var Module = { preRun: [function () {" +
+  " if (typeof NODEFS == 'undefined') throw new Error('runner: embedded data needs NODEFS, link with -lnodefs.js');" +
+  " for (const [dir, root] of Object.entries(" + JSON.stringify(mounts) + ")) { FS.mkdirTree(dir); FS.mount(NODEFS, { root: root }, dir); }" +
+  " }] };";
+const compile = NodeModule.prototype._compile;
+NodeModule.prototype._compile = function (content, filename) {
+  if (filename === entry) {
+    NodeModule.prototype._compile = compile;
+    // Same first line (keeps line numbers of stack traces), shebang is turned into comment
+    content = prefix + (content.startsWith("#!") ? "//" + content : content);
+  }
+  return compile.call(this, content, filename);
+};
+"""
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        # Different filesystem than the cache: copy (once per content, the tree is cached)
+        shutil.copy2(source, target)
+
+
+def _stage(files: list[tuple[str, Path]]) -> Path:
+    """Tree of the embedded layout in the cache, keyed by layout and identity of host files (reused by reruns)."""
+    digest = hashlib.sha256()
+    for path, source in files:
+        st = source.stat()
+        digest.update(f"{path}\0{source}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    key = digest.hexdigest()[:16]
+    root = cache_dir("wasm-embedded")
+    target = root / key
+    if target.is_dir():
+        log.debug(f"Embedded data cache hit: {target}")
+        os.utime(target)
+        return target
+
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=f"{key}.", dir=root))
+    for path, source in files:
+        _link_or_copy(source, staging / path)
+    try:
+        staging.rename(target)
+    except OSError:
+        # Concurrent run has staged the same layout first
+        shutil.rmtree(staging, ignore_errors=True)
+
+    try:
+        _prune(root)
+    except OSError as e:
+        log.debug(f"Embedded data cache prune failed: {e}")  # i.e. tree removed by a concurrent prune
+    return target
+
+
+def _prune(root: Path) -> None:
+    """Remove least recently used trees beyond the limit, except ones used lately (concurrent runs may mount them)."""
+    now = time.time()
+    entries = sorted(((p.stat().st_mtime, p) for p in root.iterdir() if p.is_dir() and "." not in p.name), reverse=True)
+    for mtime, stale in entries[_CACHE_ENTRIES:]:
+        if now - mtime < _CACHE_MIN_AGE:
+            continue
+        log.debug(f"Embedded data cache prune: {stale}")
+        shutil.rmtree(stale, ignore_errors=True)
+        stale.with_name(f"{stale.name}.preload.js").unlink(missing_ok=True)
+
+
+def _mounts(tree: Path) -> dict[str, str]:
+    """Mount point in emscripten FS -> host directory (top level directories of the tree)."""
+    mounts = {}
+    for entry in sorted(tree.iterdir()):
+        if entry.is_dir():
+            mounts[f"/{entry.name}"] = str(entry)
+        else:
+            log.warning(f"⚠️ Embedded file in root directory is not mounted (NODEFS mounts directories): /{entry.name}")
+    return mounts
+
+
+def make_preload_script(finder: Finder, embedded: list[EmbeddedFile]) -> Path | None:
+    """Script for `node --require` mounting embedded data, None when there is nothing to mount."""
+    if not embedded:
+        return None
+    tree = _stage(resolve_embedded(finder, embedded))
+    mounts = _mounts(tree)
+    if not mounts:
+        return None
+    for mount_point, host_dir in mounts.items():
+        log.debug(f"NODEFS mount: {mount_point} -> {host_dir}")
+    script = tree.with_name(f"{tree.name}.preload.js")
+    content = _PRELOAD_TEMPLATE.lstrip().replace("@MOUNTS@", json.dumps(mounts))
+    if not script.is_file() or script.read_text(encoding="utf-8") != content:
+        script.write_text(content, encoding="utf-8")
+    return script
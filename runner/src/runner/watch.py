@@ -0,0 +1,177 @@
+"""Watch mode (--watch): rerun the target when its artifact changes, keeping runner state warm.
+
+The resolved artifact (file, tar or output directory) is watched with inotify on Linux (polling elsewhere),
+rapid successive writes of the build are debounced and the run is repeated only when the artifact fingerprint changed.
+Command is re-made with the same finder and options, so detection results are reused,
+WASM tar extraction is served from the extraction cache and droid skips aapt and APK install when APK is unchanged.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from .cmd import Command
+from .log import Fore, Style
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE = 0.5
+_POLL_SECONDS = 0.5
+
+# <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF)
+
+Fingerprint = tuple[tuple[str, int, int, int], ...]
+
+
+def fingerprint(path: Path) -> Fingerprint:
+    """Content identity of the artifact: (relative path, inode, size, mtime) of the file or of all files in directory."""
+    real = path.resolve()
+    if real.is_dir():
+        files = sorted(p for p in real.rglob("*") if p.is_file())
+        return tuple((str(p.relative_to(real)), *_stat_key(p)) for p in files)
+    if real.exists():
+        return (("", *_stat_key(real)),)
+    return ()
+
+
+def _stat_key(path: Path) -> tuple[int, int, int]:
+    st = path.stat()
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _watch_dirs(path: Path) -> list[Path]:
+    """Directories to watch: the artifact directory and its subdirectories or the directory containing the file.
+
+    Parent is watched as well since Bazel replaces outputs (new inode) instead of writing in place.
+    """
+    real = path.resolve()
+    if real.is_dir():
+        return [real.parent, real, *(p for p in real.rglob("*") if p.is_dir())]
+    return [real.parent]
+
+
+class _Inotify:
+    """Minimal inotify binding via libc (no third party dependency)."""
+
+    def __init__(self) -> None:
+        libc_name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: Path) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            log.debug(f"watch: inotify_add_watch({path}) failed: {os.strerror(ctypes.get_errno())}")
+
+    def wait(self, timeout: float | None) -> bool:
+        """Wait for events (drained), return whether any arrived in timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        # Events themselves are not inspected: any change in watched directories leads to fingerprint comparison
+        while True:
+            try:
+                os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class Watcher:
+    """Waits for a settled change of the artifact."""
+
+    def __init__(self, path: Path, debounce: float = DEFAULT_DEBOUNCE):
+        self.path = path
+        self.debounce = debounce
+        self.last = fingerprint(path)
+        self._polled = self.last
+        self._inotify: _Inotify | None = None
+        if sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                log.debug(f"watch: inotify is not available ({e}), polling")
+
+    def close(self) -> None:
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+    def wait_change(self) -> None:
+        """Block until the artifact changed and no writes happened for debounce time."""
+        while True:
+            if fingerprint(self.path) == self.last:  # else changed during the run already
+                self._wait_event(None)
+            # Debounce: build may write several files (or the same file several times) in a row
+            while self._wait_event(self.debounce):
+                pass
+            current = fingerprint(self.path)
+            if current and current != self.last:
+                self.last = current
+                return
+            log.debug("watch: artifact is unchanged or incomplete, waiting")
+
+    def _wait_event(self, timeout: float | None) -> bool:
+        if not self._inotify:
+            # Polling: "event" is a fingerprint change since the previous poll
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while deadline is None or time.monotonic() < deadline:
+                time.sleep(_POLL_SECONDS if timeout is None else min(_POLL_SECONDS, timeout))
+                current = fingerprint(self.path)
+                if current != self._polled:
+                    self._polled = current
+                    return True
+            return False
+
+        # Re-add watches: directories may be replaced by the build (same path, new inode)
+        for watch_dir in _watch_dirs(self.path) if self.path.exists() else [self.path.resolve().parent]:
+            self._inotify.add_watch(watch_dir)
+        return self._inotify.wait(timeout)
+
+
+def run(path: Path, make_command: Callable[[], Command], debounce: float = DEFAULT_DEBOUNCE) -> int:
+    """Run command and rerun it (re-made) on each artifact change until interrupted. Returns the last exit code."""
+    watcher = Watcher(path, debounce)
+    returncode = 0
+    try:
+        while True:
+            try:
+                returncode = make_command().scoped_execute()
+            except Exception as e:
+                # Artifact may be broken or half-written, keep watching for the next build
+                log.error(f"❌ {e}")
+                returncode = 1
+            log.info(f"{Fore.CYAN}👀 Watching {path} for changes {Style.DIM}(Ctrl+C to stop){Style.RESET_ALL}")
+            watcher.wait_change()
+            log.info(f"{Fore.CYAN}🔄 {path.name} changed, rerunning{Style.RESET_ALL}")
+    except KeyboardInterrupt:
+        log.info("watch stopped")
+        return returncode
+    finally:
+        watcher.close()
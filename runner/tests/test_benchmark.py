@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from runner.benchmark import BenchmarkPolicy, stats
+from runner.retry import Attempt
+
+
+def test_stats() -> None:
+    values = stats([float(v) for v in range(20, 0, -1)])
+    assert values["min"] == 1.0
+    assert values["max"] == 20.0
+    assert values["median"] == 10.5
+    assert values["p95"] == 19.0  # nearest rank: 19th of 20
+    assert values["mean"] == 10.5
+    assert values["stddev"] == pytest.approx(5.916, abs=1e-3)
+
+
+def test_stats_edge_cases() -> None:
+    assert stats([]) == {}
+    assert stats([2.5]) == {"min": 2.5, "median": 2.5, "p95": 2.5, "stddev": 0.0, "mean": 2.5, "max": 2.5}
+
+
+def test_benchmark_policy(tmp_path: Path) -> None:
+    policy = BenchmarkPolicy("app", "droid", repeat=3, warmup=1, json_path=tmp_path / "app.bench.json")
+    attempts: list[Attempt] = []
+    durations = [5.0, 1.0, 2.0, 3.0]
+    for number, duration in enumerate(durations, 1):
+        attempt = Attempt(number, 0, duration, first_frame_ms=100 * number, launch_state="COLD")
+        assert policy.record(attempts, attempt) == (number < len(durations))
+
+    data = json.loads((tmp_path / "app.bench.json").read_text())
+    assert data["wall_seconds"]["median"] == 2.0  # warmup launch not measured
+    assert data["first_frame_ms"]["COLD"]["min"] == 200
+    assert [run["warmup"] for run in data["runs"]] == [True, False, False, False]
+    assert policy.note(attempts) == "benchmark 3 runs (+1 warmup), median 2.000s"
+
+
+def test_benchmark_policy_stops_on_failure(tmp_path: Path) -> None:
+    policy = BenchmarkPolicy("app", "exec", repeat=5, warmup=0, json_path=tmp_path / "app.bench.json")
+    attempts: list[Attempt] = []
+    assert policy.record(attempts, Attempt(1, 0, 1.0))
+    assert not policy.record(attempts, Attempt(2, 1, 1.0))
+    assert json.loads((tmp_path / "app.bench.json").read_text())["wall_seconds"]["median"] == 1.0
@@ -0,0 +1,89 @@
+"""LogCapture: full gzip log and console head/tail window with the omitted lines marker."""
+
+import gzip
+from pathlib import Path
+
+import pytest
+
+from runner import capture
+from runner.context import Options
+
+
+def _capture(tmp_path: Path, lines: list[str], head: int, tail: int, dedup: bool = False) -> tuple[capture.LogCapture, list[str]]:
+    log_capture = capture.LogCapture(tmp_path / "app.log.gz", head, tail, dedup=dedup)
+    console: list[str] = []
+    log_capture.open(console.append)
+    for line in lines:
+        log_capture.write(line + "\n")
+    return log_capture, console
+
+
+def test_head_and_tail_window(tmp_path: Path) -> None:
+    log_capture, console = _capture(tmp_path, [f"line {index}" for index in range(10)], head=3, tail=2)
+    note = log_capture.close()
+
+    assert console == [
+        "line 0", "line 1", "line 2",
+        f"... 5 lines omitted (full log: {tmp_path / 'app.log.gz'})",
+        "line 8", "line 9",
+    ]
+    assert note == f"log {tmp_path / 'app.log.gz'} (10 lines, 0.0MB)"
+
+
+def test_file_keeps_every_line(tmp_path: Path) -> None:
+    lines = [f"line {index}" for index in range(100_000)]  # several chunks for the writer
+    log_capture, _ = _capture(tmp_path, lines, head=1, tail=1)
+    log_capture.close()
+
+    with gzip.open(tmp_path / "app.log.gz", "rt", encoding="utf-8") as f:
+        assert f.read().splitlines() == lines
+    assert log_capture.lines == len(lines)
+
+
+def test_important_lines_shown_at_once(tmp_path: Path) -> None:
+    lines = ["head", "a", "W: warning: disk is slow", "b", "c", "d", "tail"]
+    log_capture, console = _capture(tmp_path, lines, head=1, tail=2)
+    assert console == ["head", "W: warning: disk is slow"]  # before the run ends
+
+    log_capture.close()
+    assert console[2:] == [f"... 3 lines omitted (full log: {tmp_path / 'app.log.gz'})", "d", "tail"]
+
+
+def test_important_line_in_tail_is_not_repeated(tmp_path: Path) -> None:
+    log_capture, console = _capture(tmp_path, ["head", "a", "b", "error: boom", "tail"], head=1, tail=2)
+    log_capture.close()
+
+    assert console == ["head", "error: boom", f"... 2 lines omitted (full log: {tmp_path / 'app.log.gz'})", "tail"]
+
+
+@pytest.mark.parametrize(("head", "tail", "omitted"), [(0, 0, 4), (4, 0, 0), (0, 10, 0)])
+def test_window_sizes(tmp_path: Path, head: int, tail: int, omitted: int) -> None:
+    log_capture, console = _capture(tmp_path, ["a", "b", "c", "d"], head=head, tail=tail)
+    log_capture.close()
+
+    marker = [line for line in console if line.startswith("...")]
+    assert marker == ([f"... {omitted} lines omitted (full log: {tmp_path / 'app.log.gz'})"] if omitted else [])
+    assert len(console) == 4 - omitted + len(marker)
+
+
+def test_repetitive_lines_collapsed_in_console_only(tmp_path: Path) -> None:
+    lines = [f"frame {index} took {index}.5ms" for index in range(200)]
+    log_capture, console = _capture(tmp_path, lines, head=1000, tail=0, dedup=True)
+    log_capture.close()
+
+    assert len(console) < 10
+    assert any("similar lines suppressed" in line for line in console)
+    assert log_capture.lines == 200
+
+
+def test_close_without_open(tmp_path: Path) -> None:
+    assert capture.LogCapture(tmp_path / "app.log.gz", 1, 1).close() is None
+
+
+def test_make_capture(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TEST_UNDECLARED_OUTPUTS_DIR", str(tmp_path))
+
+    assert capture.make_capture(Options(file=Path("app")), "app") is None
+    log_capture = capture.make_capture(Options(file=Path("app"), capture_log=True, console_head=5, console_tail=7), "app")
+    assert log_capture
+    assert (log_capture.path, log_capture.head, log_capture.tail) == (tmp_path / "app.log.gz", 5, 7)
@@ -0,0 +1,83 @@
+"""ForkPythonCommand: script run in a forked child behaves as `python3 script args` (exit codes, exceptions, output)."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from runner import cmd
+from runner.capture import LogCapture
+from runner.profile import CProfileProfiler
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() is required")
+
+
+def _command(tmp_path: Path, source: str, args: list[str] | None = None, **kwargs) -> cmd.ForkPythonCommand:
+    script = tmp_path / "script.py"
+    script.write_text(source)
+    return cmd.ForkPythonCommand("[PYTHON: script.py]", script, args or [], **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("source", "exit_code"),
+    [
+        ("print('ok')", 0),
+        ("import sys\nsys.exit()", 0),
+        ("import sys\nsys.exit(3)", 3),
+        ("raise SystemExit(256 + 2)", 2),  # low byte as exit status, like the interpreter
+        ("import os, signal\nos.kill(os.getpid(), signal.SIGKILL)", -9),
+    ],
+)
+def test_exit_code(tmp_path: Path, source: str, exit_code: int) -> None:
+    assert _command(tmp_path, source).execute() == exit_code
+
+
+def test_sys_exit_message(tmp_path: Path, capfd: pytest.CaptureFixture[str]) -> None:
+    assert _command(tmp_path, "import sys\nsys.exit('bad input')").execute() == 1
+    assert "bad input" in capfd.readouterr().err
+
+
+def test_exception(tmp_path: Path, capfd: pytest.CaptureFixture[str]) -> None:
+    assert _command(tmp_path, "def main():\n    raise ValueError('boom')\nmain()").execute() == 1
+    err = capfd.readouterr().err
+    assert "Traceback" in err
+    assert "ValueError: boom" in err
+
+
+def test_script_environment(tmp_path: Path, capfd: pytest.CaptureFixture[str]) -> None:
+    (tmp_path / "helper.py").write_text("VALUE = 42\n")
+    source = "import os, sys\nimport helper\nprint(__name__, sys.argv[1:], helper.VALUE, os.getcwd())"
+    (tmp_path / "work").mkdir()
+
+    assert _command(tmp_path, source, ["--flag", "x"], cwd=str(tmp_path / "work")).execute() == 0
+    assert f"__main__ ['--flag', 'x'] 42 {tmp_path / 'work'}" in capfd.readouterr().out
+    assert Path.cwd() != tmp_path / "work"  # only the child changed directory
+
+
+def test_atexit_and_threads_finish(tmp_path: Path, capfd: pytest.CaptureFixture[str]) -> None:
+    source = (
+        "import atexit, threading, time\n"
+        "atexit.register(lambda: print('atexit'))\n"
+        "threading.Thread(target=lambda: (time.sleep(0.1), print('thread'))).start()\n"
+    )
+    assert _command(tmp_path, source).execute() == 0
+    assert [line for line in capfd.readouterr().out.splitlines() if ">>>" not in line] == ["thread", "atexit"]
+
+
+def test_captured_output(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    capture = LogCapture(tmp_path / "script.log.gz", head=10, tail=10, dedup=False)
+    command = _command(tmp_path, "import sys\nprint('out')\nprint('err', file=sys.stderr)\nsys.exit(2)", capture=capture)
+
+    with capsys.disabled():  # child writes to fd 1/2 redirected into the pipe, not to pytest's sys.stdout
+        assert command.execute() == 2
+    assert capture.lines == 2
+    assert command.finish_notes == [f"log {tmp_path / 'script.log.gz'} (2 lines, 0.0MB)"]
+
+
+def test_profile(tmp_path: Path) -> None:
+    profiler = CProfileProfiler(tmp_path / "script")
+    command = _command(tmp_path, "def work():\n    return sum(range(1000))\nwork()", profiler=profiler)
+
+    assert command.execute() == 0
+    assert profiler.artifact.is_file()
+    assert command.finish_notes == [f"profile {profiler.artifact}"]
@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import runner
+from runner import compose, find
+from runner.context import Options, Platform
+
+
+def _write_spec(path: Path, processes: list[dict]) -> Path:
+    path.write_text(json.dumps({"processes": processes}))
+    return path
+
+
+def test_load_spec(tmp_path: Path) -> None:
+    spec = _write_spec(tmp_path / "compose.json", [
+        {"name": "server", "file": "server.py", "platform": "python", "ready": {"tcp": "8080"}, "ready_timeout": 5},
+        {"name": "client", "file": "client", "args": ["--port", "8080"], "depends_on": ["server"]},
+    ])
+    server, client = compose.load_spec(spec)
+
+    assert server.platform == Platform.PYTHON
+    assert server.ready.tcp == ("127.0.0.1", 8080)
+    assert server.ready_timeout == 5.0
+    assert not server.primary
+    assert client.args == ["--port", "8080"]
+    assert client.depends_on == ["server"]
+    assert client.primary  # last process by default
+
+
+@pytest.mark.parametrize(
+    ("processes", "message"),
+    [
+        ([], "No processes"),
+        ([{"name": "a", "file": "a"}, {"name": "a", "file": "b"}], "Duplicate process names"),
+        ([{"name": "a", "file": "a", "depends_on": ["b"]}], "Unknown dependency 'b' of 'a'"),
+        ([{"name": "a", "file": "a", "primary": True}, {"name": "b", "file": "b", "primary": True}], "Multiple primary"),
+        ([{"name": "a", "file": "a", "ready": {"http": "x"}}], "Unknown ready probe"),
+    ],
+)
+def test_load_spec_invalid(tmp_path: Path, processes: list[dict], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        compose.load_spec(_write_spec(tmp_path / "compose.json", processes))
+
+
+@pytest.mark.parametrize(
+    ("processes", "cycle"),
+    [
+        ([{"name": "a", "file": "a", "depends_on": ["a"]}], "a -> a"),
+        (
+            [
+                {"name": "a", "file": "a"},
+                {"name": "b", "file": "b", "depends_on": ["a", "c"]},
+                {"name": "c", "file": "c", "depends_on": ["b"]},
+                {"name": "d", "file": "d", "depends_on": ["c"]},
+            ],
+            "b -> c -> b",
+        ),
+    ],
+)
+def test_load_spec_cycle(tmp_path: Path, processes: list[dict], cycle: str) -> None:
+    with pytest.raises(ValueError, match=f"Dependency cycle in compose spec: .*{cycle.split(' -> ')[0]}"):
+        compose.load_spec(_write_spec(tmp_path / "compose.json", processes))
+
+
+def test_check_cycles_diamond() -> None:
+    specs = [
+        compose.ProcessSpec("db", Path("db")),
+        compose.ProcessSpec("cache", Path("cache"), depends_on=["db"]),
+        compose.ProcessSpec("api", Path("api"), depends_on=["db"]),
+        compose.ProcessSpec("web", Path("web"), depends_on=["api", "cache", "api"]),
+    ]
+    compose._check_cycles(specs)
+
+
+def _compose(tmp_path: Path, processes: list[dict], **options) -> compose.ComposeCommand:
+    spec = _write_spec(tmp_path / "compose.json", processes)
+    return compose.ComposeCommand(compose.load_spec(spec), find.Finder(), runner._make_command,
+                                  options=Options(file=spec, compose=True, **options))
+
+
+def test_long_output_line(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    script = tmp_path / "long.py"
+    script.write_text("print('x' * 200_000)\nprint('done')\n")
+    command = _compose(tmp_path, [{"name": "long", "file": str(script), "platform": "python"}])
+
+    assert command.execute() == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert any(line.endswith("x" * 200_000) for line in lines)
+    assert lines[-1].endswith(" done")
+
+
+def test_profile_and_capture_apply_to_processes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TEST_UNDECLARED_OUTPUTS_DIR", str(tmp_path / "outputs"))
+    script = tmp_path / "app.py"
+    script.write_text("print('hello')\n")
+    command = _compose(tmp_path, [{"name": "app", "file": str(script), "platform": "python"}], profile=True, capture_log=True)
+
+    assert command.execute() == 0
+    assert (tmp_path / "outputs" / "app.prof").is_file()
+    assert (tmp_path / "outputs" / "app.log.gz").is_file()
+    assert [note.split(" ")[0] for note in command.finish_notes] == ["app:", "app:"]
+
+
+@pytest.mark.parametrize(
+    ("options", "flags"),
+    [
+        ({}, []),
+        ({"profile": True, "log_dedup": False}, ["--profile", "--no-log-dedup"]),
+        ({"capture_log": True, "console_head": 5, "console_tail": 7},
+         ["--capture-log", "--console-head", "5", "--console-tail", "7"]),
+    ],
+)
+def test_droid_flags(options: dict, flags: list[str]) -> None:
+    command = compose.ComposeCommand([], find.Finder(), runner._make_command, options=Options(file=Path("c.json"), **options))
+    assert command._droid_flags() == flags
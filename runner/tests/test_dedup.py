@@ -0,0 +1,92 @@
+import pytest
+
+from runner import dedup
+from runner.dedup import LogDedup
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(dedup.time, "monotonic", clock)
+    return clock
+
+
+def _make(**kwargs) -> tuple[LogDedup, list[str]]:
+    shown: list[str] = []
+    return LogDedup(lambda line, important: shown.append(line), **kwargs), shown
+
+
+def test_template() -> None:
+    assert dedup.template("avg=1.11ms count=62 at 0x7f12ab") == dedup.template("avg=2.05ms count=60 at 0x7f99cd")
+    assert dedup.template("frame 1") != dedup.template("other 1")
+
+
+@pytest.mark.parametrize(
+    ("line", "expected"),
+    [
+        ("avg=1.11ms count=62 at 0x7f12ab", "avg=#.#ms count=# at #"),
+        ("build 1a2b3c4d done in 12s", "build # done in #s"),
+        ("opened file2 and file10", "opened file2 and file10"),  # digits inside identifiers are kept
+        ("abi arm64-v8a, x86_64", "abi arm64-v8a, x86_64"),
+        ("bad 0x12zz", "bad 0x12zz"),
+    ],
+)
+def test_template_masks_whole_numbers(line: str, expected: str) -> None:
+    assert dedup.template(line) == expected
+
+
+def test_burst_of_template_then_summary(clock: _Clock) -> None:
+    feeder, shown = _make(burst=3)
+    for index in range(10):
+        feeder.feed(f"app_time_stats: avg={index}.5ms", tag="EGL_emulation")
+    feeder.feed("unrelated line", tag="EGL_emulation")
+    assert len(shown) == 4
+    assert feeder.suppressed == 7
+
+    feeder.flush()
+    assert shown[-1].startswith("... 7 similar lines suppressed")
+    assert shown[-1].endswith("last: app_time_stats: avg=9.5ms")
+
+
+def test_window_expiry_reports_and_restarts(clock: _Clock) -> None:
+    feeder, shown = _make(burst=1, window=10.0)
+    for index in range(3):
+        feeder.feed(f"tick {index}")
+    clock.now += 11
+    feeder.feed("tick 3")
+    assert shown == ["tick 0", "... 2 similar lines suppressed in 11.0s, last: tick 2", "tick 3"]
+
+
+def test_errors_are_never_suppressed(clock: _Clock) -> None:
+    feeder, shown = _make(burst=1)
+    for index in range(5):
+        feeder.feed(f"step {index} error: disk full")
+        feeder.feed(f"step {index}", keep=True)
+    assert len(shown) == 10
+    assert feeder.suppressed == 0
+
+
+def test_tag_limit(clock: _Clock) -> None:
+    feeder, shown = _make(tag_limit=5)
+    for index in range(8):
+        feeder.feed(f"line {'x' * index}", tag="chatty")
+    feeder.feed("line", tag="other")
+    feeder.feed("line y", tag=None)
+    assert len(shown) == 7
+    feeder.flush()
+    assert shown[-1].startswith("... 3 lines of chatty suppressed")
+
+
+def test_no_tag_limit(clock: _Clock) -> None:
+    feeder, shown = _make(tag_limit=0)
+    for index in range(500):
+        feeder.feed(f"line {'x' * index}", tag="stdout")
+    assert len(shown) == 500
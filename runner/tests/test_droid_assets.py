@@ -0,0 +1,116 @@
+"""Delta push of embedded data against a fake adb whose device storage is a local directory."""
+
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from runner import droid_assets
+
+_PACKAGE = "com.tx.test"
+
+# Fake adb: runs the device shell command locally with /sdcard mapped into FAKE_DEVICE, logs every call
+_FAKE_ADB = f"""#!{sys.executable}
+import json, os, subprocess, sys
+
+args = sys.argv[1:]
+with open(os.environ["FAKE_CALLS"], "a") as f:
+    f.write(json.dumps(args) + "\\n")
+command = args[-1].replace("/sdcard/", os.environ["FAKE_DEVICE"] + "/sdcard/")
+sys.exit(subprocess.run(["sh", "-c", command]).returncode)
+"""
+
+
+@pytest.fixture
+def adb(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    path = tmp_path / "adb"
+    path.write_text(_FAKE_ADB)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("FAKE_DEVICE", str(tmp_path / "device"))
+    monkeypatch.setenv("FAKE_CALLS", str(tmp_path / "calls.jsonl"))
+    return [str(path), "-s", "emulator-5554"]
+
+
+@pytest.fixture
+def device(tmp_path: Path) -> Path:
+    return tmp_path / "device" / droid_assets.device_dir(_PACKAGE).lstrip("/")
+
+
+def _local(tmp_path: Path, files: dict[str, bytes]) -> list[tuple[str, Path]]:
+    result = []
+    for path, content in files.items():
+        source = tmp_path / "local" / path
+        source.parent.mkdir(parents=True, exist_ok=True)
+        if not source.exists() or source.read_bytes() != content:
+            source.write_bytes(content)
+        result.append((path, source))
+    return result
+
+
+def _calls(tmp_path: Path) -> int:
+    return len((tmp_path / "calls.jsonl").read_text().splitlines())
+
+
+def test_first_push_sends_everything(tmp_path: Path, adb: list[str], device: Path) -> None:
+    files = _local(tmp_path, {"data/fonts/Roboto.ttf": b"font", "data/config.json": b"{}"})
+
+    pushed = droid_assets.push_embedded(adb, _PACKAGE, files)
+
+    assert (pushed.files, pushed.bytes, pushed.unchanged, pushed.removed) == (2, 6, 0, 0)
+    assert (device / "data" / "fonts" / "Roboto.ttf").read_bytes() == b"font"
+    manifest = droid_assets._parse_manifest((device / droid_assets.MANIFEST_NAME).read_text())
+    assert manifest == droid_assets._local_manifest(files)
+
+
+def test_unchanged_files_are_not_sent(tmp_path: Path, adb: list[str]) -> None:
+    files = _local(tmp_path, {"data/a.txt": b"a", "data/b.txt": b"b"})
+    droid_assets.push_embedded(adb, _PACKAGE, files)
+    calls = _calls(tmp_path)
+
+    pushed = droid_assets.push_embedded(adb, _PACKAGE, files)
+
+    assert (pushed.files, pushed.unchanged, pushed.removed) == (0, 2, 0)
+    assert _calls(tmp_path) == calls + 1  # manifest read only
+
+
+def test_changed_and_removed_files(tmp_path: Path, adb: list[str], device: Path) -> None:
+    droid_assets.push_embedded(adb, _PACKAGE, _local(tmp_path, {"data/a.txt": b"a", "data/b.txt": b"b", "data/c.txt": b"c"}))
+
+    files = _local(tmp_path, {"data/a.txt": b"a", "data/b.txt": b"b2"})
+    pushed = droid_assets.push_embedded(adb, _PACKAGE, files)
+
+    assert (pushed.files, pushed.bytes, pushed.unchanged, pushed.removed) == (1, 2, 1, 1)
+    assert (device / "data" / "b.txt").read_bytes() == b"b2"
+    assert not (device / "data" / "c.txt").exists()
+    assert set(droid_assets._parse_manifest((device / droid_assets.MANIFEST_NAME).read_text())) == {"data/a.txt", "data/b.txt"}
+
+
+def test_cleared_device_data_is_pushed_again(tmp_path: Path, adb: list[str], device: Path) -> None:
+    files = _local(tmp_path, {"data/a.txt": b"a"})
+    droid_assets.push_embedded(adb, _PACKAGE, files)
+    (device / droid_assets.MANIFEST_NAME).unlink()
+
+    assert droid_assets.push_embedded(adb, _PACKAGE, files).files == 1
+
+
+def test_push_failure_raises(tmp_path: Path, adb: list[str], device: Path) -> None:
+    device.parent.mkdir(parents=True)
+    device.write_text("not a directory")  # mkdir -p fails on device
+
+    with pytest.raises(RuntimeError, match="Embedded data push failed"):
+        droid_assets.push_embedded(adb, _PACKAGE, _local(tmp_path, {"data/a.txt": b"a"}))
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("", {}),
+        ("abc  data/a.txt\ndef  data/with  two spaces.txt\n", {"data/a.txt": "abc", "data/with  two spaces.txt": "def"}),
+        ("garbage\nabc data/single-space.txt\n", {}),
+    ],
+)
+def test_parse_manifest(text: str, expected: dict[str, str]) -> None:
+    assert droid_assets._parse_manifest(text) == expected
+    if expected:
+        assert droid_assets._parse_manifest(droid_assets._format_manifest(expected).decode()) == expected
@@ -0,0 +1,118 @@
+"""Device leases: filter matching and exclusive locks over devices listed by a fake adb."""
+
+import json
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from runner import droid_devices
+from runner.droid_devices import DeviceFilter, DeviceInfo
+
+# Fake adb: `devices` lists FAKE_DEVICES ({serial: [state, abilist, sdk]}), getprop answers for the -s serial
+_FAKE_ADB = f"""#!{sys.executable}
+import json, os, sys
+
+devices = json.loads(os.environ["FAKE_DEVICES"])
+args = sys.argv[1:]
+if args == ["devices"]:
+    print("List of devices attached")
+    for serial, (state, _, _) in devices.items():
+        print(f"{{serial}}\\t{{state}}")
+elif args[0] == "-s" and args[2] == "shell":
+    _, abilist, sdk = devices[args[1]]
+    print(abilist)
+    print(sdk)
+"""
+
+_DEVICES = {
+    "emulator-5554": ["device", "x86_64,arm64-v8a", "34"],
+    "R58M123": ["device", "arm64-v8a,armeabi-v7a", "30"],
+    "192.168.1.5:5555": ["device", "armeabi-v7a", "28"],
+    "emulator-5556": ["offline", "x86_64", "34"],
+    "ZX1G22": ["unauthorized", "arm64-v8a", "33"],
+}
+
+
+@pytest.fixture
+def adb(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    path = tmp_path / "adb"
+    path.write_text(_FAKE_ADB)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("FAKE_DEVICES", json.dumps(_DEVICES))
+    monkeypatch.setenv("TX_RUNNER_SLOTS_DIR", str(tmp_path / "slots"))
+    monkeypatch.setattr(droid_devices, "_POLL_SECONDS", 0.01)
+    droid_devices.device_info.cache_clear()
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    ("device_filter", "matches"),
+    [
+        (DeviceFilter(), True),
+        (DeviceFilter(serial="R58M123"), True),
+        (DeviceFilter(serial="emulator-5554"), False),
+        (DeviceFilter(abi="armeabi-v7a"), True),
+        (DeviceFilter(abi="x86_64"), False),
+        (DeviceFilter(min_api=30), True),
+        (DeviceFilter(min_api=31), False),
+        (DeviceFilter(abi="arm64-v8a", min_api=29), True),
+    ],
+)
+def test_filter_matches(device_filter: DeviceFilter, matches: bool) -> None:
+    assert device_filter.matches(DeviceInfo("R58M123", ("arm64-v8a", "armeabi-v7a"), 30)) == matches
+
+
+def test_filter_str() -> None:
+    assert str(DeviceFilter()) == "any"
+    assert str(DeviceFilter(abi="arm64-v8a", min_api=30)) == "ABI arm64-v8a, API >= 30"
+
+
+def test_list_serials_skips_not_ready(adb: str) -> None:
+    assert droid_devices.list_serials(adb) == ["emulator-5554", "R58M123", "192.168.1.5:5555"]
+
+
+def test_device_info(adb: str) -> None:
+    assert droid_devices.device_info(adb, "emulator-5554") == DeviceInfo("emulator-5554", ("x86_64", "arm64-v8a"), 34)
+
+
+def test_lease_matching_device(adb: str) -> None:
+    lease = droid_devices.lease_device(adb, DeviceFilter(abi="armeabi-v7a", min_api=29), "com.tx.test")
+
+    assert lease and lease.serial == "R58M123"
+    assert lease.note() == "device R58M123 (arm64-v8a/armeabi-v7a, API 30)"
+    lease.release()
+
+
+def test_no_matching_device(adb: str) -> None:
+    with pytest.raises(RuntimeError, match="No connected device matches \\(ABI mips\\)"):
+        droid_devices.lease_device(adb, DeviceFilter(abi="mips"), "com.tx.test")
+
+
+@pytest.mark.skipif(droid_devices.fcntl is None, reason="flock is required")
+def test_leases_are_exclusive(adb: str, tmp_path: Path) -> None:
+    arm = DeviceFilter(abi="arm64-v8a")  # emulator-5554 and R58M123
+    first = droid_devices.lease_device(adb, arm, "first")
+    second = droid_devices.lease_device(adb, arm, "second")
+    assert first and second
+    assert {first.serial, second.serial} == {"emulator-5554", "R58M123"}
+    assert (tmp_path / "slots" / "devices" / f"{first.serial}.lock").read_text().split()[1] == "first"
+
+    polls = []
+    assert droid_devices.lease_device(adb, arm, "third", cancelled=lambda: polls.append(1) or len(polls) > 3) is None
+
+    second.release()
+    third = droid_devices.lease_device(adb, arm, "third")
+    assert third and third.serial == second.serial
+    first.release()
+    third.release()
+
+
+@pytest.mark.skipif(droid_devices.fcntl is None, reason="flock is required")
+def test_lock_file_name_of_network_serial(adb: str, tmp_path: Path) -> None:
+    lease = droid_devices.lease_device(adb, DeviceFilter(serial="192.168.1.5:5555"), "com.tx.test")
+
+    assert lease
+    assert (tmp_path / "slots" / "devices" / "192.168.1.5_5555.lock").is_file()
+    lease.release()
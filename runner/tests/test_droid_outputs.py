@@ -0,0 +1,122 @@
+"""Device outputs: tar stream from a fake `adb exec-out` unpacked incrementally, empty and missing paths."""
+
+import io
+import logging
+import stat
+import sys
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from runner import droid_outputs
+
+_PACKAGE = "com.tx.test"
+
+# Fake adb: logs the exec-out command and writes FAKE_STREAM file (device tar output) to stdout
+_FAKE_ADB = f"""#!{sys.executable}
+import os, sys
+from pathlib import Path
+
+Path(os.environ["FAKE_CALLS"]).write_text(sys.argv[-1])
+stream = os.environ.get("FAKE_STREAM")
+if stream:
+    sys.stdout.buffer.write(Path(stream).read_bytes())
+sys.stderr.write(os.environ.get("FAKE_STDERR", ""))
+sys.exit(int(os.environ.get("FAKE_EXIT", "0")))
+"""
+
+
+def _tar(files: dict[str, bytes]) -> bytes:
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return data.getvalue()
+
+
+@pytest.fixture
+def adb(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    path = tmp_path / "adb"
+    path.write_text(_FAKE_ADB)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("FAKE_CALLS", str(tmp_path / "calls.txt"))
+    return [str(path), "-s", "emulator-5554"]
+
+
+def _stream(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, data: bytes) -> None:
+    (tmp_path / "stream.tar").write_bytes(data)
+    monkeypatch.setenv("FAKE_STREAM", str(tmp_path / "stream.tar"))
+
+
+@pytest.mark.parametrize(
+    ("paths", "command"),
+    [
+        (["files/results"], f"run-as {_PACKAGE} tar -cf - files/results 2>/dev/null"),
+        (["/sdcard/shots", "/data/local/tmp/a b"], "tar -cf - -C / sdcard/shots 'data/local/tmp/a b' 2>/dev/null"),
+        (
+            ["files/results", "/sdcard/shots"],
+            f"run-as {_PACKAGE} tar -cf - files/results 2>/dev/null; tar -cf - -C / sdcard/shots 2>/dev/null",
+        ),
+    ],
+)
+def test_tar_command(paths: list[str], command: str) -> None:
+    assert droid_outputs._tar_command(_PACKAGE, paths) == command
+
+
+def test_concatenated_archives_are_unpacked(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, adb: list[str]) -> None:
+    app = _tar({"files/results/report.xml": b"<testsuite/>", "files/results/log.txt": b"ok\n"})
+    device = _tar({"sdcard/shots/1.png": b"\x89PNG" + b"\0" * 100})
+    _stream(tmp_path, monkeypatch, app + device)
+
+    pulled = droid_outputs.pull_device_outputs(adb, _PACKAGE, ["files/results", "/sdcard/shots"], tmp_path / "device")
+
+    assert (pulled.files, pulled.bytes) == (3, 12 + 3 + 104)
+    assert (tmp_path / "device" / "files" / "results" / "report.xml").read_bytes() == b"<testsuite/>"
+    assert (tmp_path / "device" / "sdcard" / "shots" / "1.png").stat().st_size == 104
+    assert (tmp_path / "calls.txt").read_text() == droid_outputs._tar_command(_PACKAGE, ["files/results", "/sdcard/shots"])
+    assert str(pulled).startswith("device outputs 3 files 0.0MB in ")
+
+
+def test_missing_paths_give_empty_stream(tmp_path: Path, adb: list[str], caplog: pytest.LogCaptureFixture) -> None:
+    pulled = droid_outputs.pull_device_outputs(adb, _PACKAGE, ["files/none"], tmp_path / "device")
+
+    assert (pulled.files, pulled.bytes) == (0, 0)
+    assert (tmp_path / "device").is_dir()
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
+
+
+def test_truncated_stream_keeps_complete_members(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, adb: list[str],
+                                                 caplog: pytest.LogCaptureFixture) -> None:
+    data = _tar({"files/a.txt": b"a" * 10, "files/b.bin": b"b" * 100_000})
+    _stream(tmp_path, monkeypatch, data[:2048])  # cut inside the second member
+
+    pulled = droid_outputs.pull_device_outputs(adb, _PACKAGE, ["files"], tmp_path / "device")
+
+    assert (tmp_path / "device" / "files" / "a.txt").read_bytes() == b"a" * 10
+    assert pulled.files == 1
+    assert any("Device outputs are incomplete" in record.message for record in caplog.records)
+
+
+@pytest.mark.skipif(not hasattr(tarfile, "data_filter"), reason="tar extraction filters are required")
+def test_member_outside_dest_is_rejected(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, adb: list[str],
+                                         caplog: pytest.LogCaptureFixture) -> None:
+    _stream(tmp_path, monkeypatch, _tar({"../escaped.txt": b"x"}))
+
+    droid_outputs.pull_device_outputs(adb, _PACKAGE, ["files"], tmp_path / "device")
+
+    assert not (tmp_path / "escaped.txt").exists()
+    assert any("Device outputs are incomplete" in record.message for record in caplog.records)
+
+
+def test_adb_failure_is_reported(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, adb: list[str],
+                                 caplog: pytest.LogCaptureFixture) -> None:
+    monkeypatch.setenv("FAKE_EXIT", "1")
+    monkeypatch.setenv("FAKE_STDERR", "error: device offline")
+
+    pulled = droid_outputs.pull_device_outputs(adb, _PACKAGE, ["files"], tmp_path / "device")
+
+    assert pulled.files == 0
+    assert any("adb exec-out failed: 1: error: device offline" in record.message for record in caplog.records)
@@ -0,0 +1,168 @@
+"""SimpleperfProfiler against a fake adb and a fake NDK (no device, canned adb output)."""
+
+import asyncio
+import hashlib
+import json
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+from runner import droid_profile, toolchain
+
+_PACKAGE = "com.tx.test"
+_RECORD_PID = "4242"
+
+# Fake adb: logs every call to calls.jsonl and answers the commands SimpleperfProfiler sends.
+# The recording prints its pid and runs until `kill -INT <pid>` creates the "stopped" marker.
+_FAKE_ADB = f"""#!{sys.executable}
+import json, os, sys, time
+from pathlib import Path
+
+state = Path(__file__).parent
+args = sys.argv[1:]
+with open(state / "calls.jsonl", "a") as f:
+    f.write(json.dumps(args) + "\\n")
+if args[:1] == ["push"]:
+    Path(state / "device_simpleperf").write_bytes(Path(args[1]).read_bytes())
+elif args[:1] == ["pull"]:
+    Path(args[2]).write_bytes(b"PERFDATA")
+elif args[:1] == ["shell"]:
+    shell = " ".join(args[1:])
+    if shell == "getprop ro.product.cpu.abi":
+        print(os.environ.get("FAKE_ABI", "arm64-v8a"))
+    elif "simpleperf.sha256" in shell and shell.startswith("cat "):
+        stamp = state / "stamp"
+        print(stamp.read_text() if stamp.exists() else "")
+    elif "simpleperf.sha256" in shell:
+        (state / "stamp").write_text(shell.rsplit("echo ", 1)[1].split(" > ")[0])
+    elif " record " in shell:
+        print("{_RECORD_PID}", flush=True)
+        while not (state / "stopped").exists():
+            time.sleep(0.01)
+        print("simpleperf: samples recorded")
+    elif shell == "kill -INT {_RECORD_PID}":
+        (state / "stopped").touch()
+"""
+
+
+def _executable(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return path
+
+
+def _calls(adb: Path) -> list[list[str]]:
+    calls_file = adb.parent / "calls.jsonl"
+    return [json.loads(line) for line in calls_file.read_text().splitlines()] if calls_file.exists() else []
+
+
+@pytest.fixture
+def adb(tmp_path: Path) -> Path:
+    return _executable(tmp_path / "adb" / "adb", _FAKE_ADB)
+
+
+@pytest.fixture
+def ndk(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    ndk_dir = tmp_path / "ndk"
+    scripts = ndk_dir / "simpleperf"
+    (scripts / "bin" / "android" / "arm64").mkdir(parents=True)
+    (scripts / "bin" / "android" / "arm64" / "simpleperf").write_bytes(b"simpleperf arm64")
+    _executable(scripts / "bin" / "linux" / "x86_64" / "simpleperf",
+                '#!/bin/sh\nwhile [ "$1" != "-o" ]; do shift; done\necho "report: dso symbol" > "$2"\n')
+    (scripts / "binary_cache_builder.py").write_text("import os\nos.makedirs('binary_cache', exist_ok=True)\n")
+    (scripts / "report_sample.py").write_text("print('sample: main')\n")
+    monkeypatch.setenv("ANDROID_NDK_HOME", str(ndk_dir))
+    return ndk_dir
+
+
+@pytest.fixture(autouse=True)
+def toolchain_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv("ANDROID_NDK_HOME", raising=False)
+    monkeypatch.delenv("ANDROID_HOME", raising=False)
+    toolchain._load.cache_clear()
+    yield
+    toolchain._load.cache_clear()
+
+
+def _profiler(adb: Path, tmp_path: Path) -> droid_profile.SimpleperfProfiler:
+    return droid_profile.SimpleperfProfiler([str(adb)], _PACKAGE, tmp_path / "out" / "app", [])
+
+
+def test_ndk_dir_from_android_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for version in ("25.2.9519653", "27.0.12077973", "26.1.10909125"):
+        (tmp_path / "sdk" / "ndk" / version).mkdir(parents=True)
+    monkeypatch.setenv("ANDROID_HOME", str(tmp_path / "sdk"))
+
+    assert droid_profile.get_ndk_dir() == tmp_path / "sdk" / "ndk" / "27.0.12077973"
+
+
+def test_ndk_dir_missing() -> None:
+    assert droid_profile.get_ndk_dir() is None
+
+
+def test_prepare_pushes_ndk_simpleperf_once(adb: Path, ndk: Path, tmp_path: Path) -> None:
+    profiler = _profiler(adb, tmp_path)
+
+    assert profiler._prepare_simpleperf() == droid_profile._DEVICE_SIMPLEPERF
+    assert (adb.parent / "device_simpleperf").read_bytes() == b"simpleperf arm64"
+    assert (adb.parent / "stamp").read_text() == hashlib.sha256(b"simpleperf arm64").hexdigest()
+    pushes = [call for call in _calls(adb) if call[0] == "push"]
+    assert len(pushes) == 1
+
+    # Same hash on device: no second push
+    assert profiler._prepare_simpleperf() == droid_profile._DEVICE_SIMPLEPERF
+    assert [call for call in _calls(adb) if call[0] == "push"] == pushes
+
+
+@pytest.mark.parametrize("abi", ["mips", ""])
+def test_prepare_falls_back_to_system_simpleperf(adb: Path, ndk: Path, tmp_path: Path,
+                                                 monkeypatch: pytest.MonkeyPatch, abi: str) -> None:
+    monkeypatch.setenv("FAKE_ABI", abi)
+
+    assert _profiler(adb, tmp_path)._prepare_simpleperf() == droid_profile._SYSTEM_SIMPLEPERF
+    assert not [call for call in _calls(adb) if call[0] == "push"]
+
+
+def test_prepare_without_ndk_uses_system_simpleperf(adb: Path, tmp_path: Path) -> None:
+    assert _profiler(adb, tmp_path)._prepare_simpleperf() == droid_profile._SYSTEM_SIMPLEPERF
+
+
+def test_stop_signals_only_recorded_pid_and_pulls(adb: Path, ndk: Path, tmp_path: Path) -> None:
+    profiler = _profiler(adb, tmp_path)
+    profiler.perf_data.parent.mkdir()
+
+    async def record() -> bool:
+        await profiler.start()
+        return await profiler.stop()
+
+    assert asyncio.run(record())
+    assert profiler.perf_data.read_bytes() == b"PERFDATA"
+    shells = [" ".join(call[1:]) for call in _calls(adb) if call[0] == "shell"]
+    assert f"kill -INT {_RECORD_PID}" in shells
+    assert not [shell for shell in shells if "pkill" in shell]
+    assert ["pull", droid_profile._DEVICE_PERF_DATA, str(profiler.perf_data)] in _calls(adb)
+
+
+def test_stop_without_start() -> None:
+    profiler = droid_profile.SimpleperfProfiler(["adb"], _PACKAGE, Path("app"), [])
+
+    assert not asyncio.run(profiler.stop())
+
+
+def test_report_writes_reports_with_binary_cache(adb: Path, ndk: Path, tmp_path: Path) -> None:
+    profiler = _profiler(adb, tmp_path)
+    profiler.perf_data.parent.mkdir()
+    profiler.perf_data.write_bytes(b"PERFDATA")
+
+    assert profiler.report() == [profiler.report_txt, profiler.script_txt]
+    assert profiler.report_txt.read_text() == "report: dso symbol\n"
+    assert profiler.script_txt.read_text() == "sample: main\n"
+    assert (tmp_path / "out" / "app.perf.data.binary_cache").is_dir()
+
+
+def test_report_skipped_without_ndk(adb: Path, tmp_path: Path) -> None:
+    assert _profiler(adb, tmp_path).report() == []
@@ -0,0 +1,127 @@
+"""DroidCommand exit detection and console output on recorded logcat (no device, no adb calls)."""
+
+import logging
+from pathlib import Path
+
+import pytest
+
+from runner import dedup, droid, droid_replay
+from runner.capture import LogCapture
+from runner.droid import ExitReason
+
+_PACKAGE = "com.tx.test"
+_UID = "10153"
+_PID = 19859
+_APP = droid.LogSource.APP
+_SYSTEM = droid.LogSource.SYSTEM
+
+
+def _app(t: float, message: str, tag: str = "stdout") -> droid_replay.RecordedLine:
+    return droid_replay.RecordedLine(t, _APP, f"03-01 18:52:30.000000 {_UID} {_PID} {_PID} I {tag:<8}: {message}")
+
+
+def _system(t: float, message: str) -> droid_replay.RecordedLine:
+    return droid_replay.RecordedLine(t, _SYSTEM, f"03-01 18:52:30.000000  1000   586   623 I ActivityManager: {message}")
+
+
+def _recording(tmp_path: Path, lines: list[droid_replay.RecordedLine]) -> Path:
+    path = tmp_path / "app.logcat.jsonl"
+    header = droid_replay.RecordingHeader(package=_PACKAGE, component=f"{_PACKAGE}/tx.DroidActivity", uid=_UID)
+    droid_replay.write_recording(path, header, iter(lines))
+    return path
+
+
+def _run(tmp_path: Path, lines: list[droid_replay.RecordedLine], **kwargs) -> droid.DroidCommand:
+    command = droid.DroidCommand(tmp_path / "app.apk", logcat_replay=_recording(tmp_path, lines), symbolize=False, **kwargs)
+    command.exit_code = command.execute()
+    return command
+
+
+@pytest.fixture(autouse=True)
+def _info_logs(caplog: pytest.LogCaptureFixture) -> None:
+    caplog.set_level(logging.INFO)
+
+
+def test_clean_exit(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        *(_app(0.01, f"frame {index} took {index}.5ms") for index in range(20)),
+        _system(0.02, f"Process {_PID} exited cleanly (0)"),
+    ])
+
+    assert command.exit_code == 0
+    assert command.exit_event.reason == ExitReason.COMPLETED
+    assert isinstance(command.logcat_backend, droid_replay.ReplayLogcatBackend)
+    assert command.logcat_backend.fed_lines == 22
+    assert sum("took" in message for message in caplog.messages) == 20  # app output is not collapsed by default
+
+
+def test_exit_code_of_app(tmp_path: Path) -> None:
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        _app(0.01, "VM exiting with result code 3", tag="glue.N"),
+        _system(0.02, f"Process {_PID} exited cleanly (3)"),
+    ])
+    assert command.exit_code == 3
+
+
+def test_crash(tmp_path: Path) -> None:
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        _app(0.01, "Fatal signal 11 (SIGSEGV), code 1 (SEGV_MAPERR), fault addr 0x0", tag="libc"),
+        _system(0.02, f"Process {_PID} exited due to signal 11 (Segmentation fault)"),
+    ])
+    assert command.exit_code != 0
+    assert command.exit_event.reason == ExitReason.PROCESS_DIED
+
+
+def test_app_output_is_not_tag_limited_with_capture(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    capture = LogCapture(tmp_path / "app.log.gz", head=10_000, tail=0)
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        *(_app(0.01, f"[ RUN      ] Suite.Case{'x' * index}") for index in range(150)),
+        *(_app(0.01, f"frame {index} took {index}.5ms", tag="EGL_emulation") for index in range(150)),
+        _app(0.02, "[  PASSED  ] 150 tests."),
+        _system(0.03, f"Process {_PID} exited cleanly (0)"),
+    ], capture=capture)
+
+    assert command.exit_code == 0
+    assert sum("[ RUN      ]" in message for message in caplog.messages) == 150
+    assert any("[  PASSED  ] 150 tests." in message for message in caplog.messages)
+    assert sum(message.startswith("I EGL_emulation") for message in caplog.messages) == 3  # spam of other tags collapsed
+    assert any(message.startswith("... 147 similar lines suppressed") for message in caplog.messages)
+    assert capture.lines == 303  # file keeps every line
+
+
+@pytest.mark.parametrize(
+    ("log_dedup", "app_lines", "egl_lines"),
+    [
+        (None, 150, dedup.TEMPLATE_BURST),  # default: emulator spam collapsed, app output in full
+        (True, dedup.TEMPLATE_BURST, dedup.TEMPLATE_BURST),
+        (False, 150, 150),
+    ],
+)
+def test_console_dedup_without_capture(tmp_path: Path, caplog: pytest.LogCaptureFixture, log_dedup: bool | None,
+                                       app_lines: int, egl_lines: int) -> None:
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        *(_app(0.01, f"frame {index} took {index}.5ms") for index in range(150)),
+        *(_app(0.01, f"eglMakeCurrent: 0x{index:x} ver 3 1", tag="EGL_emulation") for index in range(150)),
+        _system(0.02, f"Process {_PID} exited cleanly (0)"),
+    ], log_dedup=log_dedup)
+
+    assert command.exit_code == 0
+    assert sum(message.startswith("I stdout") for message in caplog.messages) == app_lines
+    assert sum(message.startswith("I EGL_emulation") for message in caplog.messages) == egl_lines
+
+
+def test_recording_without_exit_line(tmp_path: Path) -> None:
+    command = _run(tmp_path, [
+        _system(0.0, f"Start proc {_PID}:{_PACKAGE}/u0a153 for next-top-activity {{{_PACKAGE}/tx.DroidActivity}}"),
+        *(_app(0.01, f"frame {index} took {index}.5ms") for index in range(3000)),  # more than the replay queue holds
+    ])
+
+    assert command.exit_code == 1
+    assert command.exit_event.reason == ExitReason.PROCESS_DIED
+    assert command.exit_event.descr == "replay ended without exit line"
+    assert command.logcat_backend.fed_lines == 3001
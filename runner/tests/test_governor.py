@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+
+from runner import governor
+from runner.context import Options
+
+
+def test_parse_limits() -> None:
+    assert governor.parse_limits(None) == {}
+    assert governor.parse_limits("") == {}
+    assert governor.parse_limits("wasm=4, emrun = 1,") == {"wasm": 4, "emrun": 1}
+
+
+@pytest.mark.parametrize("spec", ["wasm", "=2", "wasm=four"])
+def test_parse_limits_invalid(spec: str) -> None:
+    with pytest.raises(ValueError):
+        governor.parse_limits(spec)
+
+
+def test_make_slot(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TX_RUNNER_SLOTS_DIR", str(tmp_path))
+    monkeypatch.setenv("TX_RUNNER_SLOTS", "wasm=3,droid=1")
+
+    slot = governor.make_slot("wasm", Options(file=Path("app"), slots="wasm=2"))
+    assert slot and (slot.limit, slot.directory) == (2, tmp_path / "wasm")  # --slots wins over the env var
+    assert governor.make_slot("droid", Options(file=Path("app"))).limit == 1  # type: ignore[union-attr]
+    assert governor.make_slot("wasm", Options(file=Path("app"), slots="wasm=0")) is None  # unlimited
+
+
+@pytest.mark.skipif(governor.fcntl is None, reason="flock is required")
+def test_slots_are_exclusive(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(governor, "_POLL_SECONDS", 0.01)
+    first, second, third = (governor.Slot("wasm", 2, tmp_path) for _ in range(3))
+    assert first.acquire() and second.acquire()
+    assert {first.index, second.index} == {0, 1}
+
+    polls = []
+    assert not third.acquire(cancelled=lambda: polls.append(1) or len(polls) > 3)  # all busy until cancelled
+
+    first.release()
+    assert third.acquire()
+    assert third.index == first.index
+    second.release()
+    third.release()
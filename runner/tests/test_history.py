@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from runner import history
+
+
+@pytest.mark.parametrize(
+    ("value", "baseline", "expected"),
+    [
+        (None, [1.0] * 10, None),
+        (5.0, [1.0] * 4, None),  # too few runs
+        (1.1, [1.0] * 10, None),  # under relative minimum
+        (2.0, [1.0] * 10, 1.0),
+        (0.5, [1.0] * 10, -0.5),
+        (1.3, [1.0, 1.5, 0.6, 1.4, 0.7, 1.0, 1.6, 0.5], None),  # within noise of the baseline
+        (0.04, [0.01] * 10, None),  # under absolute minimum of fast runs
+    ],
+)
+def test_deviation_run_seconds(value: float | None, baseline: list[float], expected: float | None) -> None:
+    change = history._deviation("run_seconds", value, baseline)
+    if expected is None:
+        assert change is None
+    else:
+        assert change == pytest.approx(expected)
+
+
+def test_deviation_peak_rss() -> None:
+    baseline = [100_000.0] * 10
+    assert history._deviation("peak_rss_kb", 102_000, baseline) is None
+    assert history._deviation("peak_rss_kb", 150_000, baseline) == pytest.approx(0.5)
+
+
+def test_deviations_message() -> None:
+    baseline = [_record(run_seconds=1.0, peak_rss_kb=102_400) for _ in range(10)]
+    messages = history.deviations(_record(run_seconds=2.0, peak_rss_kb=102_400), baseline)
+    assert messages == ["run 2.00s is +100% vs median 1.00s of last 10 runs"]
+
+
+def test_target_key_is_per_path_and_platform() -> None:
+    key = history.target_key(Path("bazel-bin/app"), "exec")
+    assert key == history.target_key(Path("bazel-bin/app"), "exec")
+    assert key != history.target_key(Path("bazel-bin/app"), "wasm")
+
+
+def _record(run_seconds: float, peak_rss_kb: int | None) -> history.RunRecord:
+    return history.RunRecord(
+        started=0.0, target="t", name="app", platform="exec", exit_code=0, reason="exited", attempts=1,
+        prepare_seconds=0.0, run_seconds=run_seconds, peak_rss_kb=peak_rss_kb, output_lines=None, output_bytes=None,
+        host="host", cpus=1, load=None,
+    )
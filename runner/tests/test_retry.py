@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+import runner
+from runner import find
+from runner.context import Options, Platform
+from runner.retry import Attempt, RetryCondition, RetryPolicy
+
+
+def test_no_retries() -> None:
+    policy = RetryPolicy()
+    attempts: list[Attempt] = []
+    assert not policy.record(attempts, Attempt(1, 1, 0.5))
+    assert policy.note(attempts) is None
+
+
+def test_retry_until_passed() -> None:
+    policy = RetryPolicy(retries=3)
+    attempts: list[Attempt] = []
+    assert policy.record(attempts, Attempt(1, 1, 0.5))
+    assert not policy.record(attempts, Attempt(2, 0, 0.25))
+    assert policy.note(attempts) == "2 attempts: #1 exit 1 in 0.50s, #2 exit 0 in 0.25s"
+
+
+def test_retry_limit() -> None:
+    policy = RetryPolicy(retries=1)
+    attempts: list[Attempt] = []
+    assert policy.record(attempts, Attempt(1, 1, 0.1))
+    assert not policy.record(attempts, Attempt(2, 1, 0.1))
+    assert len(attempts) == policy.max_attempts == 2
+
+
+@pytest.mark.parametrize(
+    ("conditions", "attempt", "expected"),
+    [
+        ({RetryCondition.SIGNAL}, Attempt(1, -11, 0.1, signal=11), True),
+        ({RetryCondition.SIGNAL}, Attempt(1, 1, 0.1), False),
+        ({RetryCondition.TIMEOUT}, Attempt(1, 1, 0.1, timeout=True), True),
+        ({RetryCondition.TIMEOUT}, Attempt(1, -11, 0.1, signal=11), False),
+        (set(), Attempt(1, 1, 0.1, cancelled=True), False),
+    ],
+)
+def test_retry_conditions(conditions: set[RetryCondition], attempt: Attempt, expected: bool) -> None:
+    assert RetryPolicy(retries=2, conditions=conditions).should_retry(attempt) == expected
+
+
+def test_attempt_str() -> None:
+    assert str(Attempt(3, 0, 1.234)) == "#3 exit 0 in 1.23s"
+    assert str(Attempt(1, 137, 2.0, signal=9)) == "#1 signal 9 in 2.00s"
+    assert str(Attempt(1, 1, 2.0, timeout=True)) == "#1 timeout in 2.00s"
+
+
+def test_warm_retry_of_run_command(tmp_path: Path) -> None:
+    script = tmp_path / "flaky.py"
+    script.write_text("import os, sys\nmarker = sys.argv[1]\nif not os.path.exists(marker):\n"
+                      "    open(marker, 'w').close()\n    os.kill(os.getpid(), 11)\n")
+    command = runner._make_command(
+        Options(file=script, args=[str(tmp_path / "marker")], platform=Platform.PYTHON, retries=2, retry_on=["signal"]),
+        find.Finder(),
+        script,
+    )
+
+    assert command.execute() == 0
+    assert [attempt.signal for attempt in command.attempts] == [11, None]
+
+
+@pytest.mark.parametrize("platform", [Platform.EXEC, Platform.PYTHON])
+def test_retry_on_timeout_is_droid_only(tmp_path: Path, platform: Platform) -> None:
+    script = tmp_path / "app.py"
+    script.write_text("")
+    with pytest.raises(ValueError, match="--retry-on timeout is supported for droid only"):
+        runner._make_command(Options(file=script, platform=platform, retries=1, retry_on=["timeout"]), find.Finder(), script)
@@ -0,0 +1,130 @@
+"""Symbolizer on a minimal ELF built in the test: build id note, .symtab index round-trip and frame lookups."""
+
+import struct
+from pathlib import Path
+
+import pytest
+
+from runner import symbolize
+
+_BUILD_ID = "1a2b3c4d5e6f708192a3b4c5d6e7f80912345678"
+_FUNCS = [(0x1000, 0x40, b"main"), (0x1040, 0x20, b"_Z3fooi"), (0x1080, 0, b"bar")]
+
+
+def _write_elf(path: Path, build_id: str = _BUILD_ID, funcs: list[tuple[int, int, bytes]] = _FUNCS) -> Path:
+    """ELF64 LE with sections: null, build id note, .symtab, .strtab."""
+    note = struct.pack("<III", 4, len(bytes.fromhex(build_id)), 3) + b"GNU\0" + bytes.fromhex(build_id)
+    strtab = bytearray(b"\0")
+    symtab = bytearray(struct.pack("<IBBHQQ", 0, 0, 0, 0, 0, 0))
+    for addr, size, name in funcs:
+        symtab += struct.pack("<IBBHQQ", len(strtab), 0x12, 0, 1, addr, size)  # global func in section 1
+        strtab += name + b"\0"
+    symtab += struct.pack("<IBBHQQ", len(strtab), 0x11, 0, 1, 0x2000, 8)  # object: not indexed
+    strtab += b"data\0"
+
+    body = bytearray(b"\0" * 64)
+    offsets = []
+    for content in (note, bytes(symtab), bytes(strtab)):
+        offsets.append(len(body))
+        body += content
+    shoff = len(body)
+    sections = [
+        (0, 0, 0, 0, 0),
+        (7, offsets[0], len(note), 0, 0),
+        (2, offsets[1], len(symtab), 3, 24),
+        (3, offsets[2], len(strtab), 0, 0),
+    ]
+    for sh_type, offset, size, link, entsize in sections:
+        body += struct.pack("<IIQQQQIIQQ", 0, sh_type, 0, 0, offset, size, link, 0, 0, entsize)
+    header = b"\x7fELF" + bytes([2, 1, 1]) + b"\0" * 9 + struct.pack("<HHIQQQIHHHHHH", 3, 183, 1, 0, 0, shoff, 0, 64, 0, 0, 64,
+                                                                          len(sections), 0)
+    body[:64] = header
+    path.write_bytes(bytes(body))
+    return path
+
+
+def test_read_elf(tmp_path: Path) -> None:
+    build_id, symbols = symbolize._read_elf(_write_elf(tmp_path / "libapp.so"))
+
+    assert build_id == _BUILD_ID
+    assert sorted(symbols) == sorted(_FUNCS)
+    assert symbolize.read_build_id(tmp_path / "libapp.so") == _BUILD_ID
+
+
+def test_read_build_id_not_elf(tmp_path: Path) -> None:
+    (tmp_path / "text.so").write_text("not an elf")
+    assert symbolize.read_build_id(tmp_path / "text.so") is None
+
+
+def test_index_round_trip(tmp_path: Path) -> None:
+    index = symbolize.SymbolIndex.build(_FUNCS + [(0x1000, 0x10, b"main_alias")])
+    index.save(tmp_path / "index" / f"{_BUILD_ID}.idx")
+    loaded = symbolize.SymbolIndex.load(tmp_path / "index" / f"{_BUILD_ID}.idx")
+
+    assert list(loaded.addrs) == [0x1000, 0x1040, 0x1080]
+    assert loaded.names == index.names
+
+
+@pytest.mark.parametrize(
+    ("offset", "expected"),
+    [
+        (0x0fff, None),
+        (0x1000, ("main", 0)),
+        (0x103f, ("main", 0x3f)),
+        (0x1044, ("_Z3fooi", 4)),
+        (0x1060, None),  # past the end of _Z3fooi
+        (0x9999, ("bar", 0x9999 - 0x1080)),  # unknown size: nearest preceding symbol
+    ],
+)
+def test_index_lookup(offset: int, expected: tuple[str, int] | None) -> None:
+    assert symbolize.SymbolIndex.build(_FUNCS).lookup(offset) == expected
+
+
+def test_index_load_rejects_other_format(tmp_path: Path) -> None:
+    (tmp_path / "bad.idx").write_bytes(b"TXSYM000" + b"\0" * 16)
+    with pytest.raises(ValueError, match="Unsupported symbol index"):
+        symbolize.SymbolIndex.load(tmp_path / "bad.idx")
+
+
+def test_symbolize_frames(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(symbolize, "_demangle", lambda names: {"_Z3fooi": "foo(int)"})
+    (tmp_path / "lib").mkdir()
+    _write_elf(tmp_path / "lib" / "libapp.so")
+    collector = symbolize.CrashCollector()
+    for line in [
+        f"#00 pc 0000000000001044  /data/app/com.tx/lib/arm64/libapp.so (BuildId: {_BUILD_ID})",
+        "#01 pc 0000000000001004  /data/app/com.tx/lib/arm64/libapp.so",
+        "#02 pc 0000000000000100  /system/lib64/libc.so",
+        "#03 pc 0000000000000200  /data/app/com.tx/lib/arm64/libother.so",
+    ]:
+        collector.feed(line)
+    symbolizer = symbolize.Symbolizer([tmp_path / "lib"], tmp_path / "cache")
+
+    lines = symbolizer.symbolize(collector.frames)
+
+    assert lines[:2] == ["#00 pc 00001044  libapp.so  foo(int)+4", "#01 pc 00001004  libapp.so  main+4"]
+    assert lines[2:] == [frame.text for frame in collector.frames[2:]]
+    assert (tmp_path / "cache" / f"{_BUILD_ID}.idx").is_file()
+    assert symbolizer.missing == {"/data/app/com.tx/lib/arm64/libother.so": None}  # system libraries are not expected
+
+
+def test_other_build_is_not_used(tmp_path: Path) -> None:
+    _write_elf(tmp_path / "libapp.so")
+    frame = symbolize.parse_frame("#00 pc 0000000000001044  /data/app/lib/libapp.so (BuildId: 00ff)")
+    assert frame
+    assert symbolize.Symbolizer([tmp_path / "libapp.so"], None).symbolize([frame]) == [frame.text]
+
+
+def test_build_id_cached_per_file_version(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    library = _write_elf(tmp_path / "libapp.so")
+    reads = []
+    read_build_id = symbolize.read_build_id
+    monkeypatch.setattr(symbolize, "read_build_id", lambda path: reads.append(path) or read_build_id(path))
+    symbolize._build_id.cache_clear()
+
+    assert [symbolize._cached_build_id(library) for _ in range(3)] == [_BUILD_ID] * 3
+    assert len(reads) == 1
+
+    _write_elf(library, build_id="00" * 20, funcs=_FUNCS[:1])  # rebuilt: other size
+    assert symbolize._cached_build_id(library) == "00" * 20
+    assert len(reads) == 2
@@ -0,0 +1,104 @@
+"""Toolchain cache: hits while the key and tool file are unchanged, rediscovery when either changes."""
+
+import json
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from runner import toolchain
+
+
+def _tool(path: Path, text: str = "#!/bin/sh\necho v1.0\n") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def environment(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("ANDROID_HOME", str(tmp_path / "sdk"))
+    monkeypatch.delenv("ANDROID_NDK_HOME", raising=False)
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"))
+    toolchain._load.cache_clear()
+    yield
+    toolchain._load.cache_clear()
+
+
+@pytest.fixture
+def discoveries(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+    discover = toolchain._discover
+    monkeypatch.setattr(toolchain, "_discover", lambda name: calls.append(name) or discover(name))
+    return calls
+
+
+def _bump_mtime(path: Path) -> None:
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_cache_hit_across_processes(tmp_path: Path, discoveries: list[str]) -> None:
+    _tool(tmp_path / "bin" / "node")
+
+    tool = toolchain.resolve("node")
+    assert (tool.path, tool.version) == (str(tmp_path / "bin" / "node"), "v1.0")
+    toolchain._load.cache_clear()  # next runner process reads the file
+    assert toolchain.resolve("node") == tool
+    assert discoveries == ["node"]
+    assert "node" in json.loads(toolchain._cache_file().read_text())["tools"]
+
+
+def test_changed_tool_file_is_rediscovered(tmp_path: Path, discoveries: list[str]) -> None:
+    node = _tool(tmp_path / "bin" / "node")
+    toolchain.resolve("node")
+
+    _tool(node, "#!/bin/sh\necho v2.0\n")
+    _bump_mtime(node)
+    assert toolchain.resolve("node").version == "v2.0"
+    assert discoveries == ["node", "node"]
+
+
+def test_new_build_tools_version_is_picked(tmp_path: Path, discoveries: list[str]) -> None:
+    build_tools = tmp_path / "sdk" / "build-tools"
+    _tool(build_tools / "33.0.2" / "aapt2")
+    assert toolchain.resolve("aapt2").version == "33.0.2"
+
+    _tool(build_tools / "34.0.0" / "aapt2")
+    _bump_mtime(build_tools)
+    assert toolchain.resolve("aapt2").path == str(build_tools / "34.0.0" / "aapt2")
+    assert toolchain.resolve("aapt2").version == "34.0.0"
+    assert discoveries == ["aapt2", "aapt2"]
+
+
+def test_ndk_from_env_overrides_sdk(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "sdk" / "ndk" / "26.1.10909125").mkdir(parents=True)
+    assert toolchain.resolve("ndk").version == "26.1.10909125"
+
+    (tmp_path / "ndk-custom").mkdir()
+    monkeypatch.setenv("ANDROID_NDK_HOME", str(tmp_path / "ndk-custom"))
+    assert toolchain.resolve("ndk").path == str(tmp_path / "ndk-custom")
+
+
+def test_removed_tool_raises(tmp_path: Path) -> None:
+    node = _tool(tmp_path / "bin" / "node")
+    toolchain.resolve("node")
+
+    node.unlink()
+    _bump_mtime(tmp_path / "bin")
+    with pytest.raises(FileNotFoundError):
+        toolchain.resolve("node")
+    assert toolchain.which("node") == "node"
+
+
+@pytest.mark.parametrize("content", ["not json", json.dumps({"version": 0, "tools": {"node": {}}}), json.dumps({"version": 1, "tools": {"node": {"x": 1}}})])
+def test_unusable_cache_file_is_ignored(tmp_path: Path, discoveries: list[str], content: str) -> None:
+    _tool(tmp_path / "bin" / "node")
+    toolchain._cache_file().parent.mkdir(parents=True)
+    toolchain._cache_file().write_text(content)
+
+    assert toolchain.resolve("node").version == "v1.0"
+    assert discoveries == ["node"]
@@ -0,0 +1,73 @@
+"""WASM bundle tar extraction cache: reuse, fallback when the cache is not writable, pruning of unused entries."""
+
+import io
+import logging
+import os
+import tarfile
+import time
+from pathlib import Path
+
+import pytest
+
+from runner import wasm
+
+
+def _bundle(path: Path, name: str = "app") -> Path:
+    with tarfile.open(path, "w") as tar:
+        for file_name, content in [(f"{name}.html", b"<html/>"), (f"{name}.js", b"main()"), (f"{name}.wasm", b"\0asm")]:
+            info = tarfile.TarInfo(file_name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache"
+
+
+def test_extraction_is_reused(tmp_path: Path, cache_home: Path) -> None:
+    tar_path = _bundle(tmp_path / "app")
+
+    html = wasm._extract_from_tar_if_needed(tar_path)
+    assert html and html.read_bytes() == b"<html/>"
+    assert html.parent.parent == cache_home / "tx-runner" / "wasm"
+    assert wasm._extract_from_tar_if_needed(tar_path) == html
+
+    _bundle(tar_path)  # rebuilt archive: new entry
+    os.utime(tar_path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert wasm._extract_from_tar_if_needed(tar_path) != html
+
+
+def test_unwritable_cache_falls_back_to_temp_dir(tmp_path: Path, cache_home: Path) -> None:
+    cache_home.write_text("not a directory")
+    tar_path = _bundle(tmp_path / "app")
+
+    html = wasm._extract_from_tar_if_needed(tar_path)
+    assert html and html.read_bytes() == b"<html/>"
+    assert html.parent.name.startswith("wasm_runner_")
+
+
+def test_broken_archive_is_reported(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    tar_path = _bundle(tmp_path / "app")
+    tar_path.write_bytes(tar_path.read_bytes()[:700])  # truncated: header of the first member only
+
+    assert wasm._extract_from_tar_if_needed(tar_path) is None
+    assert any(record.levelno == logging.WARNING and "Cannot extract" in record.message for record in caplog.records)
+
+
+def test_prune_keeps_recently_used_entries(tmp_path: Path, cache_home: Path) -> None:
+    root = cache_home / "tx-runner" / "wasm"
+    old = time.time() - 2 * wasm._EXTRACT_CACHE_MIN_AGE
+    entries = []
+    for index in range(wasm._EXTRACT_CACHE_ENTRIES + 3):
+        entry = root / f"{index:016x}"
+        entry.mkdir(parents=True)
+        if index < 2:
+            os.utime(entry, (old + index, old + index))  # least recently used and not in use anymore
+        entries.append(entry)
+
+    wasm._prune_extract_cache(root)
+
+    assert [entry.is_dir() for entry in entries] == [False, False] + [True] * (wasm._EXTRACT_CACHE_ENTRIES + 1)
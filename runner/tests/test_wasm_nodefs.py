@@ -0,0 +1,92 @@
+"""Staging of embedded data for NODEFS mounts: cached tree of links, preload script, pruning of unused trees."""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from runner import wasm_nodefs
+from runner.manifest import EmbeddedFile
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    return tmp_path / "cache" / "tx-runner" / "wasm-embedded"
+
+
+@pytest.fixture
+def runfiles(tmp_path: Path) -> Path:
+    root = tmp_path / "runfiles" / "_main"
+    for name, content in [("assets/fonts/Roboto.ttf", b"font"), ("assets/config.json", b"{}"), ("shaders/a.glsl", b"void")]:
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_bytes(content)
+    return root
+
+
+def _files(runfiles: Path) -> list[tuple[str, Path]]:
+    return [
+        ("data/fonts/Roboto.ttf", runfiles / "assets" / "fonts" / "Roboto.ttf"),
+        ("data/config.json", runfiles / "assets" / "config.json"),
+        ("shaders/a.glsl", runfiles / "shaders" / "a.glsl"),
+    ]
+
+
+def test_stage_links_layout(runfiles: Path, cache_home: Path) -> None:
+    tree = wasm_nodefs._stage(_files(runfiles))
+
+    assert tree.parent == cache_home
+    assert (tree / "data" / "fonts" / "Roboto.ttf").read_bytes() == b"font"
+    assert os.path.samefile(tree / "data" / "config.json", runfiles / "assets" / "config.json")  # hard link, no copy
+    assert wasm_nodefs._mounts(tree) == {"/data": str(tree / "data"), "/shaders": str(tree / "shaders")}
+
+
+def test_stage_reused_until_file_changes(runfiles: Path) -> None:
+    tree = wasm_nodefs._stage(_files(runfiles))
+    assert wasm_nodefs._stage(_files(runfiles)) == tree
+
+    config = runfiles / "assets" / "config.json"
+    config.unlink()  # rebuilt output: new file
+    config.write_bytes(b'{"debug": true}')
+    changed = wasm_nodefs._stage(_files(runfiles))
+    assert changed != tree
+    assert (changed / "data" / "config.json").read_bytes() == b'{"debug": true}'
+
+
+def test_preload_script(tmp_path: Path, runfiles: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(wasm_nodefs, "resolve_embedded", lambda finder, embedded: _files(runfiles))
+    embedded = [EmbeddedFile("data/config.json", "_main/assets/config.json")]
+
+    script = wasm_nodefs.make_preload_script(None, embedded)  # type: ignore[arg-type]  # finder is not used
+
+    assert script and script.name.endswith(".preload.js")
+    tree = script.with_name(script.name.removesuffix(".preload.js"))
+    content = script.read_text()
+    assert f"const mounts = {json.dumps({'/data': str(tree / 'data'), '/shaders': str(tree / 'shaders')})};" in content
+    assert wasm_nodefs.make_preload_script(None, []) is None  # type: ignore[arg-type]
+
+
+def test_root_files_are_not_mounted(runfiles: Path, caplog: pytest.LogCaptureFixture) -> None:
+    tree = wasm_nodefs._stage([("README", runfiles / "assets" / "config.json")])
+
+    assert wasm_nodefs._mounts(tree) == {}
+    assert any("not mounted" in record.message for record in caplog.records)
+
+
+def test_prune_keeps_recently_used_trees(cache_home: Path) -> None:
+    old = time.time() - 2 * wasm_nodefs._CACHE_MIN_AGE
+    trees = []
+    for index in range(wasm_nodefs._CACHE_ENTRIES + 2):
+        tree = cache_home / f"{index:016x}"
+        tree.mkdir(parents=True)
+        tree.with_name(f"{tree.name}.preload.js").write_text("")
+        if index == 0:
+            os.utime(tree, (old, old))
+        trees.append(tree)
+
+    wasm_nodefs._prune(cache_home)
+
+    assert [tree.is_dir() for tree in trees] == [False] + [True] * (wasm_nodefs._CACHE_ENTRIES + 1)
+    assert not (cache_home / f"{0:016x}.preload.js").exists()
@@ -4,13 +4,30 @@ Utility to replace a symlink directory with a real directory containing symlinks
 
 Usage:
     python replace_symlink.py <directory_path>
+    python replace_symlink.py --sync <directory_path>  # incremental update after upstream changes
+    python replace_symlink.py --materialize <directory_path>  # real files (hardlinks/reflinks/zero-copy copies)
 """
 import argparse
+import errno
+import json
 import os
 import shutil
+import stat
 import sys
-from dataclasses import dataclass
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from collections.abc import Callable
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TypeVar
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no reflinks
+    fcntl = None
+
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)  # I/O bound: more threads than CPUs
 
 
 @dataclass
@@ -20,6 +37,423 @@ class Options:
     verbose: bool = False
     replace: bool = False
     force: bool = False
+    sync: bool = False
+    materialize: bool = False
+    jobs: int = DEFAULT_JOBS
+
+
+@dataclass
+class WalkStats:
+    """Counters of created elements"""
+    dirs: int = 0
+    files: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.files} symlinks, {self.dirs} directories in {self.elapsed:.3f}s"
+
+
+_R = TypeVar("_R")
+
+
+@dataclass
+class _DirResult:
+    """Result of processing one source directory"""
+    subdirs: list[tuple[str, str, str]] = field(default_factory=list)  # (src, dst, relative)
+    dirs: int = 0
+    files: int = 0
+    messages: list[str] = field(default_factory=list)
+
+
+def _process_dir(src_dir: str, dst_dir: str, rel_dir: str, verbose: bool) -> _DirResult:
+    """Create real subdirectories and symlinks to files for one directory level.
+
+    os.scandir() DirEntry keeps file type from directory listing, so no extra stat per entry.
+    """
+    result = _DirResult()
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            dst_item = os.path.join(dst_dir, entry.name)
+            rel_item = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                # For directories create real directories
+                if verbose:
+                    result.messages.append(f"  Creating directory: {rel_item}\n")
+                try:
+                    os.mkdir(dst_item)
+                except FileExistsError:
+                    pass
+                result.dirs += 1
+                result.subdirs.append((entry.path, dst_item, rel_item))
+            else:
+                # For files (and symlinks to directories) create symlinks
+                if verbose:
+                    result.messages.append(f"  Creating symlink: {rel_item} -> {entry.path}\n")
+                os.symlink(entry.path, dst_item)
+                result.files += 1
+    return result
+
+
+def _walk_parallel(jobs: int, process_dir: Callable[..., _R], root: tuple, on_result: Callable[[_R], None]) -> None:
+    """Run process_dir for root directory and then for subdirectories it returns in thread pool.
+
+    Each directory level is a task, subdirectories are submitted when their parent is processed
+    (so directories are always created before their content).
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        pending: set[Future[_R]] = {pool.submit(process_dir, *root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                on_result(result)
+                for subdir in result.subdirs:
+                    pending.add(pool.submit(process_dir, *subdir))
+
+
+def create_symlink_structure(src_root: Path, dst_root: Path, jobs: int = DEFAULT_JOBS, verbose: bool = False) -> WalkStats:
+    """Recreate directory structure of src_root in dst_root with symlinks to files using thread pool.
+
+    Verbose output is printed in batches per directory.
+    """
+    stats = WalkStats()
+    start = time.perf_counter()
+
+    def on_result(result: _DirResult) -> None:
+        stats.dirs += result.dirs
+        stats.files += result.files
+        if result.messages:
+            sys.stdout.write("".join(result.messages))
+
+    _walk_parallel(jobs, lambda *args: _process_dir(*args, verbose), (str(src_root), str(dst_root), ""), on_result)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+################################################################
+# Materialization (real files instead of symlinks)
+
+_FICLONE = 0x40049409  # linux/fs.h: _IOW(0x94, 9, int)
+_COPY_CHUNK = 1 << 30
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTSUP, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EPERM, errno.EBADF}
+
+METHOD_HARDLINK = "hardlink"
+METHOD_REFLINK = "reflink"
+METHOD_COPY_FILE_RANGE = "copy_file_range"
+METHOD_SENDFILE = "sendfile"
+METHOD_COPY = "copy"
+
+# Methods found unsupported for (src device, dst device) pair are not tried again for other files
+_unsupported: set[tuple[str, int, int]] = set()
+
+
+@dataclass
+class MaterializeStats:
+    """Counters of materialized files by method"""
+    dirs: int = 0
+    files: int = 0
+    symlinks: int = 0
+    bytes_total: int = 0
+    bytes_written: int = 0
+    methods: dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        methods = ", ".join(f"{method}: {count}" for method, count in sorted(self.methods.items())) or "none"
+        return (f"{self.files} files ({methods}), {self.dirs} directories, {self.symlinks} directory symlinks in {self.elapsed:.3f}s; "
+                f"{self.bytes_total} bytes materialized, {self.bytes_written} bytes actually written")
+
+
+@dataclass
+class _MaterializeResult:
+    """Result of materializing one directory level"""
+    subdirs: list[tuple[str, str, str, int]] = field(default_factory=list)  # (src, dst, relative, dst device)
+    dirs: int = 0
+    symlinks: int = 0
+    bytes_total: int = 0
+    bytes_written: int = 0
+    methods: dict[str, int] = field(default_factory=dict)
+    messages: list[str] = field(default_factory=list)
+
+
+def _try_method(method: str, devices: tuple[int, int], action: Callable[[], int]) -> int | None:
+    """Run copy method returning bytes written or None if it's not supported (remembered for the devices pair)."""
+    key = (method, *devices)
+    if key in _unsupported:
+        return None
+    try:
+        return action()
+    except AttributeError:
+        # os.copy_file_range/os.sendfile are not available on the platform
+        _unsupported.add(key)
+        return None
+    except OSError as e:
+        if e.errno in _UNSUPPORTED_ERRNOS:
+            _unsupported.add(key)
+            return None
+        if e.errno == errno.EMLINK:
+            return None  # too many hardlinks to this file only
+        raise
+
+
+def _copy_with_offsets(copy: Callable[[int, int, int, int], int], fd_src: int, fd_dst: int, size: int) -> int:
+    written = 0
+    while written < size:
+        count = copy(fd_src, fd_dst, written, min(_COPY_CHUNK, size - written))
+        if count == 0:
+            break
+        written += count
+    return written
+
+
+def _materialize_file(src: str, dst: str, src_stat: os.stat_result, dst_dev: int) -> tuple[str, int]:
+    """Create real file dst with content of src choosing the cheapest method: hardlink, reflink, zero-copy copy, plain copy.
+
+    Returns used method and bytes actually written.
+    """
+    devices = (src_stat.st_dev, dst_dev)
+    if src_stat.st_dev == dst_dev:
+        if _try_method(METHOD_HARDLINK, devices, lambda: os.link(src, dst) or 0) is not None:
+            return METHOD_HARDLINK, 0
+
+    size = src_stat.st_size
+    with open(src, "rb") as f_src, open(dst, "wb") as f_dst:
+        fd_src, fd_dst = f_src.fileno(), f_dst.fileno()
+        try:
+            if fcntl and _try_method(METHOD_REFLINK, devices, lambda: fcntl.ioctl(fd_dst, _FICLONE, fd_src) or 0) is not None:
+                return METHOD_REFLINK, 0
+
+            def copy_file_range(fd_in: int, fd_out: int, offset: int, count: int) -> int:
+                return os.copy_file_range(fd_in, fd_out, count, offset, offset)
+
+            written = _try_method(METHOD_COPY_FILE_RANGE, devices, lambda: _copy_with_offsets(copy_file_range, fd_src, fd_dst, size))
+            if written is not None:
+                return METHOD_COPY_FILE_RANGE, written
+            os.ftruncate(fd_dst, 0)
+
+            def sendfile(fd_in: int, fd_out: int, offset: int, count: int) -> int:
+                os.lseek(fd_out, offset, os.SEEK_SET)
+                return os.sendfile(fd_out, fd_in, offset, count)
+
+            written = _try_method(METHOD_SENDFILE, devices, lambda: _copy_with_offsets(sendfile, fd_src, fd_dst, size))
+            if written is not None:
+                return METHOD_SENDFILE, written
+            os.ftruncate(fd_dst, 0)
+            os.lseek(fd_dst, 0, os.SEEK_SET)
+
+            shutil.copyfileobj(f_src, f_dst)
+            return METHOD_COPY, size
+        finally:
+            os.chmod(fd_dst, stat.S_IMODE(src_stat.st_mode))
+
+
+def _materialize_dir(src_dir: str, dst_dir: str, rel_dir: str, dst_dev: int, verbose: bool) -> _MaterializeResult:
+    """Create real subdirectories and real files for one directory level.
+
+    Symlinks to files are materialized from their targets, symlinks to directories are kept as symlinks (avoiding cycles).
+    """
+    result = _MaterializeResult()
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            dst_item = os.path.join(dst_dir, entry.name)
+            rel_item = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                if verbose:
+                    result.messages.append(f"  Creating directory: {rel_item}\n")
+                os.mkdir(dst_item)
+                result.dirs += 1
+                result.subdirs.append((entry.path, dst_item, rel_item, dst_dev))
+            elif entry.is_dir():
+                if verbose:
+                    result.messages.append(f"  Creating symlink: {rel_item} -> {entry.path}\n")
+                os.symlink(entry.path, dst_item)
+                result.symlinks += 1
+            else:
+                src_stat = entry.stat()
+                src_file = os.path.realpath(entry.path) if entry.is_symlink() else entry.path  # hardlink target, not the symlink
+                method, written = _materialize_file(src_file, dst_item, src_stat, dst_dev)
+                if verbose:
+                    result.messages.append(f"  Materializing ({method}): {rel_item}\n")
+                result.methods[method] = result.methods.get(method, 0) + 1
+                result.bytes_total += src_stat.st_size
+                result.bytes_written += written
+    return result
+
+
+def materialize_structure(src_root: Path, dst_root: Path, jobs: int = DEFAULT_JOBS, verbose: bool = False) -> MaterializeStats:
+    """Recreate directory structure of src_root in dst_root with real files using thread pool."""
+    stats = MaterializeStats()
+    start = time.perf_counter()
+
+    def on_result(result: _MaterializeResult) -> None:
+        stats.dirs += result.dirs
+        stats.symlinks += result.symlinks
+        stats.bytes_total += result.bytes_total
+        stats.bytes_written += result.bytes_written
+        for method, count in result.methods.items():
+            stats.methods[method] = stats.methods.get(method, 0) + count
+            stats.files += count
+        if result.messages:
+            sys.stdout.write("".join(result.messages))
+
+    dst_dev = os.stat(dst_root).st_dev
+    _walk_parallel(jobs, lambda *args: _materialize_dir(*args, verbose), (str(src_root), str(dst_root), "", dst_dev), on_result)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+################################################################
+# Incremental resync
+
+@dataclass
+class SyncStats:
+    """Counters of incremental resync changes"""
+    added: int = 0
+    removed: int = 0
+    retargeted: int = 0
+    scanned_dirs: int = 0
+    skipped_dirs: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.added} added, {self.removed} removed, {self.retargeted} retargeted; "
+                f"{self.scanned_dirs} directories scanned, {self.skipped_dirs} unchanged in {self.elapsed:.3f}s")
+
+
+@dataclass
+class _SyncResult:
+    """Result of syncing one directory level"""
+    rel_dir: str
+    state: dict | None  # {"mtime_ns": ..., "subdirs": [...]} of the source directory
+    subdirs: list[tuple[str, str, str]] = field(default_factory=list)  # (src, dst, relative)
+    added: int = 0
+    removed: int = 0
+    retargeted: int = 0
+    scanned: bool = True
+    messages: list[str] = field(default_factory=list)
+
+
+def _sync_state_path(new_dir: Path) -> Path:
+    """State of the last sync (source root and directory mtimes) is stored next to the file-symlink tree."""
+    return new_dir.with_name(f"{new_dir.name}.sync.json")
+
+
+def _load_sync_state(state_path: Path, src_root: Path) -> dict[str, dict]:
+    try:
+        state = json.loads(state_path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if state.get("source") != str(src_root):
+        # Resolved source changed: all symlinks must be retargeted, so don't trust directory mtimes
+        return {}
+    return state.get("dirs", {})
+
+
+def _remove(path: str, is_dir: bool) -> None:
+    if is_dir:
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def _sync_dir(src_dir: str, dst_dir: str, rel_dir: str, dirs_state: dict[str, dict], verbose: bool) -> _SyncResult:
+    """Diff one directory level of the file-symlink tree against source and apply changes.
+
+    Directory mtime changes only when its own entries are added, removed or renamed,
+    so unchanged directories are not listed, only their (known from state) subdirectories are visited.
+    """
+    mtime_ns = os.stat(src_dir).st_mtime_ns  # before listing to catch changes made during sync next time
+    known = dirs_state.get(rel_dir)
+    if known and known["mtime_ns"] == mtime_ns and os.path.isdir(dst_dir):
+        result = _SyncResult(rel_dir, known, scanned=False)
+        for name in known["subdirs"]:
+            rel_item = os.path.join(rel_dir, name) if rel_dir else name
+            result.subdirs.append((os.path.join(src_dir, name), os.path.join(dst_dir, name), rel_item))
+        return result
+
+    result = _SyncResult(rel_dir, {"mtime_ns": mtime_ns, "subdirs": []})
+    with os.scandir(dst_dir) as entries:
+        existing = {entry.name: entry.is_dir(follow_symlinks=False) for entry in entries}
+
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            dst_item = os.path.join(dst_dir, entry.name)
+            rel_item = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+            src_is_dir = entry.is_dir(follow_symlinks=False)
+            dst_is_dir = existing.pop(entry.name, None)
+
+            if src_is_dir:
+                if dst_is_dir is False:
+                    _remove(dst_item, is_dir=False)
+                    result.removed += 1
+                if dst_is_dir is not True:
+                    if verbose:
+                        result.messages.append(f"  + {rel_item}/\n")
+                    os.mkdir(dst_item)
+                    result.added += 1
+                result.state["subdirs"].append(entry.name)
+                result.subdirs.append((entry.path, dst_item, rel_item))
+            elif dst_is_dir is None:
+                if verbose:
+                    result.messages.append(f"  + {rel_item} -> {entry.path}\n")
+                os.symlink(entry.path, dst_item)
+                result.added += 1
+            elif dst_is_dir:
+                if verbose:
+                    result.messages.append(f"  ~ {rel_item}/ -> {entry.path}\n")
+                shutil.rmtree(dst_item)
+                os.symlink(entry.path, dst_item)
+                result.retargeted += 1
+            else:
+                try:
+                    current = os.readlink(dst_item)
+                except OSError:
+                    current = None  # regular file in place of symlink
+                if current != entry.path:
+                    if verbose:
+                        result.messages.append(f"  ~ {rel_item} -> {entry.path}\n")
+                    os.unlink(dst_item)
+                    os.symlink(entry.path, dst_item)
+                    result.retargeted += 1
+
+    # Remaining entries don't exist in source anymore
+    for name, is_dir in existing.items():
+        if verbose:
+            result.messages.append(f"  - {os.path.join(rel_dir, name) if rel_dir else name}{'/' if is_dir else ''}\n")
+        _remove(os.path.join(dst_dir, name), is_dir)
+        result.removed += 1
+    return result
+
+
+def sync_symlink_structure(src_root: Path, dst_root: Path, jobs: int = DEFAULT_JOBS, verbose: bool = False) -> SyncStats:
+    """Incrementally update existing file-symlink tree dst_root to match src_root.
+
+    Only added, removed or retargeted entries are touched, directories unchanged since the last sync (by mtime) are not listed.
+    """
+    stats = SyncStats()
+    start = time.perf_counter()
+    state_path = _sync_state_path(dst_root)
+    dirs_state = _load_sync_state(state_path, src_root)
+    new_dirs_state: dict[str, dict] = {}
+
+    def on_result(result: _SyncResult) -> None:
+        stats.added += result.added
+        stats.removed += result.removed
+        stats.retargeted += result.retargeted
+        if result.scanned:
+            stats.scanned_dirs += 1
+        else:
+            stats.skipped_dirs += 1
+        if result.state is not None:
+            new_dirs_state[result.rel_dir] = result.state
+        if result.messages:
+            sys.stdout.write("".join(result.messages))
+
+    _walk_parallel(jobs, lambda *args: _sync_dir(*args, dirs_state, verbose), (str(src_root), str(dst_root), ""), on_result)
+
+    state_path.write_text(json.dumps({"source": str(src_root), "dirs": new_dirs_state}))
+    stats.elapsed = time.perf_counter() - start
+    return stats
 
 
 def process_symlink_directory(options: Options) -> None:
@@ -58,13 +492,24 @@ def process_symlink_directory(options: Options) -> None:
     print(f"Resolved path: {resolved_path}")
     
     # Create new directory next to target
-    new_dir_name = f"{original_symlink.name}.file_symlinks"
+    new_dir_name = f"{original_symlink.name}.{'materialized' if options.materialize else 'file_symlinks'}"
     new_dir = original_symlink.parent / new_dir_name
     
+    if options.sync:
+        # Sync into empty directory on first run, so the state for the next sync is stored within the same pass
+        if not new_dir.is_dir():
+            print(f"Creating new directory: {new_dir}")
+            new_dir.mkdir(parents=True)
+        print(f"Syncing directory: {new_dir}")
+        sync_stats = sync_symlink_structure(resolved_path, new_dir, jobs=options.jobs, verbose=options.verbose)
+        print(f"Synced: {sync_stats}")
+        return
+
     if new_dir.exists():
         if options.force:
             print(f"Removing existing directory: {new_dir}")
             shutil.rmtree(new_dir)
+            _sync_state_path(new_dir).unlink(missing_ok=True)
         else:
             print(f"Error: Directory '{new_dir}' already exists", file=sys.stderr)
             sys.exit(1)
@@ -72,29 +517,15 @@ def process_symlink_directory(options: Options) -> None:
     print(f"Creating new directory: {new_dir}")
     new_dir.mkdir(parents=True, exist_ok=False)
     
-    # Recursively traverse resolved directory
-    def create_symlink_structure(src_dir: Path, dst_dir: Path) -> None:
-        """Recursively create structure with symlinks to files"""
-        for item in src_dir.iterdir():
-            src_item = item
-            dst_item = dst_dir / item.name
-            
-            if src_item.is_dir() and not src_item.is_symlink():
-                # For directories create real directories
-                if options.verbose:
-                    print(f"  Creating directory: {dst_item.relative_to(new_dir)}")
-                dst_item.mkdir(exist_ok=True)
-                # Recursively process contents
-                create_symlink_structure(src_item, dst_item)
-            else:
-                # For files create symlinks
-                if options.verbose:
-                    print(f"  Creating symlink: {dst_item.relative_to(new_dir)} -> {src_item}")
-                dst_item.symlink_to(src_item)
-    
     # Create structure
-    print(f"Creating symlink structure...")
-    create_symlink_structure(resolved_path, new_dir)
+    if options.materialize:
+        print(f"Materializing files ({options.jobs} jobs)...")
+        materialize_stats = materialize_structure(resolved_path, new_dir, jobs=options.jobs, verbose=options.verbose)
+        print(f"Materialized {materialize_stats}")
+    else:
+        print(f"Creating symlink structure ({options.jobs} jobs)...")
+        stats = create_symlink_structure(resolved_path, new_dir, jobs=options.jobs, verbose=options.verbose)
+        print(f"Created {stats}")
     print(f"New directory created: {new_dir}")
     
     if options.replace:
@@ -150,13 +581,38 @@ def main():
         action="store_true",
         help="Remove existing directory if it already exists"
     )
+    parser.add_argument(
+        "-s", "--sync",
+        action="store_true",
+        help="Incrementally update existing .file_symlinks directory (add, remove or retarget only changed entries)"
+    )
+    parser.add_argument(
+        "-m", "--materialize",
+        action="store_true",
+        help="Create <name>.materialized with real files instead of symlinks (for tools that don't follow symlinks): "
+             "hardlinks on the same filesystem, reflinks on CoW filesystems, else zero-copy copy_file_range/sendfile. "
+             "NOTE: hardlinked files share content with the source, don't modify them in place"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Number of parallel threads creating directories and symlinks (default: {DEFAULT_JOBS})"
+    )
     
     args = parser.parse_args()
+    if args.sync and args.replace:
+        parser.error("--sync keeps .file_symlinks next to the original symlink, it cannot be combined with --replace")
+    if args.sync and args.materialize:
+        parser.error("--sync works with symlinks only, it cannot be combined with --materialize")
     options = Options(
         target_path=args.target_path,
         verbose=args.verbose,
         replace=args.replace,
-        force=args.force
+        force=args.force,
+        sync=args.sync,
+        materialize=args.materialize,
+        jobs=args.jobs,
     )
     process_symlink_directory(options)
 